@@ -0,0 +1,264 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished
+from django.db import connections, transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from .models import AccessLog, AccessLogDailyRollup
+
+logger = logging.getLogger(__name__)
+
+# Flush once this many events are buffered, or once the oldest event is this old.
+ACCESS_LOG_FLUSH_SIZE = getattr(settings, 'ACCESS_LOG_FLUSH_SIZE', 200)
+ACCESS_LOG_FLUSH_INTERVAL_MS = getattr(settings, 'ACCESS_LOG_FLUSH_INTERVAL_MS', 5000)
+# Hard cap on buffered events; if the database is unreachable the oldest events are dropped.
+ACCESS_LOG_MAX_BUFFER = getattr(settings, 'ACCESS_LOG_MAX_BUFFER', 10000)
+# Retention: raw rows older than this are moved to gzip JSONL files (daily rollups are kept).
+ACCESS_LOG_RETENTION_DAYS = getattr(settings, 'ACCESS_LOG_RETENTION_DAYS', 365)
+ACCESS_LOG_ARCHIVE_DIR = getattr(settings, 'ACCESS_LOG_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archive' / 'access_log')
+
+
+class AccessLogBuffer:
+    """Per-process queue of AccessLog rows written with bulk_create.
+
+    Events are flushed at the end of a request (request_finished) or by a background timer
+    thread, never inside a view, so a rolled-back view transaction cannot take other users'
+    events with it. The timer keeps the interval bound when a worker sees no further traffic.
+    Remaining events are flushed at interpreter shutdown.
+    """
+
+    def __init__(self, flush_size=ACCESS_LOG_FLUSH_SIZE, interval_ms=ACCESS_LOG_FLUSH_INTERVAL_MS,
+                 max_size=ACCESS_LOG_MAX_BUFFER):
+        self.flush_size = flush_size
+        self.interval = interval_ms / 1000
+        self._events = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        self._oldest = None
+        self._timer_pid = None
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, user_id, action, ip_address=None):
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(AccessLog(user_id=user_id, action=action, ip_address=ip_address, timestamp=timezone.now()))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._start_timer()
+
+    def is_due(self):
+        with self._lock:
+            return bool(self._events) and (
+                len(self._events) >= self.flush_size or time.monotonic() - self._oldest >= self.interval
+            )
+
+    def _start_timer(self):
+        # Started on first use rather than at import, and again in each forked worker
+        # (threads do not survive a fork). Called with the lock held.
+        if self._timer_pid == os.getpid():
+            return
+        self._timer_pid = os.getpid()
+        threading.Thread(target=self._run_timer, name='access-log-flush', daemon=True).start()
+
+    def _run_timer(self):
+        while True:
+            time.sleep(self.interval / 2)
+            if not self.is_due():
+                continue
+            try:
+                self.flush()
+            finally:
+                # The thread's own connection; don't hold it open between flushes
+                connections.close_all()
+
+    def flush(self):
+        """Write every buffered event with one user check and one bulk insert. Returns the number written."""
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            self._oldest = None
+        if not events:
+            return 0
+        try:
+            # Users deleted since the event was buffered would fail the whole batch on the FK
+            live = set(get_user_model().objects.filter(pk__in={e.user_id for e in events}).values_list('pk', flat=True))
+            events = [e for e in events if e.user_id in live]
+            AccessLog.objects.bulk_create(events, batch_size=500)
+        except Exception:
+            # Put the events back (bounded by maxlen) so the next flush retries them
+            logger.exception("Could not write %d access log events", len(events))
+            with self._lock:
+                self._events.extendleft(reversed(events))
+                self._oldest = time.monotonic()
+            return 0
+        return len(events)
+
+
+access_log_buffer = AccessLogBuffer()
+
+
+def client_ip(request):
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0]
+    return request.META.get('REMOTE_ADDR')
+
+
+def log_access(request, action, user=None):
+    """Record an action (login, logout, decision, export) for the request's user. Costs no query."""
+    user = user or request.user
+    if not user or not user.is_authenticated:
+        return
+    access_log_buffer.add(user.pk, action[:50], client_ip(request))
+
+
+def flush_if_due(sender=None, **kwargs):
+    if access_log_buffer.is_due():
+        access_log_buffer.flush()
+
+
+request_finished.connect(flush_if_due, dispatch_uid="access_log_flush")
+atexit.register(access_log_buffer.flush)
+
+
+# --- ROLLUPS ---
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return start, start + timedelta(days=1)
+
+
+def rollup_day(day):
+    """(Re)build the per-user, per-action summary for one day from the raw rows. Safe to re-run.
+
+    A day with no raw rows left (already archived) keeps its existing summary.
+    Returns the number of summary rows written.
+    """
+    start, end = _day_bounds(day)
+    rows = list(
+        AccessLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        .values('user', 'action')
+        .annotate(total=Count('id'), first=Min('timestamp'), last=Max('timestamp'))
+        .order_by()
+    )
+    if not rows:
+        return 0
+    with transaction.atomic():
+        AccessLogDailyRollup.objects.filter(day=day).delete()
+        AccessLogDailyRollup.objects.bulk_create([
+            AccessLogDailyRollup(
+                day=day, user_id=row['user'], action=row['action'],
+                count=row['total'], first_seen=row['first'], last_seen=row['last'],
+            )
+            for row in rows
+        ], batch_size=1000)
+    return len(rows)
+
+
+def rollup_missing_days(before):
+    """Summarise every day before the given datetime that has raw rows but no summary yet."""
+    oldest = AccessLog.objects.filter(timestamp__lt=before).aggregate(oldest=Min('timestamp'))['oldest']
+    if oldest is None:
+        return 0
+    first_day = timezone.localtime(oldest).date()
+    last_day = timezone.localtime(before).date()
+    done = set(AccessLogDailyRollup.objects.filter(day__gte=first_day, day__lte=last_day).values_list('day', flat=True).distinct())
+    written = 0
+    day = first_day
+    while day <= last_day:
+        if day not in done:
+            written += rollup_day(day)
+        day += timedelta(days=1)
+    return written
+
+
+# --- RETENTION ---
+
+def _archive_path(directory, month):
+    return Path(directory) / f"access_log_{month}.jsonl.gz"
+
+
+def archive_access_logs(before, directory=None, batch_size=5000):
+    """Move raw rows older than `before` into one gzip JSONL file per month, then delete them.
+
+    Days are summarised first so reporting is unaffected. Each batch is appended to
+    the archive before it is deleted; if the job dies in between, the rows are simply
+    archived again on the next run (rehydration ignores duplicates). Returns the rows moved.
+    """
+    directory = Path(directory or ACCESS_LOG_ARCHIVE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    rollup_missing_days(before)
+
+    old_rows = AccessLog.objects.filter(timestamp__lt=before).order_by('pk').values(
+        'id', 'user_id', 'action', 'ip_address', 'timestamp'
+    )
+    moved = 0
+    while True:
+        batch = list(old_rows[:batch_size])
+        if not batch:
+            break
+        by_month = {}
+        for row in batch:
+            by_month.setdefault(row['timestamp'].strftime('%Y-%m'), []).append(row)
+        for month, rows in by_month.items():
+            # 'at' appends a new gzip member; gzip.open reads multi-member files transparently
+            with gzip.open(_archive_path(directory, month), 'at', encoding='utf-8') as fh:
+                for row in rows:
+                    fh.write(json.dumps({**row, 'timestamp': row['timestamp'].isoformat()}) + "\n")
+        AccessLog.objects.filter(pk__in=[row['id'] for row in batch]).delete()
+        moved += len(batch)
+    return moved
+
+
+def read_archive(path, since=None, until=None):
+    """Yield archived rows (dicts with an aware 'timestamp') from one archive file, optionally within a time window."""
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+            if since and row['timestamp'] < since:
+                continue
+            if until and row['timestamp'] >= until:
+                continue
+            yield row
+
+
+def rehydrate_access_logs(path, since=None, until=None, batch_size=5000):
+    """Load archived rows back into AccessLog (original ids, so re-running is harmless). Returns rows read."""
+    User = get_user_model()
+    read = 0
+
+    def load(rows):
+        live = set(User.objects.filter(pk__in={r['user_id'] for r in rows}).values_list('pk', flat=True))
+        AccessLog.objects.bulk_create(
+            [AccessLog(**row) for row in rows if row['user_id'] in live], batch_size=batch_size, ignore_conflicts=True
+        )
+
+    batch = []
+    for row in read_archive(path, since, until):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            load(batch)
+            read += len(batch)
+            batch = []
+    if batch:
+        load(batch)
+        read += len(batch)
+    return read
@@ -1,14 +1,19 @@
 import csv
 import io
 import json
-from datetime import timedelta, datetime
-from django.contrib import admin
+from datetime import datetime
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseRedirect
 from django.utils import timezone
+from django.utils.functional import cached_property
+from django.core.paginator import Paginator
+from django.db import connection
 from django.db.models import Count
 from django.contrib.admin import SimpleListFilter
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.timezone import localdate
 from django.contrib.admin.models import LogEntry
 
@@ -20,12 +25,27 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 
-from .forms import CustomUserChangeForm, CustomUserCreationForm
+from .forms import CustomUserChangeForm, CustomUserCreationForm, HRImportForm
 
 from .models import (
     CustomUser, UserRole, Directorate, 
-    RequestedSystem, AccessRequest, SystemAnalytics, AccessLog
+    RequestedSystem, AccessRequest, SystemAnalytics, AccessLog,
+    NotificationPreference, NotificationOutbox, AccessLogDailyRollup, ArchivedAccessRequest,
+    ProvisioningJob, DormantAccessFinding, DailyRequestFact, CalendarDay, DirectorateSLA, EscalationNotice,
+    HodDelegation, SystemAdminAssignment, RecertificationCampaign, RecertificationItem, BulkRevocation, BulkRevocationItem
 )
+from .access_log import log_access
+from .archive import restore_request
+from .assignment import rebalance
+from .dormancy import revoke_findings
+from .notifications import dispatch
+from .recertification import decide as decide_recertification, progress as recertification_progress
+from .revocation import revoke
+from .request_facts import directorate_trends, monthly_trends
+from .search import filter_by_search, is_ip_term, search_users
+from .sla import recompute_due_dates, renumber_calendar
+from .stage_latency import DIMENSIONS, stage_latency
+from .user_import import import_users, read_extract
 
 # ==========================================
 # 0. CONFIGURATION
@@ -34,24 +54,58 @@ admin.site.site_header = "TSC SYSTEM ADMINISTRATION"
 admin.site.site_title = "TSC Admin Portal"
 admin.site.index_title = "System Control Center"
 
+# Unfiltered changelists on tables larger than this show the database's row estimate instead of COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = 100000
+
 # ==========================================
 # 1. FILTERS & HELPERS
 # ==========================================
+class EstimatedCountPaginator(Paginator):
+    """Paginator for large tables: an unfiltered changelist reads the row estimate from
+    MySQL table statistics instead of running COUNT(*) over the whole table.
+    Filtered/searched lists and small tables keep the exact count.
+    """
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where and connection.vendor == 'mysql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [self.object_list.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] and row[0] > ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
 class OverdueFilter(SimpleListFilter):
     title = 'Turnaround Status'
     parameter_name = 'turnaround'
     def lookups(self, request, model_admin):
-        return (('overdue', '⚠️ Overdue (>3 Days)'), ('today', '📅 Submitted Today'))
+        return (('overdue', '⚠️ Overdue (past SLA)'), ('today', '📅 Submitted Today'))
     def queryset(self, request, queryset):
         now = timezone.now()
         if self.value() == 'overdue':
-            threshold = now - timedelta(days=3)
-            return queryset.filter(submitted_at__lt=threshold).exclude(status__in=['approved', 'rejected_hod', 'rejected_ict'])
+            # due_at is only set while a stage is open, so this is one range scan on its index
+            return queryset.filter(due_at__lt=now)
         if self.value() == 'today':
             return queryset.filter(submitted_at__date=now.date())
 
+class IndexedSearchMixin:
+    """Route changelist searches through search.py (indexed TSC prefix / name tokens)
+    instead of %term% scans over search_fields. search_fields is still declared so the
+    search box and autocomplete lookups are enabled.
+    """
+    search_tsc_field = 'tsc_no'
+    search_user_field = 'requester'
+
+    def get_search_results(self, request, queryset, search_term):
+        return filter_by_search(queryset, search_term, self.search_tsc_field, self.search_user_field), False
+
 def export_to_csv(modeladmin, request, queryset):
     opts = modeladmin.model._meta
+    log_access(request, f"Export CSV ({opts.model_name})")
     response = HttpResponse(content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename=TSC_{opts.verbose_name_plural}_{timezone.now().date()}.csv'
     writer = csv.writer(response)
@@ -68,9 +122,18 @@ def export_to_csv(modeladmin, request, queryset):
     return response
 export_to_csv.short_description = "📊 Export Selected to CSV"
 
+def revocation_message(modeladmin, request, revocation):
+    if revocation is None:
+        return
+    if revocation.status == 'done':
+        modeladmin.message_user(request, f"{revocation.revoked} right(s) REVOKED and queued for de-provisioning.")
+    else:
+        modeladmin.message_user(request, f"{revocation.total} right(s) queued for revocation as Bulk Revocation #{revocation.pk}; follow its progress under Bulk Revocations.", messages.WARNING)
+
 def revoke_access(modeladmin, request, queryset):
-    queryset.update(sysadmin_status='revoked', sysadmin_decision_date=timezone.now())
-    modeladmin.message_user(request, "Selected rights have been REVOKED.")
+    revocation = revoke(queryset, "Revoked by admin (security)", request.user)
+    log_access(request, f"Bulk revocation #{revocation.pk}")
+    revocation_message(modeladmin, request, revocation)
 revoke_access.short_description = "⛔ Revoke Access (Security)"
 
 # ==========================================
@@ -94,13 +157,18 @@ class RequestedSystemInline(admin.TabularInline):
     model = RequestedSystem
     extra = 0
     can_delete = False
-    fields = ('system', 'level_of_access', 'visual_status', 'sysadmin_comment')
-    readonly_fields = ('system', 'level_of_access', 'visual_status', 'sysadmin_comment')
+    fields = ('system', 'level_of_access', 'visual_status', 'open_stage', 'due_at', 'sysadmin_assignee', 'assigned_to', 'sysadmin_comment')
+    readonly_fields = ('system', 'level_of_access', 'visual_status', 'open_stage', 'due_at', 'sysadmin_assignee', 'assigned_to', 'sysadmin_comment')
     def visual_status(self, obj):
         colors = {'approved': 'green', 'rejected': 'red', 'pending': 'orange', 'revoked': 'black'}
         return format_html('<span style="color:{}; font-weight:900;">● {}</span>', colors.get(obj.sysadmin_status, 'gray'), obj.get_sysadmin_status_display())
     visual_status.short_description = "Status"
 
+class DirectorateSLAInline(admin.StackedInline):
+    model = DirectorateSLA
+    can_delete = True
+    verbose_name_plural = "SLA (business days per stage; empty uses the system default)"
+
 # ==========================================
 # 3. ADMIN CLASSES
 # ==========================================
@@ -109,7 +177,15 @@ class RequestedSystemInline(admin.TabularInline):
 class DirectorateAdmin(admin.ModelAdmin):
     list_display = ['name', 'hod_email', 'staff_count']
     search_fields = ['name', 'hod_email']
-    def staff_count(self, obj): return obj.users.count()
+    inlines = [DirectorateSLAInline]
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(staff_total=Count('users'))
+    def staff_count(self, obj): return obj.staff_total
+    staff_count.admin_order_field = 'staff_total'
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Open requests of this directorate move to the new SLA
+        recompute_due_dates(directorate_ids=[form.instance.pk])
 
 
 class CustomUserAdmin(UserAdmin):
@@ -118,7 +194,10 @@ class CustomUserAdmin(UserAdmin):
     model = CustomUser
 
     list_display = ('tsc_no', 'full_name', 'email', 'directorate', 'is_staff')
+    list_select_related = ('directorate',)
     search_fields = ('tsc_no', 'full_name', 'email')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     ordering = ('tsc_no',)
 
     fieldsets = (
@@ -150,13 +229,50 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # Indexed search (see search.py). User pickers (autocomplete_fields elsewhere) get
+        # ranked results, paged 20 at a time by the autocomplete view.
+        term = search_term.strip()
+        if '@' in term:
+            return queryset.filter(email__istartswith=term), False
+        if request.resolver_match and request.resolver_match.url_name == 'autocomplete':
+            return search_users(term, queryset), False
+        return filter_by_search(queryset, term, 'tsc_no', 'pk'), False
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='access_request_customuser_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """Bulk HR import (see user_import.py); the same path as the import_hr_users command."""
+        if not self.has_add_permission(request):
+            return HttpResponse(status=403)
+        summary = None
+        form = HRImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            extract = form.cleaned_data['extract']
+            summary = import_users(read_extract(extract, extract.name), dry_run=form.cleaned_data['dry_run'])
+        return TemplateResponse(request, 'admin/access_request/customuser/import.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Import HR extract",
+            'form': form,
+            'summary': summary,
+            'dry_run': form.cleaned_data.get('dry_run') if summary else False,
+        })
+
 
 admin.site.register(CustomUser, CustomUserAdmin)
 
 @admin.register(UserRole)
-class UserRoleAdmin(admin.ModelAdmin):
+class UserRoleAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("user", "role", "get_assignment")
+    list_select_related = ("user", "directorate", "hod")
+    autocomplete_fields = ("user", "hod")
     search_fields = ("user__tsc_no", "user__full_name")
+    search_tsc_field = "user__tsc_no"
+    search_user_field = "user"
     list_filter = ('role',)
     
     fieldsets = (
@@ -191,20 +307,28 @@ class UserRoleAdmin(admin.ModelAdmin):
     get_assignment.short_description = "Assignment"
 
 @admin.register(AccessRequest)
-class AccessRequestAdmin(admin.ModelAdmin):
+class AccessRequestAdmin(IndexedSearchMixin, admin.ModelAdmin):
     class Media: css = {'all': ('css/tsc_admin.css',)}
     list_display = ('requester_info', 'progress_visual', 'status_badge', 'submitted_at', 'turnaround_time')
+    list_select_related = ('requester',)
     list_filter = (OverdueFilter, 'status', 'directorate', 'submitted_at')
     search_fields = ('requester__full_name', 'requester__tsc_no', 'tsc_no')
+    autocomplete_fields = ('requester', 'hod_approver', 'ict_approver')
     inlines = [RequestedSystemInline]
     date_hierarchy = 'submitted_at'
     actions = [export_to_csv]
     list_per_page = 20
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # requester is used by __str__ (autocomplete results) and requester_info
+        return super().get_queryset(request).select_related('requester')
 
     def requester_info(self, obj): return format_html("<strong>{}</strong><br><span style='color:#666;'>{}</span>", obj.requester.full_name, obj.tsc_no)
     def turnaround_time(self, obj):
         delta = timezone.now() - obj.submitted_at
-        color = "red" if delta.days > 3 else "green"
+        color = "red" if obj.due_at and obj.due_at < timezone.now() else "green"
         return format_html('<span style="color: {}; font-weight:bold;">{} days</span>', color, delta.days)
     def progress_visual(self, obj):
         percent = 10
@@ -221,11 +345,17 @@ class AccessRequestAdmin(admin.ModelAdmin):
 
 # ✅ 1. AUDIT LOG ADMIN (System Rights)
 @admin.register(RequestedSystem)
-class AuditLogAdmin(admin.ModelAdmin):
+class AuditLogAdmin(IndexedSearchMixin, admin.ModelAdmin):
     class Media: css = {'all': ('css/tsc_admin.css',)}
-    list_display = ('request_ref', 'system_badge', 'sysadmin_status_colored', 'action_dates')
-    list_filter = ('sysadmin_status', 'system', 'directorate', 'access_request__submitted_at')
+    list_display = ('request_ref', 'system_badge', 'sysadmin_status_colored', 'action_dates', 'provisioning_status')
+    list_select_related = ('access_request__requester',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_filter = ('sysadmin_status', 'provisioning_status', 'system', 'directorate', 'access_request__submitted_at')
     search_fields = ('access_request__requester__full_name', 'access_request__tsc_no')
+    search_tsc_field = 'access_request__tsc_no'
+    search_user_field = 'access_request__requester'
+    autocomplete_fields = ('access_request', 'system_admin')
     date_hierarchy = 'access_request__submitted_at'
     actions = [export_to_csv, revoke_access] 
 
@@ -239,17 +369,283 @@ class AuditLogAdmin(admin.ModelAdmin):
 
 # ✅ 2. ACCESS LOG ADMIN (Login History)
 @admin.register(AccessLog)
-class AccessLogAdmin(admin.ModelAdmin):
+class AccessLogAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'action', 'timestamp', 'ip_address')
+    list_select_related = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_filter = ('action', 'timestamp')
     search_fields = ('user__full_name', 'user__tsc_no', 'ip_address')
-    date_hierarchy = 'timestamp'
+    search_tsc_field = 'user__tsc_no'
+    search_user_field = 'user'
+    # No date_hierarchy: its year/month drill-down runs DISTINCT date queries over the whole table.
+    # The 'timestamp' list filter gives the same ranges as plain index range scans.
     
+    def get_search_results(self, request, queryset, search_term):
+        if is_ip_term(search_term):
+            return queryset.filter(ip_address__startswith=search_term.strip()), False
+        return super().get_search_results(request, queryset, search_term)
+
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+
+@admin.register(AccessLogDailyRollup)
+class AccessLogDailyRollupAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('day', 'user', 'action', 'count', 'first_seen', 'last_seen')
+    list_select_related = ('user',)
+    list_filter = ('action', 'day')
+    search_fields = ('user__full_name', 'user__tsc_no')
+    search_tsc_field = 'user__tsc_no'
+    search_user_field = 'user'
+
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+
+@admin.register(EscalationNotice)
+class EscalationNoticeAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('requested_system', 'stage', 'level', 'recipients', 'reassigned_to', 'created_at')
+    list_select_related = ('requested_system__access_request', 'reassigned_to')
+    list_filter = ('level', 'stage')
+    search_fields = ('requested_system__access_request__tsc_no',)
+    search_tsc_field = 'requested_system__access_request__tsc_no'
+    search_user_field = 'requested_system__access_request__requester'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+
+def mark_closed(modeladmin, request, queryset):
+    queryset.update(is_business_day=False)
+    renumber_calendar()
+    moved = recompute_due_dates()
+    modeladmin.message_user(request, f"Marked as closed. {moved} open request deadline(s) moved.")
+mark_closed.short_description = "🚫 Mark as holiday / closed"
+
+def mark_business_day(modeladmin, request, queryset):
+    queryset.update(is_business_day=True, name='')
+    renumber_calendar()
+    moved = recompute_due_dates()
+    modeladmin.message_user(request, f"Marked as business days. {moved} open request deadline(s) moved.")
+mark_business_day.short_description = "✅ Mark as business day"
+
+@admin.register(CalendarDay)
+class CalendarDayAdmin(admin.ModelAdmin):
+    list_display = ('day', 'is_business_day', 'name', 'business_day_index')
+    list_filter = ('is_business_day',)
+    list_editable = ('name',)
+    date_hierarchy = 'day'
+    actions = [mark_closed, mark_business_day]
+    def has_add_permission(self, request): return False
+
+
+def rebalance_queues(modeladmin, request, queryset):
+    moved = sum(rebalance(system) for system in set(queryset.values_list('system', flat=True)))
+    modeladmin.message_user(request, f"Queues rebalanced. {moved} item(s) moved.")
+rebalance_queues.short_description = "⚖️ Rebalance the selected systems' queues"
+
+@admin.register(SystemAdminAssignment)
+class SystemAdminAssignmentAdmin(admin.ModelAdmin):
+    list_display = ('admin', 'system', 'is_active', 'open_items', 'last_assigned_at')
+    list_select_related = ('admin',)
+    list_filter = ('system', 'is_active')
+    list_editable = ('is_active',)
+    search_fields = ('admin__tsc_no', 'admin__full_name')
+    autocomplete_fields = ('admin',)
+    readonly_fields = ('open_items', 'last_assigned_at')
+    actions = [rebalance_queues]
+
+
+@admin.register(HodDelegation)
+class HodDelegationAdmin(admin.ModelAdmin):
+    list_display = ('directorate', 'hod', 'deputy', 'start_date', 'end_date', 'reason')
+    list_select_related = ('directorate', 'hod', 'deputy')
+    list_filter = ('directorate',)
+    search_fields = ('hod__tsc_no', 'deputy__tsc_no', 'deputy__full_name')
+    autocomplete_fields = ('hod', 'deputy')
+    date_hierarchy = 'start_date'
+
+
+@admin.register(DailyRequestFact)
+class DailyRequestFactAdmin(admin.ModelAdmin):
+    list_display = ('day', 'directorate', 'system', 'stage', 'outcome', 'count')
+    list_select_related = ('directorate',)
+    list_filter = ('stage', 'outcome', 'system', 'directorate')
+    date_hierarchy = 'day'
+
     def has_add_permission(self, request): return False
     def has_change_permission(self, request, obj=None): return False
 
 
-# ✅ 3. DASHBOARD (SYSTEM ANALYTICS)
+# ✅ 3. NOTIFICATION PREFERENCES (Immediate vs Daily Digest)
+@admin.register(NotificationPreference)
+class NotificationPreferenceAdmin(admin.ModelAdmin):
+    list_display = ('email', 'delivery', 'last_digest_at')
+    list_editable = ('delivery',)
+    list_filter = ('delivery',)
+    search_fields = ('email',)
+    readonly_fields = ('last_digest_at',)
+
+
+def resend_notifications(modeladmin, request, queryset):
+    sent = dispatch(list(queryset.exclude(status='sent').values_list('pk', flat=True)))
+    modeladmin.message_user(request, f"{sent} notification(s) sent.")
+resend_notifications.short_description = "📨 Retry sending selected"
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_fields = ('idempotency_key', 'subject')
+    readonly_fields = ('idempotency_key', 'subject', 'body', 'recipients', 'status', 'attempts', 'last_error', 'created_at', 'sent_at')
+    actions = [resend_notifications]
+
+    def has_add_permission(self, request): return False
+
+
+def restore_archived(modeladmin, request, queryset):
+    restored = 0
+    for archived in queryset:
+        if archived.requester_id is None:
+            modeladmin.message_user(request, f"{archived}: requester no longer exists, left in the archive.", level=messages.WARNING)
+            continue
+        restore_request(archived)
+        restored += 1
+    modeladmin.message_user(request, f"{restored} request(s) restored to the live tables.")
+restore_archived.short_description = "♻️ Restore to live requests"
+
+@admin.register(ArchivedAccessRequest)
+class ArchivedAccessRequestAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('requester_name', 'tsc_no', 'directorate', 'request_type', 'status', 'system_labels', 'submitted_at', 'archived_at')
+    list_select_related = ('directorate',)
+    list_filter = ('status', 'request_type')
+    search_fields = ('tsc_no', 'requester_name')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = [restore_archived]
+
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+
+def retry_provisioning(modeladmin, request, queryset):
+    updated = queryset.exclude(status__in=['succeeded', 'running', 'superseded']).update(status='pending', next_attempt_at=timezone.now())
+    modeladmin.message_user(request, f"{updated} job(s) queued for the next worker run.")
+retry_provisioning.short_description = "🔁 Retry selected jobs"
+
+@admin.register(ProvisioningJob)
+class ProvisioningJobAdmin(admin.ModelAdmin):
+    list_display = ('tsc_no', 'system', 'request_ref', 'action', 'status', 'attempts', 'next_attempt_at', 'finished_at')
+    list_filter = ('status', 'action', 'system')
+    search_fields = ('tsc_no',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ('requested_system', 'tsc_no', 'request_ref', 'system', 'action', 'status', 'attempts', 'next_attempt_at', 'started_at', 'finished_at', 'result', 'last_error', 'created_at')
+    actions = [retry_provisioning]
+
+    def has_add_permission(self, request): return False
+
+
+def revoke_dormant_access(modeladmin, request, queryset):
+    revocation_message(modeladmin, request, revoke_findings(queryset, request.user))
+revoke_dormant_access.short_description = "⛔ Revoke the unused access"
+
+def dismiss_findings(modeladmin, request, queryset):
+    dismissed = queryset.filter(status='open').update(status='dismissed', resolved_at=timezone.now(), resolved_by=request.user)
+    modeladmin.message_user(request, f"{dismissed} finding(s) dismissed.")
+dismiss_findings.short_description = "✔️ Dismiss (access is still needed)"
+
+@admin.register(DormantAccessFinding)
+class DormantAccessFindingAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('user', 'kind', 'system', 'role', 'last_seen', 'days_inactive', 'status')
+    list_select_related = ('user',)
+    list_filter = ('status', 'kind', 'system')
+    search_fields = ('user__full_name', 'user__tsc_no')
+    search_tsc_field = 'user__tsc_no'
+    search_user_field = 'user'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = [revoke_dormant_access, dismiss_findings]
+
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+
+@admin.register(RecertificationCampaign)
+class RecertificationCampaignAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'due_date', 'total_items', 'progress_summary', 'created_by', 'created_at')
+    list_filter = ('status',)
+    readonly_fields = ('status', 'total_items', 'created_by', 'created_at', 'closed_at')
+
+    def progress_summary(self, obj):
+        counts = recertification_progress(obj.items.all())
+        return f"{counts['pending']} pending / {counts['certified']} certified / {counts['revoked']} revoked"
+    progress_summary.short_description = "Progress"
+
+    def has_add_permission(self, request): return False  # started with start_recertification_campaign
+
+
+def certify_items(modeladmin, request, queryset):
+    decided = decide_recertification(queryset, 'certified', decided_by=request.user)
+    modeladmin.message_user(request, f"{decided} entitlement(s) certified.")
+certify_items.short_description = "✅ Certify selected"
+
+def revoke_items(modeladmin, request, queryset):
+    decided = decide_recertification(queryset, 'revoked', decided_by=request.user, comment="Revoked at access recertification (admin)")
+    modeladmin.message_user(request, f"{decided} entitlement(s) revoked and queued for de-provisioning.")
+revoke_items.short_description = "⛔ Revoke selected"
+
+@admin.register(RecertificationItem)
+class RecertificationItemAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('tsc_no', 'holder', 'system', 'directorate', 'campaign', 'reviewer', 'decision', 'decided_by', 'decided_at')
+    list_select_related = ('holder', 'directorate', 'campaign', 'reviewer', 'decided_by')
+    list_filter = ('decision', 'campaign', 'system', 'directorate')
+    search_fields = ('holder__full_name', 'tsc_no')
+    search_tsc_field = 'tsc_no'
+    search_user_field = 'holder'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = [certify_items, revoke_items]
+
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+
+@admin.register(BulkRevocation)
+class BulkRevocationAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'reason', 'source', 'requested_by', 'status', 'progress_bar', 'revoked', 'created_at', 'finished_at')
+    list_select_related = ('requested_by',)
+    list_filter = ('status', 'source')
+    readonly_fields = ('reason', 'source', 'requested_by', 'status', 'total', 'processed', 'revoked', 'summary', 'created_at', 'started_at', 'finished_at')
+
+    def progress_bar(self, obj):
+        return format_html('<progress value="{}" max="100"></progress> {}/{}', obj.percent_done, obj.processed, obj.total)
+    progress_bar.short_description = "Progress"
+
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+@admin.register(BulkRevocationItem)
+class BulkRevocationItemAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('revocation', 'tsc_no', 'holder', 'system', 'request_ref', 'status', 'processed_at')
+    list_select_related = ('revocation', 'holder')
+    list_filter = ('status', 'revocation__source', 'system')
+    search_fields = ('holder__full_name', 'tsc_no')
+    search_tsc_field = 'tsc_no'
+    search_user_field = 'holder'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+
+# ✅ 4. DASHBOARD (SYSTEM ANALYTICS)
 @admin.register(SystemAnalytics)
 class SystemAnalyticsAdmin(admin.ModelAdmin):
     change_list_template = 'admin/system_analytics.html'
@@ -259,10 +655,7 @@ class SystemAnalyticsAdmin(admin.ModelAdmin):
         # 1. GATHER DATA
         total = AccessRequest.objects.count()
         
-        threshold = timezone.now() - timedelta(days=3)
-        overdue = AccessRequest.objects.filter(
-            submitted_at__lt=threshold, status__in=['pending_hod', 'pending_ict']
-        ).count()
+        overdue = AccessRequest.objects.filter(due_at__lt=timezone.now()).count()
         
         # Active Staff (Unique users with approved rights)
         active_staff_count = RequestedSystem.objects.filter(sysadmin_status='approved')\
@@ -277,8 +670,55 @@ class SystemAnalyticsAdmin(admin.ModelAdmin):
         # Recent Logs for the "Tab" view
         recent_logs = AccessLog.objects.select_related('user').order_by('-timestamp')[:20]
 
+        # Stage latency percentiles (cached; "Recompute" drops the cached copy)
+        if 'refresh_latency' in request.GET:
+            stage_latency(refresh=True)
+            return HttpResponseRedirect(request.path)
+        latency = stage_latency()
+
+        # Trends come from the daily fact table (a few hundred rows), never from the request tables
+        trends = monthly_trends(24)
+        recent, previous = trends[-12:], trends[-24:-12]
+        year_over_year = [
+            {'metric': metric.title(), 'current': sum(t[metric] for t in recent), 'previous': sum(t[metric] for t in previous)}
+            for metric in ('submitted', 'granted', 'rejected', 'revoked')
+        ]
+
+        if 'export_trends' in request.GET:
+            log_access(request, "Export Excel (Trends)")
+            wb = Workbook()
+            ws = wb.active
+            ws.title = "Monthly"
+            ws.append(["Month", "Submitted", "Decisions", "Granted", "Rejected", "Revoked"])
+            for t in trends: ws.append([t['month'].strftime('%Y-%m'), t['submitted'], t['decisions'], t['granted'], t['rejected'], t['revoked']])
+            ws = wb.create_sheet("By Directorate")
+            ws.append(["Month", "Directorate", "Submitted", "Granted", "Rejected", "Revoked"])
+            for t in directorate_trends(24): ws.append([t['month'].strftime('%Y-%m'), t['directorate'], t['submitted'], t['granted'], t['rejected'], t['revoked']])
+            for sheet in wb.worksheets:
+                for cell in sheet[1]: cell.font = Font(bold=True)
+            response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            response["Content-Disposition"] = f'attachment; filename="TSC_Request_Trends_{localdate()}.xlsx"'
+            wb.save(response)
+            return response
+
+        if 'export_latency' in request.GET:
+            log_access(request, "Export Excel (Stage Latency)")
+            wb = Workbook()
+            wb.remove(wb.active)
+            for sheet in ('overall',) + DIMENSIONS:
+                ws = wb.create_sheet(sheet.title())
+                ws.append([sheet.title(), "Stage", "Decisions", "P50 (hrs)", "P90 (hrs)", "P99 (hrs)"])
+                for cell in ws[1]: cell.font = Font(bold=True)
+                for row in latency[sheet]:
+                    ws.append([row['group'], row['stage'], row['count'], row['p50'], row['p90'], row['p99']])
+            response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            response["Content-Disposition"] = f'attachment; filename="TSC_Stage_Latency_{localdate()}.xlsx"'
+            wb.save(response)
+            return response
+
         # 2. EXPORT EXCEL
         if 'export_excel' in request.GET:
+            log_access(request, "Export Excel (Analytics)")
             wb = Workbook()
             ws = wb.active
             ws.title = "Executive Dashboard"
@@ -298,6 +738,7 @@ class SystemAnalyticsAdmin(admin.ModelAdmin):
 
         # 3. EXPORT PDF
         if 'export_pdf' in request.GET:
+            log_access(request, "Export PDF (Analytics)")
             buffer = io.BytesIO()
             doc = SimpleDocTemplate(buffer, pagesize=A4)
             elements = []
@@ -322,6 +763,13 @@ class SystemAnalyticsAdmin(admin.ModelAdmin):
         extra_context['active_staff_count'] = active_staff_count
         extra_context['granted_rights'] = granted_rights
         extra_context['recent_logs'] = recent_logs
+        extra_context['latency'] = latency
+        extra_context['year_over_year'] = year_over_year
+        extra_context['trend_labels'] = [t['month'].strftime('%b %Y') for t in trends]
+        extra_context['trend_series'] = {metric: [t[metric] for t in trends] for metric in ('submitted', 'granted', 'rejected', 'revoked')}
+        extra_context['latency_tables'] = [
+            (dimension.title(), sorted(latency[dimension], key=lambda row: -row['p90'])) for dimension in DIMENSIONS
+        ]
         
         extra_context['chart_labels'] = [x['name'] for x in granted_rights]
         extra_context['chart_data'] = [x['count'] for x in granted_rights]
@@ -335,6 +783,9 @@ class SystemAnalyticsAdmin(admin.ModelAdmin):
 @admin.register(LogEntry)
 class LogEntryAdmin(admin.ModelAdmin):
     list_display = ('action_time', 'user', 'content_type', 'action_flag', 'change_message')
+    list_select_related = ('user', 'content_type')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_filter = ('action_time', 'user', 'action_flag')
     search_fields = ('object_repr', 'change_message')
     date_hierarchy = 'action_time'
@@ -0,0 +1,129 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .models import AccessRequest, ArchivedAccessRequest, CustomUser, ProvisioningJob, RequestedSystem
+from .search import filter_by_search
+
+# Closed requests older than this are moved to ArchivedAccessRequest by archive_closed_requests
+REQUEST_ARCHIVE_AFTER_DAYS = getattr(settings, 'REQUEST_ARCHIVE_AFTER_DAYS', 365)
+# Archive matches shown on a dashboard; the archive is only searched when the user asks for it
+ARCHIVE_SEARCH_LIMIT = 100
+
+
+def open_systems():
+    """Systems still moving through the workflow or holding live access (approved by the system admin).
+
+    A request with any of these stays in the hot tables: it can still be decided on or revoked.
+    """
+    return RequestedSystem.objects.exclude(
+        Q(hod_status='rejected') | Q(ict_status='rejected') | Q(sysadmin_status__in=['rejected', 'revoked'])
+    )
+
+
+def failed_removals():
+    """Revoke/deactivate jobs that failed for good and were not followed by a successful one:
+    the account may still be live in the target system.
+    """
+    return ProvisioningJob.objects.filter(action__in=['revoke', 'deactivate'], status='failed').exclude(
+        Exists(ProvisioningJob.objects.filter(
+            requested_system=OuterRef('requested_system'), action__in=['revoke', 'deactivate'], status='succeeded', pk__gt=OuterRef('pk'),
+        ))
+    )
+
+
+def archivable_requests(before):
+    """Requests submitted before `before` whose systems are all rejected or revoked, and whose
+    de-provisioning has finished and did not end in failure (that must be resolved first).
+    """
+    return AccessRequest.objects.filter(submitted_at__lt=before).exclude(
+        Exists(open_systems().filter(access_request=OuterRef('pk')))
+    ).exclude(
+        Exists(ProvisioningJob.objects.filter(requested_system__access_request=OuterRef('pk'), status__in=['pending', 'running']))
+    ).exclude(
+        Exists(failed_removals().filter(requested_system__access_request=OuterRef('pk')))
+    )
+
+
+@transaction.atomic
+def _archive_batch(pks, before):
+    # Re-check under lock: an override may have reopened a request since it was selected
+    requests = list(archivable_requests(before).select_for_update().filter(pk__in=pks).values())
+    if not requests:
+        return 0
+    ids = [row['id'] for row in requests]
+
+    systems = {}
+    for row in RequestedSystem.objects.filter(access_request_id__in=ids).order_by('pk').values():
+        systems.setdefault(row['access_request_id'], []).append(row)
+    names = dict(
+        CustomUser.objects.filter(pk__in={row['requester_id'] for row in requests}).values_list('pk', 'full_name')
+    )
+
+    ArchivedAccessRequest.objects.bulk_create([
+        ArchivedAccessRequest(
+            original_id=row['id'],
+            requester_id=row['requester_id'],
+            requester_name=names.get(row['requester_id'], ''),
+            tsc_no=row['tsc_no'],
+            directorate_id=row['directorate_id'],
+            hod_approver_id=row['hod_approver_id'],
+            ict_approver_id=row['ict_approver_id'],
+            request_type=row['request_type'],
+            status=row['status'],
+            systems=",".join(s['system'] for s in systems.get(row['id'], [])),
+            submitted_at=row['submitted_at'],
+            payload={'request': row, 'systems': systems.get(row['id'], [])},
+        )
+        for row in requests
+    ], ignore_conflicts=True)
+
+    RequestedSystem.objects.filter(access_request_id__in=ids).delete()
+    AccessRequest.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_requests(before, batch_size=500):
+    """Move every closed request submitted before `before` to the archive, one transaction per batch.
+    Returns the number of requests archived.
+    """
+    candidates = archivable_requests(before).order_by('pk').values_list('pk', flat=True)
+    moved, last_pk = 0, 0
+    while True:
+        pks = list(candidates.filter(pk__gt=last_pk)[:batch_size])
+        if not pks:
+            break
+        last_pk = pks[-1]
+        moved += _archive_batch(pks, before)
+    return moved
+
+
+@transaction.atomic
+def restore_request(archived):
+    """Put an archived request (and its systems) back into the live tables with their original ids."""
+    request_row = dict(archived.payload['request'])
+    submitted_at = request_row.pop('submitted_at')
+    AccessRequest.objects.create(**request_row)
+    # submitted_at is auto_now_add, so it is reset on insert; restore the original value
+    AccessRequest.objects.filter(pk=request_row['id']).update(submitted_at=submitted_at)
+    RequestedSystem.objects.bulk_create([RequestedSystem(**row) for row in archived.payload['systems']])
+    archived.delete()
+
+
+def search_archive(term='', start_date='', end_date='', **scope):
+    """Archived requests matching a dashboard search (same TSC/name rules as the live lists).
+
+    scope narrows to what the dashboard may show, e.g. hod_approver=user. Dates are the
+    dashboard's YYYY-MM-DD strings; invalid dates are ignored like on the live lists.
+    """
+    archived = filter_by_search(ArchivedAccessRequest.objects.filter(**scope), term)
+    if start_date and end_date:
+        try:
+            s_date = datetime.strptime(start_date, "%Y-%m-%d")
+            e_date = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
+            archived = archived.filter(submitted_at__range=(s_date, e_date))
+        except ValueError:
+            pass
+    return archived.select_related('directorate').order_by('-submitted_at')[:ARCHIVE_SEARCH_LIMIT]
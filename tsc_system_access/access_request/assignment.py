@@ -0,0 +1,133 @@
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RequestedSystem, SystemAdminAssignment, UserRole
+
+# 'least_loaded' picks the admin with the fewest open items (ties go to whoever waited longest);
+# 'round_robin' ignores the load and takes turns
+SYSADMIN_ASSIGNMENT = getattr(settings, 'SYSADMIN_ASSIGNMENT', 'least_loaded')
+
+
+def serving_slots():
+    """Active assignments of active users who still hold the System Admin role."""
+    return SystemAdminAssignment.objects.filter(
+        is_active=True, admin__is_active=True, admin__in=UserRole.objects.filter(role='sys_admin').values('user'),
+    )
+
+
+def admin_systems(user, user_role=None):
+    """Systems the user administers. The legacy single UserRole.system_assigned still counts."""
+    systems = set(SystemAdminAssignment.objects.filter(admin=user, is_active=True).values_list('system', flat=True))
+    if user_role and user_role.system_assigned:
+        systems.add(user_role.system_assigned)
+    return sorted(systems)
+
+
+def _pick(slots, now):
+    """Next slot to assign to; updates its counter in memory."""
+    if SYSADMIN_ASSIGNMENT == 'round_robin':
+        key = lambda s: (s.last_assigned_at is not None, s.last_assigned_at or now, s.pk)
+    else:
+        key = lambda s: (s.open_items, s.last_assigned_at is not None, s.last_assigned_at or now, s.pk)
+    slot = min(slots, key=key)
+    slot.open_items += 1
+    slot.last_assigned_at = now
+    return slot
+
+
+def _locked_slots(system):
+    # Locking every slot of the system serialises assigners for that system only
+    return list(serving_slots().select_for_update().filter(system=system).order_by('pk'))
+
+
+@transaction.atomic
+def assign(items):
+    """Put unassigned items into admin queues, one locked read of the slots per system. Returns the number assigned."""
+    by_system = defaultdict(list)
+    for item in items:
+        by_system[item.system].append(item)
+    now, assigned = timezone.now(), 0
+    for system, system_items in by_system.items():
+        slots = _locked_slots(system)
+        if not slots:
+            continue
+        by_admin = defaultdict(list)
+        for item in system_items:
+            slot = _pick(slots, now)
+            item.sysadmin_assignee_id = slot.admin_id
+            by_admin[slot.admin_id].append(item.pk)
+        for admin_id, pks in by_admin.items():
+            RequestedSystem.objects.filter(pk__in=pks).update(sysadmin_assignee=admin_id)
+        SystemAdminAssignment.objects.bulk_update(slots, ['open_items', 'last_assigned_at'])
+        assigned += len(system_items)
+    return assigned
+
+
+@transaction.atomic
+def release(items):
+    """Take items that left the System Admin stage out of their admin's queue."""
+    counts = defaultdict(list)
+    for item in items:
+        counts[(item.sysadmin_assignee_id, item.system)].append(item.pk)
+        item.sysadmin_assignee_id = None
+    for (admin_id, system), pks in counts.items():
+        RequestedSystem.objects.filter(pk__in=pks).update(sysadmin_assignee=None)
+        SystemAdminAssignment.objects.filter(admin=admin_id, system=system, open_items__gte=len(pks)).update(
+            open_items=F('open_items') - len(pks)
+        )
+
+
+def sync_assignments(request_obj):
+    """Assign or release the request's systems after a stage transition (called from sync_request_status)."""
+    systems = list(RequestedSystem.objects.filter(access_request=request_obj).only('pk', 'system', 'open_stage', 'sysadmin_assignee'))
+    release([s for s in systems if s.sysadmin_assignee_id and s.open_stage != 'sys_admin'])
+    assign([s for s in systems if not s.sysadmin_assignee_id and s.open_stage == 'sys_admin'])
+
+
+@transaction.atomic
+def rebalance(system):
+    """Even out one system's queue across its active admins, e.g. after one was added or removed.
+
+    Items held by admins who no longer serve the system are reassigned, and admins holding more
+    than their share hand their newest items to the least loaded. Counters are reset from the
+    actual queue, which also repairs any drift. Returns the number of items moved.
+    """
+    slots = _locked_slots(system)
+    queue = list(
+        RequestedSystem.objects.filter(system=system, open_stage='sys_admin').order_by('due_at', 'pk')
+        .values_list('pk', 'sysadmin_assignee')
+    )
+    held = {slot.admin_id: [] for slot in slots}
+    pool = []
+    for pk, admin_id in queue:
+        (held[admin_id] if admin_id in held else pool).append(pk)
+    if slots:
+        share = math.ceil(len(queue) / len(slots))
+        for pks in held.values():
+            while len(pks) > share:
+                pool.append(pks.pop())
+
+    for slot in slots:
+        slot.open_items = len(held[slot.admin_id])
+    now, moves = timezone.now(), defaultdict(list)
+    for pk in pool:
+        admin_id = _pick(slots, now).admin_id if slots else None
+        moves[admin_id].append(pk)
+    for admin_id, pks in moves.items():
+        RequestedSystem.objects.filter(pk__in=pks).update(sysadmin_assignee=admin_id)
+    SystemAdminAssignment.objects.bulk_update(slots, ['open_items', 'last_assigned_at'])
+    SystemAdminAssignment.objects.filter(system=system).exclude(pk__in=[s.pk for s in slots]).update(open_items=0)
+    return len(pool) if slots else 0
+
+
+def rebalance_all():
+    """rebalance() every system that has admins or queued items. Returns {system: items moved}."""
+    systems = set(SystemAdminAssignment.objects.values_list('system', flat=True).distinct())
+    systems |= set(RequestedSystem.objects.filter(open_stage='sys_admin').values_list('system', flat=True).distinct())
+    return {system: rebalance(system) for system in sorted(systems)}
+
@@ -0,0 +1,163 @@
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .dedupe import duplicate_of, live_index
+from .delegation import covered_directorates, delegated_to
+from .models import AccessRequest, CustomUser, RequestedSystem, UserRole
+from .notifications import SYSTEM_LABELS, load_requests, queue_many, queue_notification, request_context, wants_digest
+from .sla import refresh_many
+
+# Rows accepted per submission (upload or API call)
+BULK_REQUEST_MAX_ROWS = getattr(settings, 'BULK_REQUEST_MAX_ROWS', 1000)
+
+# Upload header (lowercased, spaces -> underscores) -> field; see user_import.read_extract
+BULK_COLUMN_ALIASES = {
+    'tsc_no': 'tsc_no', 'tsc_number': 'tsc_no', 'tsc': 'tsc_no',
+    'systems': 'systems', 'system': 'systems',
+    'request_type': 'request_type', 'type': 'request_type',
+    'designation': 'designation',
+    'level_of_access': 'level_of_access', 'access_level': 'level_of_access', 'access_levels': 'level_of_access',
+}
+ACCESS_LEVELS = ('Admin', 'User', 'ICT')
+REQUEST_TYPES = {code: code for code, _ in AccessRequest.REQUEST_TYPE_CHOICES}
+REQUEST_TYPES.update({label.lower(): code for code, label in AccessRequest.REQUEST_TYPE_CHOICES})
+SYSTEM_CODES = {code: code for code in SYSTEM_LABELS}
+SYSTEM_CODES.update({label.lower(): code for code, label in SYSTEM_LABELS.items()})
+
+
+def submission_scope(user):
+    """Directorate ids the user may bulk-submit for: their own as HOD, plus any they are covering today.
+    The scope is used to write (pre-approved requests, recertification decisions), so a deputy's
+    directorates are confirmed in the database rather than taken from the cached index.
+    """
+    scope = set(UserRole.objects.filter(user=user, role='hod').exclude(directorate=None).values_list('directorate', flat=True))
+    if delegated_to(user)['directorates']:
+        scope.update(covered_directorates(user))
+    return scope
+
+
+def _systems(value):
+    """System codes from a list, or a string separated by ';' or ','; names or codes. Unknown entries are returned as None."""
+    parts = value if isinstance(value, (list, tuple)) else str(value or '').replace(';', ',').split(',')
+    return [SYSTEM_CODES.get(str(part).strip().lower()) for part in parts if str(part).strip()]
+
+
+def validate_rows(user, rows):
+    """Check every row in one pass: two queries whatever the number of rows.
+
+    rows are dicts with tsc_no, systems, request_type, designation and level_of_access. Returns
+    (items, skipped, errors). items holds one dict per (staff member, request type) with the systems
+    to request; skipped lists (as dicts) systems the staff member already has pending or holds; errors lists
+    (row number, message) for rows that cannot be submitted.
+    """
+    rows = list(rows)
+    errors, skipped = [], []
+    if len(rows) > BULK_REQUEST_MAX_ROWS:
+        return [], [], [(0, f"At most {BULK_REQUEST_MAX_ROWS} rows can be submitted at once.")]
+    scope = submission_scope(user)
+    # Staff rows are locked (inside submit_rows' transaction) so a concurrent submission cannot pass the duplicate check too
+    staff = CustomUser.objects.select_for_update().filter(
+        tsc_no__in={str(r.get('tsc_no', '')).strip() for r in rows}
+    ).in_bulk(field_name='tsc_no')
+    index = live_index([u.pk for u in staff.values()])
+
+    items = {}
+    for number, row in enumerate(rows, start=1):
+        tsc_no = str(row.get('tsc_no', '')).strip()
+        member = staff.get(tsc_no)
+        request_type = REQUEST_TYPES.get(str(row.get('request_type') or 'new').strip().lower())
+        level = str(row.get('level_of_access') or 'User').strip()
+        systems = _systems(row.get('systems'))
+        designation = str(row.get('designation') or '').strip()
+        if not member or not member.is_active:
+            errors.append((number, f"No active staff member with TSC number '{tsc_no}'."))
+        elif member.pk == user.pk:
+            errors.append((number, "You cannot approve your own access; submit it through the normal request form."))
+        elif member.directorate_id not in scope:
+            errors.append((number, f"{member.full_name} is not in a directorate you approve for."))
+        elif not systems or None in systems:
+            errors.append((number, "Give one or more valid systems."))
+        elif not request_type:
+            errors.append((number, f"Unknown request type '{row.get('request_type')}'."))
+        elif level not in ACCESS_LEVELS:
+            errors.append((number, f"Level of access must be one of {', '.join(ACCESS_LEVELS)}."))
+        elif not designation:
+            errors.append((number, "Designation is required."))
+        else:
+            item = items.setdefault((member.pk, request_type), {
+                'requester': member, 'request_type': request_type, 'designation': designation[:100],
+                'level_of_access': level, 'systems': [],
+            })
+            for system in systems:
+                duplicate = duplicate_of(index, member.pk, system, request_type)
+                if duplicate:
+                    skipped.append({
+                        'row': number, 'member': member, 'system': system, 'system_name': SYSTEM_LABELS[system],
+                        'request_id': duplicate[0], 'reason': duplicate[1],
+                    })
+                elif system not in item['systems']:
+                    item['systems'].append(system)
+    items = [item for item in items.values() if item['systems']]
+    for item in items:
+        item['system_names'] = [SYSTEM_LABELS[system] for system in item['systems']]
+    return items, skipped, errors
+
+
+@transaction.atomic
+def submit_rows(user, rows, validate_only=False):
+    """Validate the rows and, when none has an error, create them. All or nothing.
+    Returns {'batch', 'request_ids', 'items', 'skipped', 'errors'}.
+    """
+    items, skipped, errors = validate_rows(user, rows)
+    result = {'batch': None, 'request_ids': [], 'items': items, 'skipped': skipped, 'errors': errors}
+    if items and not errors and not validate_only:
+        result['batch'], result['request_ids'] = create_requests(user, items)
+    return result
+
+
+def create_requests(user, items):
+    """Create the requests with bulk inserts in one transaction, the HOD stage already approved by `user`.
+    Returns (batch id, request ids). Notifications go out once per recipient after commit.
+    """
+    batch, now = uuid.uuid4().hex, timezone.now()
+    with transaction.atomic():
+        AccessRequest.objects.bulk_create([
+            AccessRequest(
+                requester=item['requester'], tsc_no=item['requester'].tsc_no, email=item['requester'].email,
+                directorate_id=item['requester'].directorate_id, designation=item['designation'],
+                request_type=item['request_type'], status='pending_ict', hod_approver=user, submission_batch=batch,
+            )
+            for item in items
+        ], batch_size=500)
+        # MySQL does not return the new ids from bulk_create; read them back by batch
+        ids = {
+            (requester, request_type): pk for pk, requester, request_type in
+            AccessRequest.objects.filter(submission_batch=batch).values_list('pk', 'requester', 'request_type')
+        }
+        RequestedSystem.objects.bulk_create([
+            RequestedSystem(
+                access_request_id=ids[(item['requester'].pk, item['request_type'])], system=system,
+                level_of_access=item['level_of_access'], directorate_id=item['requester'].directorate_id,
+                hod_status='approved', hod_decision_date=now, hod_comment='',
+            )
+            for item in items for system in item['systems']
+        ], batch_size=1000)
+        refresh_many(list(ids.values()))
+        notify_batch(batch, list(ids.values()), user)
+    return batch, list(ids.values())
+
+
+def notify_batch(batch, request_ids, user):
+    """One email per requester, and one email to ICT listing the whole batch."""
+    contexts = [request_context(r) for r in load_requests(request_ids).order_by('requester__full_name')]
+    queue_many('request_submitted_requester', (
+        (f"request-submitted:{context['request_id']}:requester", context, [context['requester_email']])
+        for context in contexts
+    ))
+    if contexts and not wants_digest(settings.ICT_TEAM_EMAIL):
+        queue_notification(f"bulk-submitted:{batch}:ict", 'bulk_submitted_ict', {
+            'hod_name': user.full_name, 'requests': contexts, 'total_systems': sum(len(c['systems']) for c in contexts),
+        }, [settings.ICT_TEAM_EMAIL])
@@ -0,0 +1,115 @@
+import json
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+
+from .provisioning import Connector, ProvisioningError
+
+# System code -> {'url': base URL of the system's provisioning API (or the identity gateway in
+# front of it), 'token': bearer token}. A system without an entry fails its jobs as not configured.
+PROVISIONING_ENDPOINTS = getattr(settings, 'PROVISIONING_ENDPOINTS', {})
+PROVISIONING_TIMEOUT_SECONDS = getattr(settings, 'PROVISIONING_TIMEOUT_SECONDS', 30)
+
+
+class RestConnector(Connector):
+    """Provisions through a JSON API: POST {url}/accounts/{account}/{action} with the access level.
+
+    2xx is success (the response text is kept as the job result). 4xx responses are permanent
+    failures (unknown account, rejected request); 5xx responses and network errors are retried.
+    """
+    # Attribute of the AccessRequest that identifies the account in the target system
+    account_field = 'tsc_no'
+
+    def grant(self, requested_system):
+        return self.call('grant', requested_system)
+
+    def revoke(self, requested_system):
+        return self.call('revoke', requested_system)
+
+    def deactivate(self, requested_system):
+        return self.call('deactivate', requested_system)
+
+    def call(self, action, requested_system):
+        endpoint = PROVISIONING_ENDPOINTS.get(self.system) or {}
+        if not endpoint.get('url'):
+            raise ProvisioningError(f"No connector configured for {requested_system.get_system_display()}", retryable=False)
+        account = getattr(requested_system.access_request, self.account_field)
+        request = Request(
+            f"{endpoint['url'].rstrip('/')}/accounts/{account}/{action}",
+            data=json.dumps({'level': requested_system.level_of_access or '', 'reference': requested_system.pk}).encode(),
+            headers={'Content-Type': 'application/json', 'Authorization': f"Bearer {endpoint.get('token', '')}"},
+            method='POST',
+        )
+        try:
+            with urlopen(request, timeout=PROVISIONING_TIMEOUT_SECONDS) as response:
+                return response.read(1000).decode(errors='replace') or f"{action} {account}"
+        except HTTPError as exc:
+            raise ProvisioningError(f"{exc.code} from {requested_system.get_system_display()}: {exc.reason}", retryable=exc.code >= 500)
+        except (URLError, TimeoutError) as exc:
+            raise ProvisioningError(f"{requested_system.get_system_display()} unreachable: {exc}")
+
+
+# One connector per RequestedSystem.SYSTEM_CHOICES entry
+
+class ActiveDirectoryConnector(RestConnector):
+    """Directory accounts; every other system signs in against these, so allow more at once."""
+    max_concurrency = 4
+
+
+class CRMConnector(RestConnector):
+    pass
+
+
+class EDMSConnector(RestConnector):
+    pass
+
+
+class EmailConnector(RestConnector):
+    """Mailboxes are keyed by address rather than TSC number."""
+    account_field = 'email'
+
+
+class HelpDeskConnector(RestConnector):
+    pass
+
+
+class HRMISConnector(RestConnector):
+    pass
+
+
+class IDEAConnector(RestConnector):
+    pass
+
+
+class IFMISConnector(RestConnector):
+    pass
+
+
+class KnowledgeBaseConnector(RestConnector):
+    pass
+
+
+class ServicesConnector(RestConnector):
+    pass
+
+
+class TeachersOnlineConnector(RestConnector):
+    pass
+
+
+class TeamMateConnector(RestConnector):
+    pass
+
+
+class TPADConnector(RestConnector):
+    pass
+
+
+class TPAYConnector(RestConnector):
+    pass
+
+
+class PydioConnector(RestConnector):
+    """File-sharing accounts are keyed by email address."""
+    account_field = 'email'
@@ -0,0 +1,149 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AccessRequest, RequestedSystem
+
+OPEN_STAGES = ('hod', 'ict', 'sys_admin')
+# When two open duplicates exist, the one furthest along is kept
+STAGE_RANK = {'sys_admin': 0, 'ict': 1, 'hod': 2}
+# Stage -> (status columns set to 'rejected', comment column, decision date column) when closing a duplicate
+CLOSE_FIELDS = {
+    'hod': (('hod_status', 'ict_status', 'sysadmin_status'), 'hod_comment', 'hod_decision_date'),
+    'ict': (('ict_status', 'sysadmin_status'), 'ict_comment', 'ict_decision_date'),
+    'sys_admin': (('sysadmin_status',), 'sysadmin_comment', 'sysadmin_decision_date'),
+}
+DEDUPE_BATCH_SIZE = 500
+
+
+def _live_systems(requester_ids, systems=None):
+    """Open or granted RequestedSystem rows of the requesters, in one query on the
+    (access_request, system, open_stage) index. Rows are plain tuples, oldest first.
+    """
+    rows = RequestedSystem.objects.filter(
+        Q(open_stage__in=OPEN_STAGES) | Q(sysadmin_status='approved'),
+        access_request__requester__in=requester_ids,
+    )
+    if systems is not None:
+        rows = rows.filter(system__in=systems)
+    return rows.order_by('access_request__submitted_at', 'pk').values_list(
+        'pk', 'access_request__requester', 'system', 'access_request__request_type', 'open_stage',
+        'sysadmin_status', 'sysadmin_decision_date', 'access_request_id',
+    )
+
+
+def _granted(rows):
+    """{(requester, system): request id} where the latest approved row gave access (not a deactivation)."""
+    latest = {}
+    for _, requester, system, request_type, _, status, decided_at, request_id in rows:
+        if status == 'approved':
+            key = (requester, system)
+            if key not in latest or (decided_at and (latest[key][0] is None or decided_at > latest[key][0])):
+                latest[key] = (decided_at, request_type, request_id)
+    return {key: request_id for key, (_, request_type, request_id) in latest.items() if request_type != 'deactivate'}
+
+
+def live_index(requester_ids, systems=None):
+    """(open, granted) for many requesters from one query: open maps (requester, system, request type)
+    to the request holding that open item, granted maps (requester, system) to the request that gave access.
+    """
+    rows = list(_live_systems(requester_ids, systems))
+    open_items = {}
+    for _, requester, system, request_type, stage, _, _, request_id in rows:
+        if stage:
+            open_items.setdefault((requester, system, request_type), request_id)
+    return open_items, _granted(rows)
+
+
+def duplicate_of(index, requester_id, system, request_type):
+    """(existing request id, reason) when the item would duplicate one in `index` (see live_index), else None."""
+    open_items, granted = index
+    if (requester_id, system, request_type) in open_items:
+        return open_items[(requester_id, system, request_type)], "already pending"
+    if request_type == 'new' and (requester_id, system) in granted:
+        return granted[(requester_id, system)], "already granted"
+    return None
+
+
+def find_duplicates(requester, systems, request_type):
+    """{system: (existing request id, reason)} for the systems of a new submission that the requester
+    already has open with the same request type, or (for a 'new' request) already holds. One query.
+    """
+    index = live_index([requester.pk], systems)
+    duplicates = {}
+    for system in systems:
+        duplicate = duplicate_of(index, requester.pk, system, request_type)
+        if duplicate:
+            duplicates[system] = duplicate
+    return duplicates
+
+
+def historical_duplicates(requester_ids):
+    """{RequestedSystem id to close: id of the request it duplicates} among the requesters' open items:
+    a second open item for the same system and request type, or an open 'new' item for access already held.
+    """
+    rows = list(_live_systems(requester_ids))
+    granted = _granted(rows)
+    open_rows = defaultdict(list)
+    for row in rows:
+        _, requester, system, request_type, stage, _, _, _ = row
+        if stage:
+            open_rows[(requester, system, request_type)].append(row)
+
+    close = {}
+    for (requester, system, request_type), group in open_rows.items():
+        if request_type == 'new' and (requester, system) in granted:
+            close.update({row[0]: granted[(requester, system)] for row in group})
+            continue
+        # Furthest stage first, then oldest (rows are already oldest first)
+        group.sort(key=lambda row: STAGE_RANK[row[4]])
+        close.update({row[0]: group[0][7] for row in group[1:]})
+    return close
+
+
+def close_duplicates(duplicates, now=None):
+    """Reject the given RequestedSystem rows at their open stage, noting the request they duplicate.
+    Returns the ids of the AccessRequests touched (their status needs syncing).
+    """
+    now = now or timezone.now()
+    items = RequestedSystem.objects.filter(pk__in=list(duplicates))
+    by_stage = defaultdict(list)
+    for item in items:
+        if item.open_stage not in CLOSE_FIELDS:
+            continue
+        statuses, comment_field, date_field = CLOSE_FIELDS[item.open_stage]
+        for field in statuses:
+            setattr(item, field, 'rejected')
+        setattr(item, comment_field, f"Duplicate of request #{duplicates[item.pk]}")
+        setattr(item, date_field, now)
+        by_stage[item.open_stage].append(item)
+    touched = set()
+    for stage, stage_items in by_stage.items():
+        statuses, comment_field, date_field = CLOSE_FIELDS[stage]
+        RequestedSystem.objects.bulk_update(stage_items, [*statuses, comment_field, date_field], batch_size=500)
+        touched.update(item.access_request_id for item in stage_items)
+    return touched
+
+
+def dedupe_requests(dry_run=False, batch_size=DEDUPE_BATCH_SIZE):
+    """Close historical duplicates, a batch of requesters at a time. Returns (items closed, requests touched)."""
+    from .views import sync_request_status
+
+    requesters = list(
+        AccessRequest.objects.filter(requested_systems__open_stage__in=OPEN_STAGES)
+        .values_list('requester', flat=True).distinct().order_by('requester')
+    )
+    closed, touched = 0, 0
+    for start in range(0, len(requesters), batch_size):
+        duplicates = historical_duplicates(requesters[start:start + batch_size])
+        closed += len(duplicates)
+        if dry_run or not duplicates:
+            continue
+        with transaction.atomic():
+            request_ids = close_duplicates(duplicates)
+            for request_obj in AccessRequest.objects.filter(pk__in=request_ids):
+                sync_request_status(request_obj)
+        touched += len(request_ids)
+    return closed, touched
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import HodDelegation, UserRole
+
+# The index is rebuilt when the day changes and dropped whenever a delegation is saved or deleted
+# (signals.py). The timeout only bounds staleness for other processes when the cache is per-process.
+DELEGATION_CACHE_SECONDS = getattr(settings, 'DELEGATION_CACHE_SECONDS', 300)
+DELEGATION_CACHE_KEY = 'hod_delegations'
+
+
+def active_delegations(today):
+    """Delegations covering today whose deputy is active and whose HOD still heads that directorate:
+    a demoted or departed HOD's delegation stops granting anything at once.
+    """
+    return HodDelegation.objects.filter(
+        start_date__lte=today, end_date__gte=today, deputy__is_active=True,
+        hod__is_active=True, hod__userrole__role='hod', hod__userrole__directorate=F('directorate'),
+    )
+
+
+def build_index(today):
+    """Today's delegations as plain dicts, from one query:
+    {'day', 'by_deputy': {deputy id: {'directorates': {id: name}, 'hods': [ids]}}, 'emails': {directorate id: [emails]}}.
+    """
+    index = {'day': today, 'by_deputy': {}, 'emails': {}}
+    rows = active_delegations(today).values_list('deputy_id', 'deputy__email', 'hod_id', 'directorate_id', 'directorate__name')
+    for deputy_id, email, hod_id, directorate_id, directorate_name in rows:
+        entry = index['by_deputy'].setdefault(deputy_id, {'directorates': {}, 'hods': []})
+        entry['directorates'][directorate_id] = directorate_name
+        if hod_id not in entry['hods']:
+            entry['hods'].append(hod_id)
+        emails = index['emails'].setdefault(directorate_id, [])
+        if email and email not in emails:
+            emails.append(email)
+    return index
+
+
+def delegation_index():
+    """The cached index for today; rebuilt on a miss or once the cached copy is from an earlier day."""
+    today = timezone.localdate()
+    index = cache.get(DELEGATION_CACHE_KEY)
+    if index is None or index['day'] != today:
+        index = build_index(today)
+        cache.set(DELEGATION_CACHE_KEY, index, DELEGATION_CACHE_SECONDS)
+    return index
+
+
+def invalidate_delegations():
+    cache.delete(DELEGATION_CACHE_KEY)
+
+
+def delegated_to(user):
+    """{'directorates': {id: name}, 'hods': [ids]} the user is covering today (empty when none)."""
+    return delegation_index()['by_deputy'].get(user.pk, {'directorates': {}, 'hods': []})
+
+
+def is_covering(deputy, directorate_id, requester_id=None):
+    """Whether `deputy` covers the directorate (or the HOD managing requester_id) today, read from the
+    database in one query on the date index. Decisions use this rather than the cached index, which
+    another process may still hold after the delegation is cancelled.
+    """
+    today = timezone.localdate()
+    scope = Q(directorate_id=directorate_id)
+    if requester_id:
+        scope |= Q(hod__in=UserRole.objects.filter(user=requester_id).values('hod'))
+    return active_delegations(today).filter(scope, deputy=deputy).exists()
+
+
+def covered_directorates(deputy):
+    """Ids of the directorates `deputy` covers today, read from the database (one query on the date index)."""
+    return set(active_delegations(timezone.localdate()).filter(deputy=deputy).values_list('directorate_id', flat=True))
+
+
+def deputy_emails(directorate_id):
+    """Mailboxes of the deputies covering a directorate today, to copy on HOD notifications."""
+    return list(delegation_index()['emails'].get(directorate_id, []))
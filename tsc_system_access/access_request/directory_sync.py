@@ -0,0 +1,226 @@
+import base64
+import csv
+import hashlib
+import io
+import json
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import CustomUser, Directorate, DirectorySyncState, UserRole
+
+SYNC_BATCH_SIZE = 1000
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'hod'}
+
+# LDIF attribute (lowercased) -> record field
+LDIF_ATTRIBUTES = {
+    'employeenumber': 'tsc_no', 'uid': 'tsc_no',
+    'department': 'directorate', 'ou': 'directorate',
+    'manager': 'hod_tsc_no',
+    'employeetype': 'is_hod',
+}
+# CSV header (lowercased, spaces -> underscores) -> record field
+CSV_COLUMNS = {
+    'tsc_no': 'tsc_no', 'tsc_number': 'tsc_no',
+    'directorate': 'directorate', 'department': 'directorate',
+    'hod_tsc_no': 'hod_tsc_no', 'manager': 'hod_tsc_no', 'hod': 'hod_tsc_no',
+    'is_hod': 'is_hod',
+}
+
+
+# --- PARSING ---
+
+def _record(fields):
+    """Normalise a raw record to the fields the sync manages."""
+    manager = (fields.get('hod_tsc_no') or '').strip()
+    if manager.lower().startswith(('uid=', 'employeenumber=')):
+        # LDAP DN: uid=12345,ou=People,dc=tsc -> 12345
+        manager = manager.split(',', 1)[0].split('=', 1)[1]
+    return {
+        'tsc_no': (fields.get('tsc_no') or '').strip(),
+        'directorate': (fields.get('directorate') or '').strip(),
+        'hod_tsc_no': manager,
+        'is_hod': (fields.get('is_hod') or '').strip().lower() in TRUE_VALUES,
+    }
+
+
+def read_csv(fh):
+    if isinstance(fh.read(0), bytes):
+        fh = io.TextIOWrapper(getattr(fh, 'file', fh), encoding='utf-8-sig', newline='')
+    for row in csv.DictReader(fh):
+        fields = {CSV_COLUMNS.get((k or '').strip().lower().replace(' ', '_')): v for k, v in row.items()}
+        yield _record(fields)
+
+
+def read_ldif(fh):
+    """Minimal streaming LDIF reader: blank-line separated entries, folded lines, base64 (attr::) values."""
+    if isinstance(fh.read(0), bytes):
+        fh = io.TextIOWrapper(getattr(fh, 'file', fh), encoding='utf-8')
+
+    def entries():
+        lines = []
+        for raw in fh:
+            line = raw.rstrip('\r\n')
+            if line.startswith(' ') and lines:
+                lines[-1] += line[1:]
+            elif line.strip():
+                lines.append(line)
+            elif lines:
+                yield lines
+                lines = []
+        if lines:
+            yield lines
+
+    for lines in entries():
+        fields = {}
+        for line in lines:
+            if line.startswith('#') or ':' not in line:
+                continue
+            attr, _, value = line.partition(':')
+            if value.startswith(':'):
+                value = base64.b64decode(value[1:].strip()).decode('utf-8')
+            field = LDIF_ATTRIBUTES.get(attr.strip().lower())
+            if field and field not in fields:
+                fields[field] = value.strip()
+        yield _record(fields)
+
+
+def read_snapshot(fh, name):
+    return read_ldif(fh) if name.lower().endswith('.ldif') else read_csv(fh)
+
+
+def record_digest(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+
+# --- SYNC ---
+
+def sync_directory(records, batch_size=SYNC_BATCH_SIZE, full=False):
+    """Apply a directory snapshot, touching only records whose content changed since the last sync.
+
+    Each record's SHA-1 is compared with DirectorySyncState, so an unchanged nightly
+    snapshot costs one indexed read per batch and no writes. Changed records are
+    applied in bulk: CustomUser.directorate, UserRole role/directorate/hod. Directorate
+    hod_email is then refreshed in one pass for every directorate that was touched.
+    Records that could not be fully applied keep their old digest and are retried
+    next time. Returns a summary dict.
+    """
+    summary = {'seen': 0, 'changed': 0, 'applied': 0, 'problems': []}
+    directorates = {name.lower(): pk for pk, name in Directorate.objects.values_list('pk', 'name')}
+    touched = set()
+    records = iter(records)
+
+    while True:
+        batch = [r for r in islice(records, batch_size) if r['tsc_no']]
+        if not batch:
+            break
+        summary['seen'] += len(batch)
+        digests = {r['tsc_no']: record_digest(r) for r in batch}
+        if not full:
+            synced = dict(DirectorySyncState.objects.filter(tsc_no__in=list(digests)).values_list('tsc_no', 'digest'))
+            batch = [r for r in batch if synced.get(r['tsc_no']) != digests[r['tsc_no']]]
+        if not batch:
+            continue
+        summary['changed'] += len(batch)
+        with transaction.atomic():
+            applied = _apply_batch(batch, directorates, touched, summary['problems'])
+            _save_digests({tsc_no: digests[tsc_no] for tsc_no in applied})
+        summary['applied'] += len(applied)
+
+    if touched:
+        refresh_hod_emails(touched)
+    return summary
+
+
+def _apply_batch(batch, directorates, touched, problems):
+    tsc_nos = {r['tsc_no'] for r in batch} | {r['hod_tsc_no'] for r in batch if r['hod_tsc_no']}
+    users = CustomUser.objects.in_bulk(list(tsc_nos), field_name='tsc_no')
+
+    # Directorates named in the snapshot but not yet in the database are created once
+    new_names = {r['directorate'] for r in batch if r['directorate'] and r['directorate'].lower() not in directorates}
+    if new_names:
+        Directorate.objects.bulk_create([Directorate(name=name, hod_email='') for name in new_names], ignore_conflicts=True)
+        directorates.update({
+            name.lower(): pk for pk, name in Directorate.objects.filter(name__in=new_names).values_list('pk', 'name')
+        })
+
+    roles = {role.user_id: role for role in UserRole.objects.filter(user__tsc_no__in=[r['tsc_no'] for r in batch])}
+    changed_users, changed_roles, new_roles, applied = [], [], [], []
+
+    for record in batch:
+        user = users.get(record['tsc_no'])
+        if user is None:
+            problems.append(f"{record['tsc_no']}: not in the system (import the user first)")
+            continue
+        complete = True
+        directorate_id = directorates.get(record['directorate'].lower()) if record['directorate'] else None
+        if user.directorate_id != directorate_id:
+            touched.update({user.directorate_id, directorate_id} - {None})
+            user.directorate_id = directorate_id
+            changed_users.append(user)
+
+        hod = users.get(record['hod_tsc_no']) if record['hod_tsc_no'] else None
+        if record['hod_tsc_no'] and hod is None:
+            problems.append(f"{record['tsc_no']}: manager {record['hod_tsc_no']} not found")
+            complete = False
+
+        role = roles.get(user.pk)
+        if role is None:
+            role = UserRole(user=user, role='staff')
+            new_roles.append(role)
+        before = (role.role, role.directorate_id, role.hod_id)
+        if record['is_hod']:
+            role.role, role.directorate_id = 'hod', directorate_id
+        elif role.role == 'hod':
+            # Only HOD status is owned by the directory; ICT/system admin roles are assigned by hand
+            touched.add(role.directorate_id)
+            role.role, role.directorate_id = 'staff', None
+        role.hod_id = hod.pk if hod else None
+        if role.role == 'hod':
+            touched.update({before[1], role.directorate_id} - {None})
+        if role.pk and (role.role, role.directorate_id, role.hod_id) != before:
+            changed_roles.append(role)
+
+        if complete:
+            applied.append(record['tsc_no'])
+
+    if changed_users:
+        CustomUser.objects.bulk_update(changed_users, ['directorate'])
+    if changed_roles:
+        UserRole.objects.bulk_update(changed_roles, ['role', 'directorate', 'hod'])
+    if new_roles:
+        UserRole.objects.bulk_create(new_roles, ignore_conflicts=True)
+    touched.discard(None)
+    return applied
+
+
+def _save_digests(digests):
+    if not digests:
+        return
+    now = timezone.now()
+    # MySQL upserts on any unique key and rejects an explicit conflict target
+    target = {'unique_fields': ['tsc_no']} if connection.features.supports_update_conflicts_with_target else {}
+    DirectorySyncState.objects.bulk_create(
+        [DirectorySyncState(tsc_no=tsc_no, digest=digest, synced_at=now) for tsc_no, digest in digests.items()],
+        update_conflicts=True, update_fields=['digest', 'synced_at'], **target,
+    )
+
+
+def refresh_hod_emails(directorate_ids):
+    """Set Directorate.hod_email from the HOD role holder for the given directorates in one UPDATE.
+    A directorate without an HOD in the system keeps its current address.
+    """
+    emails = dict(
+        UserRole.objects.filter(role='hod', directorate_id__in=directorate_ids, user__email__isnull=False)
+        .order_by('pk').values_list('directorate_id', 'user__email')
+    )
+    stale = [
+        Directorate(pk=pk, hod_email=emails[pk])
+        for pk, current in Directorate.objects.filter(pk__in=list(emails)).values_list('pk', 'hod_email')
+        if current != emails[pk]
+    ]
+    if stale:
+        Directorate.objects.bulk_update(stale, ['hod_email'])
+    return len(stale)
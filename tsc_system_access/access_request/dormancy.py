@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import AccessLog, AccessLogDailyRollup, CustomUser, DormantAccessFinding, RequestedSystem, UserRole
+from .revocation import create_revocation, start as start_revocation
+
+# Approved access (or an approver role) with no activity for this many days is flagged
+DORMANT_ACCESS_DAYS = getattr(settings, 'DORMANT_ACCESS_DAYS', 90)
+APPROVER_ROLES = ('hod', 'ict', 'sys_admin')
+# A dismissed finding ("access is still needed") is not raised again for this many days
+DORMANT_DISMISS_DAYS = getattr(settings, 'DORMANT_DISMISS_DAYS', 180)
+
+
+def _frame(rows, columns):
+    """DataFrame from a values_list; the last column is a datetime."""
+    frame = pd.DataFrame.from_records(list(rows), columns=columns)
+    frame[columns[-1]] = pd.to_datetime(frame[columns[-1]], utc=True)
+    return frame
+
+
+def last_activity():
+    """Series user id -> most recent activity, from last_login, raw access logs and the daily rollups
+    (so archived months still count). Each source is reduced to one row per user in the database;
+    pandas only combines them.
+    """
+    sources = [
+        _frame(CustomUser.objects.exclude(last_login=None).values_list('pk', 'last_login'), ['user', 'last_seen']),
+        _frame(AccessLog.objects.values('user').annotate(last=Max('timestamp')).values_list('user', 'last').order_by(), ['user', 'last_seen']),
+        _frame(AccessLogDailyRollup.objects.values('user').annotate(last=Max('last_seen')).values_list('user', 'last').order_by(), ['user', 'last_seen']),
+    ]
+    return pd.concat(sources, ignore_index=True).groupby('user')['last_seen'].max()
+
+
+def find_dormant(days=DORMANT_ACCESS_DAYS, now=None):
+    """Return (dormant_access, inactive_approvers) DataFrames.
+
+    dormant_access: approved RequestedSystems whose holder has not been active for `days`
+    (a grant newer than that is never flagged; an approved deactivation is not access). inactive_approvers: HOD/ICT/system admin
+    role holders with no activity for `days`, including those who never logged in.
+    """
+    now = pd.Timestamp(now or timezone.now())
+    cutoff = now - pd.Timedelta(days=days)
+    activity = last_activity()
+
+    grants = _frame(
+        RequestedSystem.objects.filter(sysadmin_status='approved', access_request__requester__is_active=True)
+        .exclude(access_request__request_type='deactivate')
+        .values_list('pk', 'access_request__requester_id', 'system', 'sysadmin_decision_date'),
+        ['requested_system', 'user', 'system', 'granted_at'],
+    )
+    grants['last_seen'] = grants['user'].map(activity)
+    reference = grants[['last_seen', 'granted_at']].max(axis=1)
+    dormant = grants[reference.isna() | (reference < cutoff)].copy()
+    dormant['days_inactive'] = (now - dormant['last_seen']).dt.days
+
+    approvers = pd.DataFrame.from_records(
+        list(UserRole.objects.filter(role__in=APPROVER_ROLES, user__is_active=True).values_list('user_id', 'role')),
+        columns=['user', 'role'],
+    )
+    approvers['last_seen'] = pd.to_datetime(approvers['user'].map(activity), utc=True)
+    inactive = approvers[approvers['last_seen'].isna() | (approvers['last_seen'] < cutoff)].copy()
+    inactive['days_inactive'] = (now - inactive['last_seen']).dt.days
+    return dormant, inactive
+
+
+def _datetime(value):
+    return None if pd.isna(value) else value.to_pydatetime()
+
+
+def _int(value):
+    return None if pd.isna(value) else int(value)
+
+
+def _dismissed(days=DORMANT_DISMISS_DAYS):
+    """Keys of findings dismissed within the last `days`: ('dormant_access', requested system id)
+    or ('inactive_approver', user id, role).
+    """
+    keys = set()
+    for kind, system_id, user_id, role in DormantAccessFinding.objects.filter(
+        status='dismissed', resolved_at__gte=timezone.now() - timedelta(days=days)
+    ).values_list('kind', 'requested_system_id', 'user_id', 'role'):
+        keys.add((kind, system_id) if kind == 'dormant_access' else (kind, user_id, role))
+    return keys
+
+
+@transaction.atomic
+def record_findings(days=DORMANT_ACCESS_DAYS):
+    """Run the detection and replace the open findings with the new results, leaving out anything
+    dismissed in the last DORMANT_DISMISS_DAYS. Returns (dormant_access, inactive_approvers) counts.
+    """
+    dormant, inactive = find_dormant(days)
+    dismissed = _dismissed()
+    dormant = dormant[[('dormant_access', int(pk)) not in dismissed for pk in dormant['requested_system']]]
+    inactive = inactive[[('inactive_approver', int(user), role) not in dismissed for user, role in zip(inactive['user'], inactive['role'])]]
+    findings = [
+        DormantAccessFinding(
+            kind='dormant_access', user_id=int(row.user), requested_system_id=int(row.requested_system), system=row.system,
+            last_seen=_datetime(row.last_seen), days_inactive=_int(row.days_inactive),
+        )
+        for row in dormant.itertuples(index=False)
+    ] + [
+        DormantAccessFinding(
+            kind='inactive_approver', user_id=int(row.user), role=row.role,
+            last_seen=_datetime(row.last_seen), days_inactive=_int(row.days_inactive),
+        )
+        for row in inactive.itertuples(index=False)
+    ]
+    DormantAccessFinding.objects.filter(status='open').delete()
+    DormantAccessFinding.objects.bulk_create(findings, batch_size=1000)
+    return len(dormant), len(inactive)
+
+
+def revoke_findings(findings, revoked_by):
+    """Bulk-revoke the access behind open 'dormant_access' findings through the revocation pipeline
+    (see revocation.py); large sets are left queued for run_bulk_revocations. Returns the revocation.
+    """
+    findings = findings.filter(kind='dormant_access', status='open', requested_system__isnull=False)
+    finding_ids, system_ids = [], []
+    for pk, system_id in findings.values_list('pk', 'requested_system_id'):
+        finding_ids.append(pk)
+        system_ids.append(system_id)
+    if not finding_ids:
+        return None
+    with transaction.atomic():
+        revocation = create_revocation("Revoked as unused (dormant access review)", revoked_by, 'dormancy', system_ids)
+        DormantAccessFinding.objects.filter(pk__in=finding_ids).update(status='revoked', resolved_at=timezone.now(), resolved_by=revoked_by)
+    return start_revocation(revocation)
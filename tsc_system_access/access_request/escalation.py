@@ -0,0 +1,167 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .assignment import serving_slots
+from .delegation import delegation_index
+from .models import CustomUser, EscalationNotice, RequestedSystem
+from .notifications import SYSTEM_LABELS, queue_many, state_key
+
+# Level 1 reminds the current approver once the SLA deadline passes. Level 2 goes to the overall admins
+# ESCALATION_LEVEL2_HOURS after level 1 and (with ESCALATION_REASSIGN) hands the item to the least-loaded one.
+ESCALATION_LEVEL2_HOURS = getattr(settings, 'ESCALATION_LEVEL2_HOURS', 48)
+ESCALATION_REASSIGN = getattr(settings, 'ESCALATION_REASSIGN', True)
+# Rate limit: at most this many escalation emails per run; the rest wait for the next run
+ESCALATION_MAX_EMAILS_PER_RUN = getattr(settings, 'ESCALATION_MAX_EMAILS_PER_RUN', 100)
+ESCALATION_BATCH_SIZE = 500
+ESCALATION_LEVELS = (1, 2)
+
+STAGE_LABELS = {'hod': "HOD", 'ict': "ICT", 'sys_admin': "System Admin"}
+
+
+def overdue(level, now):
+    """Open systems due for `level`: one range scan on the (escalation_level, escalate_at) index.
+    escalate_at is the SLA deadline for level 1 and is moved forward as each level is sent.
+    """
+    return RequestedSystem.objects.filter(
+        escalation_level=level - 1, escalate_at__lt=now
+    ).exclude(open_stage='').order_by('escalate_at')
+
+
+class Recipients:
+    """Mailboxes for each stage and level, loaded once per run."""
+
+    def __init__(self):
+        self.sys_admins = defaultdict(list)
+        self.admin_emails = {}
+        for system, admin_id, email in serving_slots().values_list('system', 'admin_id', 'admin__email'):
+            if email:
+                self.sys_admins[system].append(email)
+                self.admin_emails[admin_id] = email
+        self.overall_admins = list(
+            CustomUser.objects.filter(Q(is_superuser=True) | Q(userrole__role='super_admin'), is_active=True)
+            .exclude(email=None).order_by('pk').values_list('pk', 'email')
+        )
+        # Deputies covering for a HOD today are escalated to alongside the HOD
+        self.deputies = delegation_index()['emails']
+
+    def for_item(self, system, level):
+        """Mailboxes to escalate an item to. When the stage has nobody to tell (no HOD mailbox, ICT_TEAM_EMAIL
+        unset, no serving admins) the overall admins are told instead, so no level is used up unheard."""
+        mailboxes = self._stage_mailboxes(system) if level == 1 else []
+        return mailboxes or [email for _, email in self.overall_admins]
+
+    def _stage_mailboxes(self, system):
+        if system.open_stage == 'hod':
+            directorate = system.access_request.directorate
+            if not directorate:
+                return []
+            return ([directorate.hod_email] if directorate.hod_email else []) + self.deputies.get(directorate.pk, [])
+        if system.open_stage == 'ict':
+            return [settings.ICT_TEAM_EMAIL] if settings.ICT_TEAM_EMAIL else []
+        # An item in an admin's queue goes to that admin; unassigned ones to every admin of the system
+        if system.sysadmin_assignee_id in self.admin_emails:
+            return [self.admin_emails[system.sysadmin_assignee_id]]
+        return list(self.sys_admins.get(system.system, []))
+
+
+def _assigned_load(admin_ids):
+    """{admin id: open items already assigned to them}."""
+    return Counter(dict(
+        RequestedSystem.objects.filter(assigned_to__in=admin_ids).exclude(open_stage='')
+        .values_list('assigned_to').annotate(n=Count('id')).order_by()
+    ))
+
+
+def _item(system, now):
+    request_obj = system.access_request
+    return {
+        'id': system.pk,
+        'system': SYSTEM_LABELS.get(system.system, system.system),
+        'requester_name': request_obj.requester.full_name,
+        'tsc_no': request_obj.tsc_no,
+        'directorate_name': request_obj.directorate.name if request_obj.directorate else '-',
+        'stage': STAGE_LABELS.get(system.open_stage, system.open_stage),
+        'due_at': system.due_at,
+        'days_overdue': (now - system.due_at).days,
+    }
+
+
+@transaction.atomic
+def _escalate_batch(level, now, recipients, email_budget, batch_size):
+    """Escalate one batch of overdue items. Returns (items escalated, emails queued, whether to look again)."""
+    # Rows are locked for this transaction; a second node running despite the lease skips them
+    candidates = list(
+        overdue(level, now).select_related('access_request__requester', 'access_request__directorate')
+        .select_for_update(skip_locked=True, of=('self',))[:batch_size]
+    )
+    if not candidates:
+        return 0, 0, False
+
+    # Group by mailbox; a mailbox beyond this run's email budget is left for the next run
+    bundles, taken = defaultdict(list), []
+    for system in candidates:
+        mailboxes = recipients.for_item(system, level)
+        if not mailboxes:
+            continue  # nobody at all to tell: stays at its level until someone is configured
+        if len(bundles) + len({m for m in mailboxes if m not in bundles}) > email_budget:
+            continue
+        for mailbox in mailboxes:
+            bundles[mailbox].append(system)
+        taken.append((system, mailboxes))
+    if not taken:
+        return 0, 0, True
+    next_at = now + timedelta(hours=ESCALATION_LEVEL2_HOURS) if level < ESCALATION_LEVELS[-1] else None
+    RequestedSystem.objects.filter(pk__in=[system.pk for system, _ in taken]).update(escalation_level=level, escalate_at=next_at)
+
+    reassigned = {}
+    if level > 1 and ESCALATION_REASSIGN and recipients.overall_admins:
+        load = _assigned_load([pk for pk, _ in recipients.overall_admins])
+        by_admin = defaultdict(list)
+        for system, _ in taken:
+            admin_id = min((pk for pk, _ in recipients.overall_admins), key=lambda pk: (load[pk], pk))
+            load[admin_id] += 1
+            reassigned[system.pk] = admin_id
+            by_admin[admin_id].append(system.pk)
+        for admin_id, pks in by_admin.items():
+            RequestedSystem.objects.filter(pk__in=pks).update(assigned_to=admin_id)
+
+    EscalationNotice.objects.bulk_create([
+        EscalationNotice(
+            requested_system=system, stage=system.open_stage, level=level,
+            recipients=mailboxes, reassigned_to_id=reassigned.get(system.pk),
+        )
+        for system, mailboxes in taken
+    ], ignore_conflicts=True)
+
+    queued = queue_many('escalation', (
+        (
+            state_key("escalation", mailbox, level, *sorted(s.pk for s in systems)),
+            {'level': level, 'items': [_item(s, now) for s in systems], 'reassigned': bool(reassigned)},
+            [mailbox],
+        )
+        for mailbox, systems in bundles.items()
+    ))
+    return len(taken), queued, len(candidates) == batch_size or len(taken) < len(candidates)
+
+
+def run_escalations(now=None, batch_size=ESCALATION_BATCH_SIZE, max_emails=ESCALATION_MAX_EMAILS_PER_RUN):
+    """Escalate overdue approvals, level by level and batch by batch, within the email budget.
+    Safe to run repeatedly: each item moves up a level exactly once. Returns {'escalated', 'emails'}.
+    """
+    now = now or timezone.now()
+    recipients = Recipients()
+    summary = {'escalated': 0, 'emails': 0}
+    for level in ESCALATION_LEVELS:
+        more = True
+        while more and summary['emails'] < max_emails:
+            escalated, queued, more = _escalate_batch(level, now, recipients, max_emails - summary['emails'], batch_size)
+            summary['escalated'] += escalated
+            summary['emails'] += queued
+            if not escalated:
+                break
+    return summary
@@ -0,0 +1,108 @@
+from collections import Counter
+
+from django.db.models import Count, Q
+
+from .models import AccessRequest, CustomUser, Directorate, RequestedSystem
+
+# Facet GET parameter -> RequestedSystem values() key. 'approver' matches either approver column.
+FACET_FIELDS = {
+    'directorate': 'access_request__directorate',
+    'system': 'system',
+    'status': 'access_request__status',
+    'request_type': 'access_request__request_type',
+}
+APPROVER_FIELDS = ('access_request__hod_approver', 'access_request__ict_approver')
+FACET_LABELS = {
+    'directorate': 'Directorate',
+    'system': 'System',
+    'status': 'Stage Status',
+    'request_type': 'Request Type',
+    'approver': 'Approver',
+}
+
+
+def selected_facets(params):
+    selected = {name: params[name] for name in FACET_LABELS if params.get(name)}
+    # id-valued facets: ignore anything that is not a primary key
+    for name in ('directorate', 'approver'):
+        if name in selected and not selected[name].isdigit():
+            del selected[name]
+    return selected
+
+
+def apply_facets(access_requests, selected):
+    """Narrow an AccessRequest queryset to the selected facet values."""
+    if 'directorate' in selected:
+        access_requests = access_requests.filter(directorate_id=selected['directorate'])
+    if 'status' in selected:
+        access_requests = access_requests.filter(status=selected['status'])
+    if 'request_type' in selected:
+        access_requests = access_requests.filter(request_type=selected['request_type'])
+    if 'approver' in selected:
+        approver = selected['approver']
+        access_requests = access_requests.filter(Q(hod_approver_id=approver) | Q(ict_approver_id=approver))
+    if 'system' in selected:
+        access_requests = access_requests.filter(
+            pk__in=RequestedSystem.objects.filter(system=selected['system']).values('access_request')
+        )
+    return access_requests
+
+
+def _matches(row, selected, skip=None):
+    for name, value in selected.items():
+        if name == skip:
+            continue
+        if name == 'approver':
+            if value not in {str(row[f]) for f in APPROVER_FIELDS}:
+                return False
+        elif str(row[FACET_FIELDS[name]]) != value:
+            return False
+    return True
+
+
+def compute_facets(systems, selected):
+    """Facet counts for every dimension from ONE grouped query.
+
+    systems is a RequestedSystem queryset with the non-facet filters (search, dates)
+    already applied. Each facet's counts honour every *other* selected facet, so the
+    options show what selecting them would yield. Counts are requested systems, the same
+    unit as the dashboard total. Returns (facets, total).
+    """
+    rows = systems.values(*FACET_FIELDS.values(), *APPROVER_FIELDS).annotate(n=Count('id')).order_by()
+    counts = {name: Counter() for name in FACET_LABELS}
+    total = 0
+
+    for row in rows:
+        if _matches(row, selected):
+            total += row['n']
+        for name in counts:
+            if not _matches(row, selected, skip=name):
+                continue
+            if name == 'approver':
+                for approver in {row[f] for f in APPROVER_FIELDS} - {None}:
+                    counts[name][approver] += row['n']
+            elif row[FACET_FIELDS[name]] is not None:
+                counts[name][row[FACET_FIELDS[name]]] += row['n']
+
+    labels = {
+        'directorate': dict(Directorate.objects.filter(pk__in=counts['directorate']).values_list('pk', 'name')),
+        'system': dict(RequestedSystem.SYSTEM_CHOICES),
+        'status': dict(AccessRequest.STATUS_CHOICES),
+        'request_type': dict(AccessRequest.REQUEST_TYPE_CHOICES),
+        'approver': dict(CustomUser.objects.filter(pk__in=counts['approver']).values_list('pk', 'full_name')),
+    }
+
+    facets = []
+    for name, label in FACET_LABELS.items():
+        options = [
+            {
+                'value': str(value),
+                'label': labels[name].get(value, value),
+                'count': count,
+                'selected': selected.get(name) == str(value),
+            }
+            for value, count in counts[name].items()
+        ]
+        options.sort(key=lambda o: str(o['label']))
+        facets.append({'name': name, 'label': label, 'options': options})
+    return facets, total
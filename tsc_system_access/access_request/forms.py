@@ -7,6 +7,8 @@ from django import forms  # <-- The correct module for CharField and PasswordInp
 from django.utils.translation import gettext as _ 
 # Note: PasswordField doesn't exist; we use CharField + PasswordInput widget.
 from django.core.exceptions import ValidationError
+from .bulk_requests import BULK_COLUMN_ALIASES
+from .user_import import read_extract
 
 
 
@@ -57,7 +59,8 @@ class AccessRequestForm(forms.ModelForm):
         exclude = [
             'status', 'hod_approver', 'ict_approver', 'submitted_at',
             'requester', 'hod_status', 'hod_comment', 'hod_decision_date',
-            'directorate'   # ✅ excluded here
+            'directorate',   # ✅ excluded here
+            'due_at', 'submission_batch',  # maintained by sla.py / bulk_requests.py
         ]
         widgets = {
             'tsc_no': forms.TextInput(attrs={'class': 'form-control'}),
@@ -126,4 +129,80 @@ class CustomUserChangeForm(UserChangeForm):
             'is_active',
             'is_staff',
             'is_superuser',
-        )
\ No newline at end of file
+        )
+
+class HRImportForm(forms.Form):
+    extract = forms.FileField(help_text="CSV or XLSX with tsc_no, full_name, email and directorate columns.")
+    dry_run = forms.BooleanField(required=False, initial=True, help_text="Only report what would change.")
+
+    def clean_extract(self):
+        extract = self.cleaned_data['extract']
+        if not extract.name.lower().endswith(('.csv', '.xlsx', '.xlsm')):
+            raise ValidationError("Upload a .csv or .xlsx file.")
+        return extract
+
+class HodDelegationForm(forms.Form):
+    deputy_tsc_no = forms.CharField(max_length=20, label="Deputy TSC No")
+    start_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    end_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    reason = forms.CharField(max_length=255, required=False)
+
+    def clean_deputy_tsc_no(self):
+        deputy = CustomUser.objects.filter(tsc_no=self.cleaned_data['deputy_tsc_no'].strip(), is_active=True).first()
+        if not deputy:
+            raise ValidationError("No active staff member with that TSC number.")
+        return deputy
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get('start_date') and cleaned.get('end_date') and cleaned['end_date'] < cleaned['start_date']:
+            raise ValidationError("End date cannot be before the start date.")
+        return cleaned
+
+class HodBulkRequestForm(forms.Form):
+    extract = forms.FileField(required=False, help_text="CSV or XLSX with tsc_no, systems, request_type, designation and level_of_access columns.")
+    staff = forms.ModelMultipleChoiceField(
+        queryset=CustomUser.objects.none(), required=False,
+        widget=forms.SelectMultiple(attrs={'class': 'form-control select2', 'style': 'width: 100%;'}),
+    )
+    systems = forms.MultipleChoiceField(
+        choices=SYSTEM_CHOICES, required=False,
+        widget=forms.SelectMultiple(attrs={'class': 'form-control select2', 'style': 'width: 100%;'}),
+    )
+    request_type = forms.ChoiceField(choices=REQUEST_CHOICES, initial='new', widget=forms.Select(attrs={'class': 'form-control'}))
+    designation = forms.CharField(max_length=100, required=False, widget=forms.TextInput(attrs={'class': 'form-control'}))
+    access_levels = forms.ChoiceField(
+        choices=[('Admin', 'Admin'), ('User', 'User'), ('ICT', 'ICT')], initial='User',
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    validate_only = forms.BooleanField(required=False, help_text="Only check the rows.")
+
+    def __init__(self, *args, directorate_ids=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['staff'].queryset = CustomUser.objects.filter(directorate__in=directorate_ids, is_active=True).order_by('full_name')
+
+    def clean_extract(self):
+        extract = self.cleaned_data['extract']
+        if extract and not extract.name.lower().endswith(('.csv', '.xlsx', '.xlsm')):
+            raise ValidationError("Upload a .csv or .xlsx file.")
+        return extract
+
+    def clean(self):
+        cleaned = super().clean()
+        if not cleaned.get('extract') and not (cleaned.get('staff') and cleaned.get('systems') and cleaned.get('designation')):
+            raise ValidationError("Upload a file, or select staff and systems and give a designation.")
+        return cleaned
+
+    def rows(self):
+        """Row dicts for bulk_requests.submit_rows, from the upload or from the selection."""
+        extract = self.cleaned_data.get('extract')
+        if extract:
+            return read_extract(extract, extract.name, BULK_COLUMN_ALIASES)
+        return [
+            {
+                'tsc_no': member.tsc_no, 'systems': self.cleaned_data['systems'],
+                'request_type': self.cleaned_data['request_type'], 'designation': self.cleaned_data['designation'],
+                'level_of_access': self.cleaned_data['access_levels'],
+            }
+            for member in self.cleaned_data['staff']
+        ]
@@ -0,0 +1,35 @@
+import os
+import socket
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import SchedulerLock
+
+
+def lock_owner():
+    """Identifies this process across nodes."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lock(name, ttl_seconds, owner=None):
+    """Take or renew the named lease. Returns True if this owner now holds it.
+
+    The lease is one row per name; it is taken with a conditional UPDATE (free, expired,
+    or already ours), so exactly one node wins even when several start at the same moment.
+    """
+    owner = owner or lock_owner()
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    lock, created = SchedulerLock.objects.get_or_create(name=name, defaults={'owner': owner, 'expires_at': expires_at})
+    if created:
+        return True
+    return bool(
+        SchedulerLock.objects.filter(name=name).filter(Q(expires_at__lt=now) | Q(owner=owner))
+        .update(owner=owner, expires_at=expires_at)
+    )
+
+
+def release_lock(name, owner=None):
+    SchedulerLock.objects.filter(name=name, owner=owner or lock_owner()).update(expires_at=timezone.now())
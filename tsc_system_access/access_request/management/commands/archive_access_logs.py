@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from access_request.access_log import ACCESS_LOG_ARCHIVE_DIR, ACCESS_LOG_RETENTION_DAYS, archive_access_logs
+
+
+class Command(BaseCommand):
+    help = "Move access log rows older than the retention period into compressed monthly JSONL archives."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ACCESS_LOG_RETENTION_DAYS, help="Keep this many days in the database.")
+        parser.add_argument('--dir', default=None, help=f"Archive directory (default {ACCESS_LOG_ARCHIVE_DIR}).")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        moved = archive_access_logs(before, directory=options['dir'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} access log rows older than {before:%Y-%m-%d}."))
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from access_request.archive import REQUEST_ARCHIVE_AFTER_DAYS, archive_requests
+
+
+class Command(BaseCommand):
+    help = "Move closed (fully rejected/revoked) access requests older than the cut-off into the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=REQUEST_ARCHIVE_AFTER_DAYS, help="Archive requests submitted more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        moved = archive_requests(before, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} closed request(s) submitted before {before:%Y-%m-%d}."))
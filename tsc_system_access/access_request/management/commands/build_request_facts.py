@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from access_request.request_facts import backfill_facts, build_facts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily request facts for the last few days, and optionally backfill older days (re-running is safe)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help="Number of days to rebuild, ending today.")
+        parser.add_argument('--backfill', action='store_true', help="Also fill every older day that has no facts yet.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        total = 0
+        if options['backfill']:
+            total += backfill_facts(until=today - timedelta(days=options['days']))
+        total += build_facts(today - timedelta(days=options['days'] - 1), today)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} fact rows."))
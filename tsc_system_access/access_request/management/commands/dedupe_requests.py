@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from access_request.dedupe import dedupe_requests
+
+
+class Command(BaseCommand):
+    help = "Close open request items that duplicate another open item (same user, system and request type) or access the user already holds."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only count the duplicates.")
+
+    def handle(self, *args, **options):
+        closed, touched = dedupe_requests(dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"{closed} duplicate item(s) would be closed.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Closed {closed} duplicate item(s) across {touched} request(s)."))
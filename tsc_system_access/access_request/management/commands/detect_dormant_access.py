@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from access_request.dormancy import DORMANT_ACCESS_DAYS, record_findings
+
+
+class Command(BaseCommand):
+    help = "Flag approved access and approver roles with no activity for N days (results under Dormant Access Findings)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=DORMANT_ACCESS_DAYS)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        dormant, inactive = record_findings(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{dormant} unused right(s), {inactive} inactive approver(s) "
+            f"(no activity for {options['days']} days) in {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from access_request.recertification import expire_campaigns
+
+
+class Command(BaseCommand):
+    help = "Revoke entitlements still pending in recertification campaigns past their due date, and close those campaigns."
+
+    def handle(self, *args, **options):
+        results = expire_campaigns()
+        if results is None:
+            self.stdout.write("Another node is already expiring campaigns.")
+        elif not results:
+            self.stdout.write("No campaign is past its due date.")
+        for campaign_id, revoked in (results or {}).items():
+            self.stdout.write(self.style.SUCCESS(f"Campaign #{campaign_id} closed: {revoked} uncertified entitlement(s) revoked."))
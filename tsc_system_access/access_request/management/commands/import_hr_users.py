@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from access_request.user_import import IMPORT_BATCH_SIZE, import_users, read_extract
+
+
+class Command(BaseCommand):
+    help = "Create/update users from an HR extract (CSV or XLSX with tsc_no, full_name, email, directorate columns)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=None, help="Processes used to hash a password column (default: CPU count).")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without saving.")
+
+    def handle(self, *args, **options):
+        try:
+            fh = open(options['path'], 'rb')
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with fh:
+            summary = import_users(
+                read_extract(fh, options['path']), batch_size=options['batch_size'],
+                dry_run=options['dry_run'], workers=options['workers'],
+            )
+        for line, message in summary['errors']:
+            self.stderr.write(f"Row {line}: {message}")
+        prefix = "Dry run: " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{summary['created']} created, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged, {len(summary['errors'])} row(s) with problems."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from access_request.assignment import rebalance_all
+
+
+class Command(BaseCommand):
+    help = "Spread every system's System Admin queue evenly over its active admins and reset the open-item counters."
+
+    def handle(self, *args, **options):
+        moved = rebalance_all()
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced {len(moved)} system queue(s); {sum(moved.values())} item(s) moved."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from access_request.models import CustomUser
+from access_request.search import index_users
+
+
+class Command(BaseCommand):
+    help = "Rebuild the name search tokens for every user (run once after upgrading, or after bulk data fixes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        users = CustomUser.objects.order_by('pk').only('pk', 'full_name')
+        last_pk, indexed, tokens = 0, 0, 0
+        while True:
+            batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            tokens += index_users(batch)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"Indexed {indexed} users...")
+        self.stdout.write(self.style.SUCCESS(f"Done: {indexed} users, {tokens} tokens."))
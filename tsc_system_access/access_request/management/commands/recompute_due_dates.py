@@ -0,0 +1,19 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from access_request.sla import build_calendar, recompute_due_dates
+
+
+class Command(BaseCommand):
+    help = "Extend the business-day calendar and recompute the SLA deadline of every open request."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=2, help="Build the calendar from last January to this many years ahead.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        added = build_calendar(date(today.year - 1, 1, 1), date(today.year + options['years'], 12, 31))
+        moved = recompute_due_dates()
+        self.stdout.write(self.style.SUCCESS(f"Added {added} calendar day(s); {moved} request deadline(s) updated."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from access_request.reconciliation import read_export, reconcile, resolve_system
+
+
+class Command(BaseCommand):
+    help = "Compare a target-system account export (CSV or JSON/JSONL) with approved/revoked access and write a discrepancy CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('system', help="System code or name, e.g. 4 or Email.")
+        parser.add_argument('export')
+        parser.add_argument('--key-column', default='tsc_no', help="Export field holding the TSC number.")
+        parser.add_argument('--status-column', default='status', help="Export field holding the account status.")
+        parser.add_argument('--report', help="Report path (default reconciliation_<system>_<date>.csv).")
+
+    def handle(self, *args, **options):
+        system = resolve_system(options['system'])
+        if system is None:
+            raise CommandError(f"Unknown system '{options['system']}'.")
+        report_path = options['report'] or f"reconciliation_{system}_{timezone.localdate():%Y%m%d}.csv"
+        try:
+            export = open(options['export'], 'rb')
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with export, open(report_path, 'w', newline='', encoding='utf-8') as report:
+            counts = reconcile(
+                system, read_export(export, options['export']), report,
+                key_column=options['key_column'], status_column=options['status_column'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['accounts']} accounts checked: {counts['orphan']} orphan, {counts['missing']} missing, "
+            f"{counts['unrevoked']} unrevoked. Report: {report_path}"
+        ))
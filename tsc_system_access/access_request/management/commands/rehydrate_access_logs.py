@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from access_request.access_log import rehydrate_access_logs
+
+
+def parse_date(value):
+    try:
+        return timezone.make_aware(datetime.strptime(value, "%Y-%m-%d"))
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = "Load archived access log rows (access_log_YYYY-MM.jsonl.gz) back into the database, e.g. for an investigation."
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+')
+        parser.add_argument('--since', help="Only rows on or after this date (YYYY-MM-DD).")
+        parser.add_argument('--until', help="Only rows before this date (YYYY-MM-DD).")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        since = parse_date(options['since']) if options['since'] else None
+        until = parse_date(options['until']) if options['until'] else None
+        for path in options['files']:
+            read = rehydrate_access_logs(path, since=since, until=until, batch_size=options['batch_size'])
+            self.stdout.write(f"{path}: {read} rows")
+        self.stdout.write(self.style.SUCCESS("Done. Rows already present were skipped."))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from access_request.notifications import relay_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver notification outbox rows that were not sent after commit (crashed worker, SMTP outage)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--loop', action='store_true', help="Keep relaying instead of exiting after one pass.")
+        parser.add_argument('--interval', type=int, default=60, help="Seconds between passes with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            sent = relay_outbox(batch_size=options['batch_size'])
+            self.stdout.write(f"Relayed {sent} notification(s).")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from access_request.access_log import rollup_day
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily access summaries for the last few days (re-running is safe)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help="Number of days to rebuild, ending today.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        total = 0
+        for offset in range(options['days'] - 1, -1, -1):
+            total += rollup_day(today - timedelta(days=offset))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} summary rows."))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from access_request.revocation import BULK_REVOKE_CHUNK_SIZE, run_queued
+
+
+class Command(BaseCommand):
+    help = "Carry out queued bulk revocations chunk by chunk, reporting progress (resumes interrupted ones)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=BULK_REVOKE_CHUNK_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting after one pass.")
+        parser.add_argument('--interval', type=int, default=60, help="Seconds between passes with --loop.")
+
+    def progress(self, revocation):
+        self.stdout.write(f"Bulk revocation #{revocation.pk}: {revocation.processed}/{revocation.total} ({revocation.percent_done}%), {revocation.revoked} revoked")
+
+    def handle(self, *args, **options):
+        while True:
+            completed = run_queued(chunk_size=options['chunk_size'], progress=self.progress)
+            self.stdout.write(f"Completed {completed} bulk revocation(s).")
+            if not options['loop']:
+                break
+            if not completed:
+                time.sleep(options['interval'])
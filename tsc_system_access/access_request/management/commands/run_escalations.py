@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from access_request.escalation import run_escalations
+from access_request.locks import acquire_lock, release_lock
+
+LOCK_NAME = 'escalations'
+
+
+class Command(BaseCommand):
+    help = "Send escalation notices for approvals past their SLA deadline (one node at a time)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-emails', type=int, default=None, help="Email limit per pass (default ESCALATION_MAX_EMAILS_PER_RUN).")
+        parser.add_argument('--loop', action='store_true', help="Keep running instead of exiting after one pass.")
+        parser.add_argument('--interval', type=int, default=300, help="Seconds between passes with --loop.")
+
+    def handle(self, *args, **options):
+        limits = {'batch_size': options['batch_size']}
+        if options['max_emails'] is not None:
+            limits['max_emails'] = options['max_emails']
+        while True:
+            # The lease outlives one pass, so a node that dies mid-run is replaced after it expires
+            if acquire_lock(LOCK_NAME, ttl_seconds=options['interval'] * 2):
+                summary = run_escalations(**limits)
+                self.stdout.write(f"Escalated {summary['escalated']} item(s) in {summary['emails']} email(s).")
+            else:
+                self.stdout.write("Another node holds the escalation lock; skipping this pass.")
+            if not options['loop']:
+                release_lock(LOCK_NAME)
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from access_request.provisioning import run_jobs
+
+
+class Command(BaseCommand):
+    help = "Carry out queued grants/revocations in the target systems through their connectors."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=8, help="Jobs run in parallel (each connector also has its own limit).")
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting after one pass.")
+        parser.add_argument('--interval', type=int, default=30, help="Seconds between passes with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            succeeded, failed = run_jobs(batch_size=options['batch_size'], workers=options['workers'])
+            self.stdout.write(f"Provisioned {succeeded} job(s), {failed} failed.")
+            if not options['loop']:
+                break
+            if not succeeded and not failed:
+                time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from access_request.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = "Send the daily pending-items digest to every HOD/ICT mailbox set to digest delivery. Schedule once a day (e.g. cron)."
+
+    def handle(self, *args, **options):
+        queued = send_digests()
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} digest email(s)."))
@@ -0,0 +1,31 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from access_request.models import RecertificationCampaign
+from access_request.recertification import generate_items, start_campaign
+
+
+class Command(BaseCommand):
+    help = "Open an access recertification campaign over every approved entitlement and email the HODs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', help="Defaults to 'Recertification YYYY-MM'.")
+        parser.add_argument('--due', type=date.fromisoformat, help="Due date (YYYY-MM-DD); defaults to RECERTIFICATION_REVIEW_DAYS from today.")
+        parser.add_argument('--resume', type=int, metavar='CAMPAIGN_ID', help="Finish generating a campaign whose run was interrupted.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['resume']:
+            campaign = RecertificationCampaign.objects.filter(pk=options['resume'], status='generating').first()
+            if not campaign:
+                raise CommandError(f"No campaign #{options['resume']} is still generating.")
+            generate_items(campaign)
+        else:
+            campaign = start_campaign(options['name'] or f"Recertification {date.today():%Y-%m}", options['due'])
+        campaign.refresh_from_db()
+        self.stdout.write(self.style.SUCCESS(
+            f"Campaign #{campaign.pk} '{campaign.name}' is open with {campaign.total_items} item(s), "
+            f"due {campaign.due_date} ({time.monotonic() - started:.1f}s)."
+        ))
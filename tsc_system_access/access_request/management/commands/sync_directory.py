@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from access_request.directory_sync import SYNC_BATCH_SIZE, read_snapshot, sync_directory
+
+
+class Command(BaseCommand):
+    help = "Apply an HR/LDAP directory snapshot (CSV or LDIF): directorates, HOD roles and reporting lines. Only changed records are written."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=SYNC_BATCH_SIZE)
+        parser.add_argument('--full', action='store_true', help="Ignore stored hashes and re-apply every record.")
+
+    def handle(self, *args, **options):
+        try:
+            fh = open(options['path'], 'rb')
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with fh:
+            summary = sync_directory(read_snapshot(fh, options['path']), batch_size=options['batch_size'], full=options['full'])
+        for problem in summary['problems']:
+            self.stderr.write(problem)
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['seen']} records read, {summary['changed']} changed, {summary['applied']} applied, "
+            f"{len(summary['problems'])} problem(s)."
+        ))
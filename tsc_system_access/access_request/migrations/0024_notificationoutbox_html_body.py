@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0023_notificationoutbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notificationoutbox",
+            name="html_body",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0024_notificationoutbox_html_body"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="customuser",
+            name="full_name",
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
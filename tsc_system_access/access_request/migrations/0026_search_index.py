@@ -0,0 +1,51 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0025_customuser_full_name_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="accessrequest",
+            name="tsc_no",
+            field=models.CharField(db_index=True, max_length=20),
+        ),
+        migrations.CreateModel(
+            name="UserSearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=64)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["token", "user"], name="access_requ_token_92815d_idx"
+                    )
+                ],
+                "unique_together": {("user", "token")},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0026_search_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="accesslog",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0027_accesslog_event_timestamp"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccessLogDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("action", models.CharField(max_length=50)),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("first_seen", models.DateTimeField()),
+                ("last_seen", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Daily Access Summary",
+                "verbose_name_plural": "Daily Access Summaries",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="accesslog",
+            index=models.Index(
+                fields=["timestamp"], name="access_requ_timesta_93396c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="accesslog",
+            index=models.Index(
+                fields=["user", "timestamp"], name="access_requ_user_id_428556_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="accesslogdailyrollup",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="access_rollups",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="accesslogdailyrollup",
+            index=models.Index(
+                fields=["user", "day"], name="access_requ_user_id_3a6b48_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="accesslogdailyrollup",
+            unique_together={("day", "user", "action")},
+        ),
+    ]
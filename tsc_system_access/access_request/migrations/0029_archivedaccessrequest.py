@@ -0,0 +1,119 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:25
+
+import access_request.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0028_accesslog_retention"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedAccessRequest",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("original_id", models.BigIntegerField(unique=True)),
+                ("requester_name", models.CharField(blank=True, max_length=255)),
+                ("tsc_no", models.CharField(db_index=True, max_length=20)),
+                (
+                    "request_type",
+                    models.CharField(
+                        choices=[
+                            ("new", "New User"),
+                            ("modify", "Change/Modify"),
+                            ("deactivate", "Deactivate"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending_hod", "Pending HOD"),
+                            ("rejected_hod", "Rejected HOD"),
+                            ("pending_ict", "Pending ICT"),
+                            ("rejected_ict", "Rejected ICT"),
+                            ("approved", "Approved"),
+                            ("revoked", "Access Revoked"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "systems",
+                    models.CharField(
+                        blank=True,
+                        help_text="Comma-separated system codes",
+                        max_length=100,
+                    ),
+                ),
+                ("submitted_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "payload",
+                    models.JSONField(encoder=access_request.models.ArchiveJSONEncoder),
+                ),
+                (
+                    "directorate",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="access_request.directorate",
+                    ),
+                ),
+                (
+                    "hod_approver",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "ict_approver",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "requester",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_requests",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Archived Request",
+                "verbose_name_plural": "Archived Requests",
+                "indexes": [
+                    models.Index(
+                        fields=["submitted_at"], name="access_requ_submitt_8fd4b5_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0029_archivedaccessrequest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DirectorySyncState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tsc_no", models.CharField(max_length=20, unique=True)),
+                ("digest", models.CharField(max_length=40)),
+                ("synced_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Directory Sync State",
+                "verbose_name_plural": "Directory Sync State",
+            },
+        ),
+    ]
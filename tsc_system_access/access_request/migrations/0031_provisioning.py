@@ -0,0 +1,123 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0030_directorysyncstate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="requestedsystem",
+            name="provisioned_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="requestedsystem",
+            name="provisioning_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("queued", "Queued"),
+                    ("done", "Provisioned"),
+                    ("failed", "Failed"),
+                ],
+                default="",
+                max_length=10,
+            ),
+        ),
+        migrations.CreateModel(
+            name="ProvisioningJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "system",
+                    models.CharField(
+                        choices=[
+                            ("1", "Active Directory"),
+                            ("2", "CRM"),
+                            ("3", "EDMS"),
+                            ("4", "Email"),
+                            ("5", "Help Desk"),
+                            ("6", "HRMIS"),
+                            ("7", "IDEA"),
+                            ("8", "IFMIS"),
+                            ("9", "Knowledge Base"),
+                            ("10", "Services"),
+                            ("11", "Teachers Online"),
+                            ("12", "TeamMate"),
+                            ("13", "TPAD"),
+                            ("14", "TPAY"),
+                            ("15", "Pydio"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("grant", "Grant"),
+                            ("revoke", "Revoke"),
+                            ("deactivate", "Deactivate"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("succeeded", "Succeeded"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("result", models.TextField(blank=True, default="")),
+                ("last_error", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "requested_system",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="provisioning_jobs",
+                        to="access_request.requestedsystem",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Provisioning Job",
+                "verbose_name_plural": "Provisioning Jobs",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="access_requ_status_c3b0f6_idx",
+                    )
+                ],
+            },
+        ),
+    ]
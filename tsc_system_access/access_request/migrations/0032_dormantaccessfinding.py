@@ -0,0 +1,100 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0031_provisioning"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DormantAccessFinding",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("dormant_access", "Unused Access"),
+                            ("inactive_approver", "Inactive Approver"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("role", models.CharField(blank=True, default="", max_length=20)),
+                ("last_seen", models.DateTimeField(blank=True, null=True)),
+                (
+                    "days_inactive",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Empty when the user has never logged in",
+                        null=True,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("open", "Open"),
+                            ("revoked", "Revoked"),
+                            ("dismissed", "Dismissed"),
+                        ],
+                        default="open",
+                        max_length=10,
+                    ),
+                ),
+                ("detected_at", models.DateTimeField(auto_now_add=True)),
+                ("resolved_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "requested_system",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dormancy_findings",
+                        to="access_request.requestedsystem",
+                    ),
+                ),
+                (
+                    "resolved_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dormancy_findings",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Dormant Access Finding",
+                "verbose_name_plural": "Dormant Access Findings",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "kind"], name="access_requ_status_db897b_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0032_dormantaccessfinding"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRequestFact",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "system",
+                    models.CharField(
+                        choices=[
+                            ("1", "Active Directory"),
+                            ("2", "CRM"),
+                            ("3", "EDMS"),
+                            ("4", "Email"),
+                            ("5", "Help Desk"),
+                            ("6", "HRMIS"),
+                            ("7", "IDEA"),
+                            ("8", "IFMIS"),
+                            ("9", "Knowledge Base"),
+                            ("10", "Services"),
+                            ("11", "Teachers Online"),
+                            ("12", "TeamMate"),
+                            ("13", "TPAD"),
+                            ("14", "TPAY"),
+                            ("15", "Pydio"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "stage",
+                    models.CharField(
+                        choices=[
+                            ("submitted", "Submitted"),
+                            ("hod", "HOD"),
+                            ("ict", "ICT"),
+                            ("sys_admin", "System Admin"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "outcome",
+                    models.CharField(
+                        choices=[
+                            ("submitted", "Submitted"),
+                            ("approved", "Approved"),
+                            ("rejected", "Rejected"),
+                            ("sent_admin", "Sent to Admin"),
+                            ("revoked", "Revoked"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Daily Request Fact",
+                "verbose_name_plural": "Daily Request Facts",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="accessrequest",
+            index=models.Index(
+                fields=["submitted_at"], name="access_requ_submitt_a660b7_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="requestedsystem",
+            index=models.Index(
+                fields=["hod_decision_date"], name="access_requ_hod_dec_0704fa_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="requestedsystem",
+            index=models.Index(
+                fields=["ict_decision_date"], name="access_requ_ict_dec_421159_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="requestedsystem",
+            index=models.Index(
+                fields=["sysadmin_decision_date"], name="access_requ_sysadmi_b852be_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="dailyrequestfact",
+            name="directorate",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="access_request.directorate",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="dailyrequestfact",
+            unique_together={("day", "directorate", "system", "stage", "outcome")},
+        ),
+    ]
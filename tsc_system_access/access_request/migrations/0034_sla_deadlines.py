@@ -0,0 +1,94 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0033_dailyrequestfact"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CalendarDay",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(unique=True)),
+                ("is_business_day", models.BooleanField(default=True)),
+                (
+                    "business_day_index",
+                    models.PositiveIntegerField(db_index=True, default=0),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        blank=True, help_text="Holiday name", max_length=100
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Calendar Day",
+                "verbose_name_plural": "Business Calendar",
+                "ordering": ["day"],
+            },
+        ),
+        migrations.AddField(
+            model_name="accessrequest",
+            name="due_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="requestedsystem",
+            name="due_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="requestedsystem",
+            name="open_stage",
+            field=models.CharField(
+                blank=True,
+                choices=[("hod", "HOD"), ("ict", "ICT"), ("sys_admin", "System Admin")],
+                default="",
+                max_length=10,
+            ),
+        ),
+        migrations.CreateModel(
+            name="DirectorateSLA",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hod_days", models.PositiveSmallIntegerField(default=3)),
+                ("ict_days", models.PositiveSmallIntegerField(default=3)),
+                ("sys_admin_days", models.PositiveSmallIntegerField(default=3)),
+                (
+                    "directorate",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sla",
+                        to="access_request.directorate",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Directorate SLA",
+                "verbose_name_plural": "Directorate SLAs",
+            },
+        ),
+    ]
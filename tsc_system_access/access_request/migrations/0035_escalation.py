@@ -0,0 +1,113 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0034_sla_deadlines"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EscalationNotice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("stage", models.CharField(max_length=10)),
+                ("level", models.PositiveSmallIntegerField()),
+                ("recipients", models.JSONField(blank=True, default=list)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Escalation Notice",
+                "verbose_name_plural": "Escalation Notices",
+            },
+        ),
+        migrations.CreateModel(
+            name="SchedulerLock",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("owner", models.CharField(max_length=100)),
+                ("expires_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Scheduler Lock",
+                "verbose_name_plural": "Scheduler Locks",
+            },
+        ),
+        migrations.AddField(
+            model_name="requestedsystem",
+            name="assigned_to",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Overall admin the overdue item was reassigned to",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="escalated_systems",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="requestedsystem",
+            name="escalate_at",
+            field=models.DateTimeField(
+                blank=True, help_text="When the next escalation level is due", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="requestedsystem",
+            name="escalation_level",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="requestedsystem",
+            index=models.Index(
+                fields=["escalation_level", "escalate_at"],
+                name="access_requ_escalat_50cf89_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="escalationnotice",
+            name="reassigned_to",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="escalationnotice",
+            name="requested_system",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="escalations",
+                to="access_request.requestedsystem",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="escalationnotice",
+            unique_together={("requested_system", "stage", "level")},
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0035_escalation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HodDelegation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("reason", models.CharField(blank=True, max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "deputy",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="delegations_received",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "directorate",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="delegations",
+                        to="access_request.directorate",
+                    ),
+                ),
+                (
+                    "hod",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="delegations_given",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "HOD Delegation",
+                "verbose_name_plural": "HOD Delegations",
+                "ordering": ["-start_date"],
+                "indexes": [
+                    models.Index(
+                        fields=["end_date", "start_date"],
+                        name="access_requ_end_dat_6460a4_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.0.4 on 2026-10-19 03:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_system_admins(apps, schema_editor):
+    """Existing System Admins keep their system as their first assignment."""
+    UserRole = apps.get_model("access_request", "UserRole")
+    SystemAdminAssignment = apps.get_model("access_request", "SystemAdminAssignment")
+    SystemAdminAssignment.objects.bulk_create(
+        [
+            SystemAdminAssignment(admin_id=user_id, system=system)
+            for user_id, system in UserRole.objects.filter(role="sys_admin")
+            .exclude(system_assigned=None)
+            .exclude(system_assigned="")
+            .values_list("user_id", "system_assigned")
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0036_hod_delegation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="requestedsystem",
+            name="sysadmin_assignee",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="sysadmin_queue",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.CreateModel(
+            name="SystemAdminAssignment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "system",
+                    models.CharField(
+                        choices=[
+                            ("1", "Active Directory"),
+                            ("2", "CRM"),
+                            ("3", "EDMS"),
+                            ("4", "Email"),
+                            ("5", "Help Desk"),
+                            ("6", "HRMIS"),
+                            ("7", "IDEA"),
+                            ("8", "IFMIS"),
+                            ("9", "Knowledge Base"),
+                            ("10", "Services"),
+                            ("11", "Teachers Online"),
+                            ("12", "TeamMate"),
+                            ("13", "TPAD"),
+                            ("14", "TPAY"),
+                            ("15", "Pydio"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Untick while the admin is away; their open items are moved to the others",
+                    ),
+                ),
+                ("open_items", models.PositiveIntegerField(default=0)),
+                ("last_assigned_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "admin",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="system_assignments",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "System Admin Assignment",
+                "verbose_name_plural": "System Admin Assignments",
+                "indexes": [
+                    models.Index(
+                        fields=["system", "is_active", "open_items"],
+                        name="access_requ_system_c07c68_idx",
+                    )
+                ],
+                "unique_together": {("admin", "system")},
+            },
+        ),
+        migrations.RunPython(copy_system_admins, migrations.RunPython.noop),
+    ]
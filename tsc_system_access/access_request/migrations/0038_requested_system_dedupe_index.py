@@ -0,0 +1,20 @@
+# Generated by Django 5.0.4 on 2026-10-19 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0037_system_admin_assignment"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="requestedsystem",
+            index=models.Index(
+                fields=["access_request", "system", "open_stage"],
+                name="access_requ_access__758e54_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.4 on 2026-10-19 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0038_requested_system_dedupe_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accessrequest",
+            name="submission_batch",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=32
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.4 on 2026-10-19 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0041_bulk_revocation"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="provisioningjob",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("running", "Running"),
+                    ("succeeded", "Succeeded"),
+                    ("failed", "Failed"),
+                    ("superseded", "Superseded"),
+                ],
+                default="pending",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.0.4 on 2026-10-19 04:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_audit_fields(apps, schema_editor):
+    """Existing items keep their system, TSC number and request id before the links become nullable."""
+    BulkRevocationItem = apps.get_model("access_request", "BulkRevocationItem")
+    items = list(
+        BulkRevocationItem.objects.select_related("requested_system__access_request")
+    )
+    for item in items:
+        item.system = item.requested_system.system
+        item.tsc_no = item.requested_system.access_request.tsc_no
+        item.request_ref = item.requested_system.access_request_id
+    BulkRevocationItem.objects.bulk_update(
+        items, ["system", "tsc_no", "request_ref"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0042_provisioning_job_superseded"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bulkrevocationitem",
+            name="request_ref",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bulkrevocationitem",
+            name="system",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("1", "Active Directory"),
+                    ("2", "CRM"),
+                    ("3", "EDMS"),
+                    ("4", "Email"),
+                    ("5", "Help Desk"),
+                    ("6", "HRMIS"),
+                    ("7", "IDEA"),
+                    ("8", "IFMIS"),
+                    ("9", "Knowledge Base"),
+                    ("10", "Services"),
+                    ("11", "Teachers Online"),
+                    ("12", "TeamMate"),
+                    ("13", "TPAD"),
+                    ("14", "TPAY"),
+                    ("15", "Pydio"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="bulkrevocationitem",
+            name="tsc_no",
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.RunPython(copy_audit_fields, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="bulkrevocationitem",
+            name="holder",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="bulkrevocationitem",
+            name="requested_system",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="bulk_revocations",
+                to="access_request.requestedsystem",
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.4 on 2026-10-19 04:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_audit_fields(apps, schema_editor):
+    """Existing items keep their TSC number and request id before the links become nullable."""
+    RecertificationItem = apps.get_model("access_request", "RecertificationItem")
+    items = list(
+        RecertificationItem.objects.select_related("requested_system__access_request")
+    )
+    for item in items:
+        item.tsc_no = item.requested_system.access_request.tsc_no
+        item.request_ref = item.requested_system.access_request_id
+    RecertificationItem.objects.bulk_update(
+        items, ["tsc_no", "request_ref"], batch_size=1000
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0043_bulk_revocation_item_keep_audit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recertificationitem",
+            name="request_ref",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="recertificationitem",
+            name="tsc_no",
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.RunPython(copy_audit_fields, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="recertificationitem",
+            name="holder",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="recertifications",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recertificationitem",
+            name="requested_system",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="recertifications",
+                to="access_request.requestedsystem",
+            ),
+        ),
+    ]
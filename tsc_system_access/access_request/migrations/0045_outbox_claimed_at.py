@@ -0,0 +1,28 @@
+# Generated by Django 5.0.4 on 2026-10-19 04:59
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_claimed_at(apps, schema_editor):
+    """Rows already stuck in 'sending' stay reclaimable: treat them as claimed when they were created."""
+    NotificationOutbox = apps.get_model("access_request", "NotificationOutbox")
+    NotificationOutbox.objects.filter(status="sending").update(
+        claimed_at=F("created_at")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0044_recertification_item_keep_audit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notificationoutbox",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_claimed_at, migrations.RunPython.noop),
+    ]
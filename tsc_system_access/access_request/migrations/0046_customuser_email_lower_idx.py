@@ -0,0 +1,22 @@
+# Generated by Django 5.0.4 on 2026-10-19 05:02
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0045_outbox_claimed_at"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                django.db.models.functions.text.Lower("email"),
+                name="customuser_email_lower_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.4 on 2026-10-19 05:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_audit_fields(apps, schema_editor):
+    """Existing jobs keep their TSC number and request id before the link becomes nullable."""
+    ProvisioningJob = apps.get_model("access_request", "ProvisioningJob")
+    jobs = list(
+        ProvisioningJob.objects.select_related("requested_system__access_request")
+    )
+    for job in jobs:
+        job.tsc_no = job.requested_system.access_request.tsc_no
+        job.request_ref = job.requested_system.access_request_id
+    ProvisioningJob.objects.bulk_update(
+        jobs, ["tsc_no", "request_ref"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0046_customuser_email_lower_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="provisioningjob",
+            name="request_ref",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="provisioningjob",
+            name="tsc_no",
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.RunPython(copy_audit_fields, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="provisioningjob",
+            name="requested_system",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="provisioning_jobs",
+                to="access_request.requestedsystem",
+            ),
+        ),
+    ]
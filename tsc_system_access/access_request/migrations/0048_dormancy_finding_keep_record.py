@@ -0,0 +1,65 @@
+# Generated by Django 5.0.4 on 2026-10-19 05:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_system(apps, schema_editor):
+    """Existing findings keep their system code before the link becomes nullable."""
+    DormantAccessFinding = apps.get_model("access_request", "DormantAccessFinding")
+    RequestedSystem = apps.get_model("access_request", "RequestedSystem")
+    DormantAccessFinding.objects.exclude(requested_system=None).update(
+        system=Subquery(
+            RequestedSystem.objects.filter(pk=OuterRef("requested_system")).values(
+                "system"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access_request", "0047_provisioning_job_keep_audit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dormantaccessfinding",
+            name="system",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("1", "Active Directory"),
+                    ("2", "CRM"),
+                    ("3", "EDMS"),
+                    ("4", "Email"),
+                    ("5", "Help Desk"),
+                    ("6", "HRMIS"),
+                    ("7", "IDEA"),
+                    ("8", "IFMIS"),
+                    ("9", "Knowledge Base"),
+                    ("10", "Services"),
+                    ("11", "Teachers Online"),
+                    ("12", "TeamMate"),
+                    ("13", "TPAD"),
+                    ("14", "TPAY"),
+                    ("15", "Pydio"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(copy_system, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="dormantaccessfinding",
+            name="requested_system",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="dormancy_findings",
+                to="access_request.requestedsystem",
+            ),
+        ),
+    ]
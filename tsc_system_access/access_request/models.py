@@ -1,6 +1,12 @@
+import datetime
+
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -19,7 +25,7 @@ class AccessRequest(models.Model):
         ('approved', 'Approved'), ('revoked', 'Access Revoked')
     ]
     requester = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    tsc_no = models.CharField(max_length=20)
+    tsc_no = models.CharField(max_length=20, db_index=True)
     email = models.EmailField()
     directorate = models.ForeignKey(Directorate, on_delete=models.SET_NULL, null=True)
     designation = models.CharField(max_length=100)
@@ -28,6 +34,14 @@ class AccessRequest(models.Model):
     submitted_at = models.DateTimeField(auto_now_add=True)
     hod_approver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="hod_approvals")
     ict_approver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="ict_approvals")
+    # Earliest SLA deadline among its open systems; empty when nothing is waiting (see sla.py)
+    due_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    # Set on requests created together by a HOD bulk submission (see bulk_requests.py)
+    submission_batch = models.CharField(max_length=32, blank=True, default='', db_index=True)
+
+    class Meta:
+        # Date-range reads by the daily fact build (request_facts.py)
+        indexes = [models.Index(fields=['submitted_at'])]
 
     def __str__(self):
         return f"{self.requester.full_name} - {self.request_type}"
@@ -57,6 +71,31 @@ class RequestedSystem(models.Model):
     sysadmin_decision_date = models.DateTimeField(blank=True, null=True)
     directorate = models.ForeignKey(Directorate, on_delete=models.SET_NULL, null=True)
 
+    # Written back by the provisioning worker (see provisioning.py)
+    provisioning_status = models.CharField(max_length=10, choices=[('queued', 'Queued'), ('done', 'Provisioned'), ('failed', 'Failed')], blank=True, default='')
+    provisioned_at = models.DateTimeField(blank=True, null=True)
+
+    # Stage this system is waiting on and its SLA deadline, refreshed on every transition (see sla.py)
+    open_stage = models.CharField(max_length=10, choices=[('hod', 'HOD'), ('ict', 'ICT'), ('sys_admin', 'System Admin')], blank=True, default='')
+    due_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    # Escalation progress of the open stage (see escalation.py); reset when the stage changes
+    escalation_level = models.PositiveSmallIntegerField(default=0)
+    escalate_at = models.DateTimeField(blank=True, null=True, help_text="When the next escalation level is due")
+    assigned_to = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='escalated_systems', help_text="Overall admin the overdue item was reassigned to")
+    # System admin whose queue the item is in while it waits at the System Admin stage (see assignment.py)
+    sysadmin_assignee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='sysadmin_queue')
+
+    class Meta:
+        # Date-range reads by the daily fact build (request_facts.py) and the escalation scan
+        indexes = [
+            models.Index(fields=['escalation_level', 'escalate_at']),
+            # Duplicate checks at submission (dedupe.py)
+            models.Index(fields=['access_request', 'system', 'open_stage']),
+            models.Index(fields=['hod_decision_date']),
+            models.Index(fields=['ict_decision_date']),
+            models.Index(fields=['sysadmin_decision_date']),
+        ]
+
     def __str__(self):
         return f"{self.get_system_display()} ({self.access_request.tsc_no})"
 
@@ -70,15 +109,39 @@ class AccessLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     action = models.CharField(max_length=50, default="Login")
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: buffered events keep the time they happened, not the time they were flushed
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
         verbose_name = "User Access Log"
         verbose_name_plural = "User Access Logs"
+        # Range scans for the admin, the analytics "recent logs" tab, rollups and the retention job
+        indexes = [
+            models.Index(fields=['timestamp']),
+            models.Index(fields=['user', 'timestamp']),
+        ]
 
     def __str__(self):
         return f"{self.user.full_name} ({self.action})"
 
+class AccessLogDailyRollup(models.Model):
+    """One row per user, action and day. Survives the retention job, so long-range reporting never reads raw logs."""
+    day = models.DateField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='access_rollups')
+    action = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Daily Access Summary"
+        verbose_name_plural = "Daily Access Summaries"
+        unique_together = ('day', 'user', 'action')
+        indexes = [models.Index(fields=['user', 'day'])]
+
+    def __str__(self):
+        return f"{self.day} {self.user_id} {self.action} x{self.count}"
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, tsc_no, password=None, **extra_fields):
         if not tsc_no: raise ValueError("TSC Number is required")
@@ -98,7 +161,7 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         # FIX: Custom message for unique constraint violation
         error_messages={'unique': 'TSC Number already exists.'}
     )
-    full_name = models.CharField(max_length=255)
+    full_name = models.CharField(max_length=255, db_index=True)
     email = models.EmailField(
         unique=True, 
         null=True, 
@@ -116,6 +179,10 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def get_full_name(self): return self.full_name
     def get_short_name(self): return self.full_name.split(" ")[0] if self.full_name else self.full_name
 
+    class Meta:
+        # The HR import matches emails case-insensitively (user_import.py)
+        indexes = [models.Index(Lower('email'), name='customuser_email_lower_idx')]
+
 class UserRole(models.Model):
     ROLE_CHOICES = [('hod', 'HOD'), ('ict', 'ICT'), ('staff', 'Staff'), ('sys_admin', 'System Admin'), ('super_admin', 'Overall Admin')]
     user = models.OneToOneField("access_request.CustomUser", on_delete=models.CASCADE, related_name="userrole")
@@ -146,6 +213,27 @@ class UserRole(models.Model):
         verbose_name_plural = "User Roles"
 
 
+class SystemAdminAssignment(models.Model):
+    """An admin serving a system's queue; a system can have several and an admin several systems.
+    open_items counts the items currently assigned to the admin for this system and is maintained
+    on every assignment and release (see assignment.py).
+    """
+    admin = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='system_assignments')
+    system = models.CharField(max_length=20, choices=RequestedSystem.SYSTEM_CHOICES)
+    is_active = models.BooleanField(default=True, help_text="Untick while the admin is away; their open items are moved to the others")
+    open_items = models.PositiveIntegerField(default=0)
+    last_assigned_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "System Admin Assignment"
+        verbose_name_plural = "System Admin Assignments"
+        unique_together = ('admin', 'system')
+        indexes = [models.Index(fields=['system', 'is_active', 'open_items'])]
+
+    def __str__(self):
+        return f"{self.admin} - {self.get_system_display()}"
+
+
 # CONSOLIDATED: SystemAdmin & HodAssignment merged into UserRole
 # Use UserRole for admin role assignments instead of separate tables
 # HOD email comes from Directorate.hod_email
@@ -159,4 +247,418 @@ class UserProfile(models.Model):
     system_assigned = models.CharField(max_length=20, choices=RequestedSystem.SYSTEM_CHOICES, blank=True, null=True)
     
     def __str__(self): 
-        return f"{self.user.full_name}"
\ No newline at end of file
+        return f"{self.user.full_name}"
+
+class NotificationPreference(models.Model):
+    """Delivery mode for an approver mailbox (directorate HOD email or the ICT team address).
+    Requesters are always notified immediately and never need a row here.
+    """
+    DELIVERY_CHOICES = [('immediate', 'Immediate'), ('digest', 'Daily Digest')]
+    email = models.EmailField(unique=True)
+    delivery = models.CharField(max_length=20, choices=DELIVERY_CHOICES, default='immediate')
+    last_digest_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Notification Preference"
+        verbose_name_plural = "Notification Preferences"
+
+    def __str__(self):
+        return f"{self.email} ({self.get_delivery_display()})"
+
+
+class NotificationOutbox(models.Model):
+    """Email written in the same transaction as the decision that triggered it.
+    Dispatched after commit (or by the relay command); the idempotency key stops a
+    retried view or a second relay run from sending the same notification twice.
+    """
+    STATUS_CHOICES = [('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')]
+    idempotency_key = models.CharField(max_length=191, unique=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, default='')
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set on every claim; a row left 'sending' is reclaimed by how long ago it was claimed, not created
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Notification Outbox"
+        verbose_name_plural = "Notification Outbox"
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class UserSearchToken(models.Model):
+    """One normalized word of a user's full name, maintained on save (see search.py).
+    Name searches become prefix lookups on this indexed column instead of %term% scans.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="search_tokens")
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ('user', 'token')
+        indexes = [models.Index(fields=['token', 'user'])]
+
+    def __str__(self):
+        return self.token
+
+
+class ProvisioningJob(models.Model):
+    """One grant/revoke/deactivate to carry out in a target system, written in the decision's transaction.
+    Executed by the provisioning worker; failures are retried with backoff up to PROVISIONING_MAX_ATTEMPTS.
+    Jobs outlive the entitlement: archiving the request only clears the link, the copied TSC number
+    and request id stay with the outcome.
+    """
+    ACTION_CHOICES = [('grant', 'Grant'), ('revoke', 'Revoke'), ('deactivate', 'Deactivate')]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'),
+        ('superseded', 'Superseded'),
+    ]
+    requested_system = models.ForeignKey(RequestedSystem, on_delete=models.SET_NULL, null=True, blank=True, related_name='provisioning_jobs')
+    system = models.CharField(max_length=20, choices=RequestedSystem.SYSTEM_CHOICES)
+    tsc_no = models.CharField(max_length=20, blank=True)
+    # AccessRequest id; matches ArchivedAccessRequest.original_id once the request is archived
+    request_ref = models.PositiveIntegerField(blank=True, null=True)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    result = models.TextField(blank=True, default='')
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Provisioning Job"
+        verbose_name_plural = "Provisioning Jobs"
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.get_system_display()} #{self.requested_system_id} ({self.status})"
+
+
+class DormantAccessFinding(models.Model):
+    """Output of the dormant-access job (see dormancy.py). Open findings are replaced on every run;
+    revoked/dismissed ones are kept as the record of what was done about them.
+    """
+    KIND_CHOICES = [('dormant_access', 'Unused Access'), ('inactive_approver', 'Inactive Approver')]
+    STATUS_CHOICES = [('open', 'Open'), ('revoked', 'Revoked'), ('dismissed', 'Dismissed')]
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='dormancy_findings')
+    # Cleared when the request is archived; the copied system code stays with the finding
+    requested_system = models.ForeignKey(RequestedSystem, on_delete=models.SET_NULL, null=True, blank=True, related_name='dormancy_findings')
+    system = models.CharField(max_length=20, choices=RequestedSystem.SYSTEM_CHOICES, blank=True)
+    role = models.CharField(max_length=20, blank=True, default='')
+    last_seen = models.DateTimeField(blank=True, null=True)
+    days_inactive = models.PositiveIntegerField(blank=True, null=True, help_text="Empty when the user has never logged in")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    detected_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(blank=True, null=True)
+    resolved_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        verbose_name = "Dormant Access Finding"
+        verbose_name_plural = "Dormant Access Findings"
+        indexes = [models.Index(fields=['status', 'kind'])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.user_id}"
+
+
+class CalendarDay(models.Model):
+    """Precomputed business-day calendar used for SLA deadlines (see sla.py).
+
+    business_day_index counts business days from the start of the table, so "N business
+    days after D" is the business day whose index is index(D) + N. Weekends and holidays
+    carry the index of the business day before them.
+    """
+    day = models.DateField(unique=True)
+    is_business_day = models.BooleanField(default=True)
+    business_day_index = models.PositiveIntegerField(default=0, db_index=True)
+    name = models.CharField(max_length=100, blank=True, help_text="Holiday name")
+
+    class Meta:
+        verbose_name = "Calendar Day"
+        verbose_name_plural = "Business Calendar"
+        ordering = ['day']
+
+    def __str__(self):
+        return f"{self.day} ({'business day' if self.is_business_day else self.name or 'closed'})"
+
+
+class DirectorateSLA(models.Model):
+    """Business days each approval stage may take for requests from a directorate.
+    Directorates without a row use SLA_BUSINESS_DAYS from settings.
+    """
+    directorate = models.OneToOneField(Directorate, on_delete=models.CASCADE, related_name='sla')
+    hod_days = models.PositiveSmallIntegerField(default=3)
+    ict_days = models.PositiveSmallIntegerField(default=3)
+    sys_admin_days = models.PositiveSmallIntegerField(default=3)
+
+    class Meta:
+        verbose_name = "Directorate SLA"
+        verbose_name_plural = "Directorate SLAs"
+
+    def __str__(self):
+        return f"SLA for {self.directorate}"
+
+
+class EscalationNotice(models.Model):
+    """One escalation step taken for an overdue stage (see escalation.py). Unique per system, stage and
+    level, so an item is escalated at most once per level however many scheduler runs see it.
+    """
+    requested_system = models.ForeignKey(RequestedSystem, on_delete=models.CASCADE, related_name='escalations')
+    stage = models.CharField(max_length=10)
+    level = models.PositiveSmallIntegerField()
+    recipients = models.JSONField(default=list, blank=True)
+    reassigned_to = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Escalation Notice"
+        verbose_name_plural = "Escalation Notices"
+        unique_together = ('requested_system', 'stage', 'level')
+
+    def __str__(self):
+        return f"Level {self.level} {self.stage} escalation for #{self.requested_system_id}"
+
+
+class SchedulerLock(models.Model):
+    """Lease held by the node running a scheduled job (see locks.py). Expires so a crashed node does not block the others."""
+    name = models.CharField(max_length=50, unique=True)
+    owner = models.CharField(max_length=100)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Scheduler Lock"
+        verbose_name_plural = "Scheduler Locks"
+
+    def __str__(self):
+        return f"{self.name} ({self.owner} until {self.expires_at:%Y-%m-%d %H:%M})"
+
+
+class HodDelegation(models.Model):
+    """A deputy who acts for a directorate's HOD between start_date and end_date (inclusive),
+    e.g. while the HOD is on leave. Active delegations are resolved from a cached index (see delegation.py).
+    """
+    hod = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='delegations_given')
+    deputy = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='delegations_received')
+    directorate = models.ForeignKey(Directorate, on_delete=models.CASCADE, related_name='delegations')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    reason = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "HOD Delegation"
+        verbose_name_plural = "HOD Delegations"
+        ordering = ['-start_date']
+        indexes = [models.Index(fields=['end_date', 'start_date'])]
+
+    def clean(self):
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError("End date cannot be before the start date.")
+        if self.hod_id and self.hod_id == self.deputy_id:
+            raise ValidationError("A HOD cannot delegate to themselves.")
+
+    def __str__(self):
+        return f"{self.deputy} for {self.directorate} ({self.start_date} to {self.end_date})"
+
+
+class DailyRequestFact(models.Model):
+    """Number of request events per day, directorate, system, stage and outcome (see request_facts.py).
+    Trend charts and exports read these rows instead of scanning requests; they outlive request archiving.
+    """
+    STAGE_CHOICES = [('submitted', 'Submitted'), ('hod', 'HOD'), ('ict', 'ICT'), ('sys_admin', 'System Admin')]
+    OUTCOME_CHOICES = [
+        ('submitted', 'Submitted'), ('approved', 'Approved'), ('rejected', 'Rejected'),
+        ('sent_admin', 'Sent to Admin'), ('revoked', 'Revoked'),
+    ]
+    day = models.DateField()
+    directorate = models.ForeignKey(Directorate, on_delete=models.SET_NULL, null=True, blank=True)
+    system = models.CharField(max_length=20, choices=RequestedSystem.SYSTEM_CHOICES)
+    stage = models.CharField(max_length=10, choices=STAGE_CHOICES)
+    outcome = models.CharField(max_length=10, choices=OUTCOME_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily Request Fact"
+        verbose_name_plural = "Daily Request Facts"
+        unique_together = ('day', 'directorate', 'system', 'stage', 'outcome')
+
+    def __str__(self):
+        return f"{self.day} {self.get_system_display()} {self.stage}/{self.outcome}: {self.count}"
+
+
+class RecertificationCampaign(models.Model):
+    """A periodic review of every approved entitlement (see recertification.py). HODs certify or
+    revoke the items of their directorate; items still pending after due_date are revoked.
+    """
+    STATUS_CHOICES = [('generating', 'Generating'), ('open', 'Open'), ('closed', 'Closed')]
+    name = models.CharField(max_length=100)
+    due_date = models.DateField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='generating')
+    total_items = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    closed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Recertification Campaign"
+        verbose_name_plural = "Recertification Campaigns"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} (due {self.due_date})"
+
+
+class RecertificationItem(models.Model):
+    """One approved entitlement to be certified or revoked in a campaign. Like BulkRevocationItem it outlives
+    the entitlement: archiving the request (or deleting the user) only clears the links.
+    """
+    DECISION_CHOICES = [('pending', 'Pending'), ('certified', 'Certified'), ('revoked', 'Revoked')]
+    campaign = models.ForeignKey(RecertificationCampaign, on_delete=models.CASCADE, related_name='items')
+    requested_system = models.ForeignKey(RequestedSystem, on_delete=models.SET_NULL, null=True, blank=True, related_name='recertifications')
+    holder = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='recertifications')
+    directorate = models.ForeignKey(Directorate, on_delete=models.SET_NULL, null=True, blank=True)
+    system = models.CharField(max_length=20, choices=RequestedSystem.SYSTEM_CHOICES)
+    tsc_no = models.CharField(max_length=20, blank=True)
+    # AccessRequest id; matches ArchivedAccessRequest.original_id once the request is archived
+    request_ref = models.PositiveIntegerField(blank=True, null=True)
+    reviewer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', help_text="HOD of the directorate when the campaign started")
+    decision = models.CharField(max_length=10, choices=DECISION_CHOICES, default='pending')
+    decided_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    decided_at = models.DateTimeField(blank=True, null=True)
+    comment = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        verbose_name = "Recertification Item"
+        verbose_name_plural = "Recertification Items"
+        unique_together = ('campaign', 'requested_system')
+        # HOD screens read (campaign, directorate, pending); expiry reads (campaign, pending)
+        indexes = [models.Index(fields=['campaign', 'decision', 'directorate'])]
+
+    def __str__(self):
+        return f"{self.get_system_display()} for {self.tsc_no or f'user #{self.holder_id}'} ({self.decision})"
+
+
+class BulkRevocation(models.Model):
+    """A revocation of many entitlements, carried out in chunks by revocation.py.
+    Its items are the work list and the audit record: one row per entitlement with its outcome.
+    """
+    STATUS_CHOICES = [('queued', 'Queued'), ('running', 'Running'), ('done', 'Done')]
+    SOURCE_CHOICES = [('admin', 'Admin'), ('dormancy', 'Dormant access review'), ('recertification', 'Recertification')]
+    reason = models.CharField(max_length=255)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='admin')
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', db_index=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    revoked = models.PositiveIntegerField(default=0)
+    # {system code: entitlements revoked}, kept per chunk for the closing system admin emails
+    summary = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Bulk Revocation"
+        verbose_name_plural = "Bulk Revocations"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"#{self.pk} {self.reason} ({self.processed}/{self.total})"
+
+    @property
+    def percent_done(self):
+        return 100 if not self.total else int(self.processed * 100 / self.total)
+
+
+class BulkRevocationItem(models.Model):
+    """Audit record of one entitlement in a bulk revocation. It outlives the entitlement: archiving the
+    request (or deleting the user) only clears the links, the copied system, TSC number and request id stay.
+    """
+    STATUS_CHOICES = [('pending', 'Pending'), ('revoked', 'Revoked'), ('skipped', 'Skipped (no longer approved)')]
+    revocation = models.ForeignKey(BulkRevocation, on_delete=models.CASCADE, related_name='items')
+    requested_system = models.ForeignKey(RequestedSystem, on_delete=models.SET_NULL, null=True, blank=True, related_name='bulk_revocations')
+    holder = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    system = models.CharField(max_length=20, choices=RequestedSystem.SYSTEM_CHOICES, blank=True)
+    tsc_no = models.CharField(max_length=20, blank=True)
+    # AccessRequest id; matches ArchivedAccessRequest.original_id once the request is archived
+    request_ref = models.PositiveIntegerField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Bulk Revocation Item"
+        verbose_name_plural = "Bulk Revocation Items"
+        unique_together = ('revocation', 'requested_system')
+        # Chunks are read as the next pending items, grouped by holder so each gets one email
+        indexes = [models.Index(fields=['revocation', 'status', 'holder'])]
+
+    def __str__(self):
+        return f"Revocation #{self.revocation_id}: system #{self.requested_system_id} ({self.status})"
+
+
+class DirectorySyncState(models.Model):
+    """Hash of the directory record last applied for a TSC number (see directory_sync.py).
+    Unchanged records in the next snapshot are skipped without touching users or roles.
+    """
+    tsc_no = models.CharField(max_length=20, unique=True)
+    digest = models.CharField(max_length=40)
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Directory Sync State"
+        verbose_name_plural = "Directory Sync State"
+
+    def __str__(self):
+        return f"{self.tsc_no} ({self.synced_at:%Y-%m-%d %H:%M})"
+
+
+class ArchiveJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder cuts datetimes to milliseconds; archived rows keep full precision."""
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class ArchivedAccessRequest(models.Model):
+    """A closed request moved out of the hot tables (see archive.py).
+
+    The columns are a slim index for dashboard/admin lookups; `payload` holds the full
+    AccessRequest row and all of its RequestedSystem rows exactly as they were.
+    """
+    original_id = models.BigIntegerField(unique=True)
+    requester = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="archived_requests")
+    requester_name = models.CharField(max_length=255, blank=True)
+    tsc_no = models.CharField(max_length=20, db_index=True)
+    directorate = models.ForeignKey(Directorate, on_delete=models.SET_NULL, null=True, blank=True)
+    hod_approver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    ict_approver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    request_type = models.CharField(max_length=20, choices=AccessRequest.REQUEST_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=AccessRequest.STATUS_CHOICES)
+    systems = models.CharField(max_length=100, blank=True, help_text="Comma-separated system codes")
+    submitted_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    payload = models.JSONField(encoder=ArchiveJSONEncoder)
+
+    class Meta:
+        verbose_name = "Archived Request"
+        verbose_name_plural = "Archived Requests"
+        indexes = [models.Index(fields=['submitted_at'])]
+
+    def __str__(self):
+        return f"{self.requester_name} - {self.request_type} (archived)"
+
+    def system_labels(self):
+        labels = dict(RequestedSystem.SYSTEM_CHOICES)
+        return ", ".join(labels.get(code, code) for code in self.systems.split(",") if code)
@@ -0,0 +1,294 @@
+import hashlib
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.template import engines
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import AccessRequest, NotificationOutbox, NotificationPreference, RequestedSystem
+
+# Relay tuning: failed rows are retried up to OUTBOX_MAX_ATTEMPTS times, and rows stuck in
+# 'sending' (worker died mid-send) are reclaimed OUTBOX_STALE_MINUTES after they were claimed.
+OUTBOX_MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+OUTBOX_STALE_MINUTES = getattr(settings, 'OUTBOX_STALE_MINUTES', 15)
+
+SYSTEM_LABELS = dict(RequestedSystem.SYSTEM_CHOICES)
+
+# Subject line per notification. Bodies live in templates/access_request/emails/<name>.txt / .html
+NOTIFICATION_SUBJECTS = {
+    'request_submitted_hod': "[TSC] New System Access Request Awaiting Your Approval",
+    'request_submitted_requester': "[TSC] Your System Access Request Has Been Submitted",
+    'hod_review_ict': "[TSC] New Approved Systems for {{ requester_name }}",
+    'hod_review_requester': "[TSC] HOD Review Complete - System Access Request",
+    'ict_review_requester': "[TSC] ICT Review Complete - System Access Request",
+    'sysadmin_decision': "[TSC] Access Update for {{ system.name }}",
+    'admin_override': "[TSC] Admin Override: Access to {{ system.name }}",
+    'digest': "[TSC] Daily Digest - {{ today|date:'Y-m-d' }}",
+    'bulk_submitted_ict': "[TSC] {{ requests|length }} Access Request(s) Approved by {{ hod_name }}",
+    'escalation': "[TSC] {% if level > 1 %}Escalated{% else %}Overdue{% endif %}: {{ items|length }} Access Request Item(s) Past SLA",
+    'access_revoked': "[TSC] Your Access Has Been Revoked",
+    'access_revoked_sysadmin': "[TSC] Bulk Revocation: {{ systems|length }} System(s) Affected",
+    'recertification_started': "[TSC] Access Recertification: {{ total }} Entitlement(s) to Review by {{ due_date|date:'Y-m-d' }}",
+}
+
+
+# --- RENDERING ---
+
+@lru_cache(maxsize=None)
+def _compiled(name):
+    """Load and compile the subject/text/html templates for a notification once per process."""
+    subject = engines['django'].from_string("{% autoescape off %}" + NOTIFICATION_SUBJECTS[name] + "{% endautoescape %}")
+    text = get_template(f"access_request/emails/{name}.txt")
+    html = get_template(f"access_request/emails/{name}.html")
+    return subject, text, html
+
+
+def render_notification(name, context):
+    """Render one notification. Returns (subject, text_body, html_body)."""
+    subject, text, html = _compiled(name)
+    return (
+        " ".join(subject.render(context).split()),
+        text.render(context).strip(),
+        html.render(context),
+    )
+
+
+def render_many(name, contexts):
+    """Render the same notification for many contexts in one pass (digests, mass revocations)."""
+    subject, text, html = _compiled(name)
+    for context in contexts:
+        yield (
+            " ".join(subject.render(context).split()),
+            text.render(context).strip(),
+            html.render(context),
+        )
+
+
+def system_context(system):
+    return {
+        'id': system.pk,
+        'code': system.system,
+        'name': SYSTEM_LABELS.get(system.system, system.system),
+        'level_of_access': system.level_of_access,
+        'hod_status': system.hod_status,
+        'ict_status': system.ict_status,
+        'sysadmin_status': system.sysadmin_status,
+    }
+
+
+def request_context(access_request):
+    """Rendering context for a request. Expects requester/directorate selected and
+    requested_systems prefetched (see load_requests); otherwise costs one query for the systems.
+    """
+    requester = access_request.requester
+    return {
+        'request_id': access_request.pk,
+        'requester_name': requester.get_full_name(),
+        'requester_email': access_request.email,
+        'tsc_no': access_request.tsc_no,
+        'directorate_name': access_request.directorate.name if access_request.directorate else '-',
+        'systems': [system_context(s) for s in access_request.requested_systems.all()],
+    }
+
+
+def load_requests(pks):
+    """Fetch requests with everything request_context needs in two queries, regardless of count."""
+    return AccessRequest.objects.filter(pk__in=pks).select_related(
+        'requester', 'directorate'
+    ).prefetch_related('requested_systems')
+
+
+# --- OUTBOX ---
+
+def state_key(prefix, *parts):
+    """Build an idempotency key from the state a notification describes.
+    Re-running a view that reaches the same state yields the same key, so nothing is re-sent.
+    """
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def queue_email(key, subject, body, recipients, html_body=''):
+    """Write an email to the outbox inside the caller's transaction and dispatch it after commit.
+    A key that has already been queued is ignored. Returns the outbox row, or None if there is no recipient.
+    """
+    recipients = [r for r in recipients if r]
+    if not recipients:
+        return None
+
+    message, created = NotificationOutbox.objects.get_or_create(
+        idempotency_key=key,
+        defaults={'subject': subject, 'body': body, 'html_body': html_body, 'recipients': recipients},
+    )
+    if created:
+        transaction.on_commit(lambda: dispatch([message.pk]))
+    return message
+
+
+def queue_notification(key, name, context, recipients):
+    """Render a templated notification and queue it (see queue_email)."""
+    subject, body, html_body = render_notification(name, context)
+    return queue_email(key, subject, body, recipients, html_body=html_body)
+
+
+def queue_many(name, items, batch_size=500):
+    """Bulk path: render and queue many notifications of one kind.
+
+    items is an iterable of (key, context, recipients). Rows are inserted with
+    bulk_create (duplicate keys skipped) and dispatched together after commit.
+    Returns the number of outbox rows queued.
+    """
+    items = [(key, context, [r for r in recipients if r]) for key, context, recipients in items]
+    items = [item for item in items if item[2]]
+    if not items:
+        return 0
+
+    rows = [
+        NotificationOutbox(idempotency_key=key, subject=subject, body=body, html_body=html_body, recipients=recipients)
+        for (key, _, recipients), (subject, body, html_body) in zip(items, render_many(name, (c for _, c, _ in items)))
+    ]
+    keys = [row.idempotency_key for row in rows]
+    existing = set(NotificationOutbox.objects.filter(idempotency_key__in=keys).values_list('idempotency_key', flat=True))
+    NotificationOutbox.objects.bulk_create(
+        [row for row in rows if row.idempotency_key not in existing], batch_size=batch_size, ignore_conflicts=True
+    )
+    pks = list(
+        NotificationOutbox.objects.filter(idempotency_key__in=keys, status='pending')
+        .exclude(idempotency_key__in=existing).values_list('pk', flat=True)
+    )
+    if pks:
+        transaction.on_commit(lambda: dispatch(pks))
+    return len(pks)
+
+
+def dispatch(pks, connection=None):
+    """Send the given outbox rows over one SMTP connection. Returns the number sent.
+
+    Each row is claimed with a conditional UPDATE before sending (on its status and claim time,
+    so a stale 'sending' row is reclaimed once), so concurrent dispatchers (on_commit hook vs.
+    relay, or two relay nodes) never send the same row twice.
+    """
+    connection = connection or get_connection(fail_silently=False)
+    sent = 0
+    for message in NotificationOutbox.objects.filter(pk__in=pks).exclude(status='sent'):
+        claimed = NotificationOutbox.objects.filter(pk=message.pk, status=message.status, claimed_at=message.claimed_at).update(
+            status='sending', attempts=F('attempts') + 1, claimed_at=timezone.now()
+        )
+        if not claimed:
+            continue
+        try:
+            email = EmailMultiAlternatives(
+                subject=message.subject,
+                body=message.body,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=message.recipients,
+                connection=connection,
+            )
+            if message.html_body:
+                email.attach_alternative(message.html_body, "text/html")
+            email.send()
+        except Exception as exc:
+            NotificationOutbox.objects.filter(pk=message.pk).update(status='failed', last_error=str(exc))
+            continue
+        NotificationOutbox.objects.filter(pk=message.pk).update(status='sent', sent_at=timezone.now(), last_error=None)
+        sent += 1
+    return sent
+
+
+def relay_outbox(batch_size=200):
+    """Deliver outbox rows whose after-commit dispatch never happened or failed. Returns the number sent."""
+    now = timezone.now()
+    pks = list(
+        NotificationOutbox.objects.filter(
+            Q(status='pending', created_at__lt=now - timedelta(minutes=1))
+            | Q(status='failed', attempts__lt=OUTBOX_MAX_ATTEMPTS)
+            | Q(status='sending', claimed_at__lt=now - timedelta(minutes=OUTBOX_STALE_MINUTES))
+        ).order_by('created_at').values_list('pk', flat=True)[:batch_size]
+    )
+    return dispatch(pks) if pks else 0
+
+
+# --- DIGESTS ---
+
+def wants_digest(email):
+    """True if the approver mailbox has opted into the daily digest instead of per-item emails."""
+    if not email:
+        return False
+    return NotificationPreference.objects.filter(email__iexact=email, delivery='digest').exists()
+
+
+def build_digests():
+    """Collect pending work for every digest mailbox.
+
+    Returns {email: [line, ...]} using one grouped query per approval stage,
+    so the cost depends on the number of directorates/systems, not on the
+    number of pending items.
+    """
+    digest_emails = {
+        email.lower(): email
+        for email in NotificationPreference.objects.filter(delivery='digest').values_list('email', flat=True)
+    }
+    if not digest_emails:
+        return {}
+
+    digests = {}
+
+    # 1. HOD mailboxes: items awaiting HOD review, grouped by directorate + system
+    hod_rows = RequestedSystem.objects.filter(
+        hod_status='pending',
+        access_request__directorate__isnull=False,
+    ).values(
+        'access_request__directorate__hod_email', 'access_request__directorate__name', 'system'
+    ).annotate(
+        total=Count('id'), oldest=Min('access_request__submitted_at')
+    ).order_by('access_request__directorate__name', 'system')
+
+    for row in hod_rows:
+        email = digest_emails.get((row['access_request__directorate__hod_email'] or '').lower())
+        if not email:
+            continue
+        digests.setdefault(email, []).append(
+            f"[HOD] {row['access_request__directorate__name']} - "
+            f"{SYSTEM_LABELS.get(row['system'], row['system'])}: {row['total']} pending "
+            f"(oldest {row['oldest']:%Y-%m-%d})"
+        )
+
+    # 2. ICT mailbox: items approved by HOD and awaiting ICT review, grouped by system
+    ict_email = digest_emails.get((settings.ICT_TEAM_EMAIL or '').lower())
+    if ict_email:
+        ict_rows = RequestedSystem.objects.filter(
+            hod_status='approved', ict_status='pending'
+        ).values('system').annotate(
+            total=Count('id'), oldest=Min('hod_decision_date')
+        ).order_by('system')
+
+        for row in ict_rows:
+            oldest = f" (oldest {row['oldest']:%Y-%m-%d})" if row['oldest'] else ""
+            digests.setdefault(ict_email, []).append(
+                f"[ICT] {SYSTEM_LABELS.get(row['system'], row['system'])}: {row['total']} pending{oldest}"
+            )
+
+    return digests
+
+
+@transaction.atomic
+def send_digests():
+    """Queue one digest email per mailbox; they go out together after commit. Returns the number queued.
+    Keys are per mailbox per day, so running the job twice on the same day sends nothing new.
+    """
+    digests = build_digests()
+    if not digests:
+        return 0
+
+    today = timezone.localdate()
+    queued = queue_many('digest', (
+        (f"digest:{email.lower()}:{today:%Y-%m-%d}", {'today': today, 'lines': lines}, [email])
+        for email, lines in digests.items()
+    ))
+    NotificationPreference.objects.filter(email__in=list(digests)).update(last_digest_at=timezone.now())
+    return queued
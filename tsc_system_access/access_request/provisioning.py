@@ -0,0 +1,245 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ProvisioningJob, RequestedSystem
+
+logger = logging.getLogger(__name__)
+
+# Worker tuning. A failed job is retried after 1, 2, 4, ... minutes until PROVISIONING_MAX_ATTEMPTS;
+# a job left 'running' by a dead worker is picked up again after PROVISIONING_STALE_MINUTES.
+PROVISIONING_MAX_ATTEMPTS = getattr(settings, 'PROVISIONING_MAX_ATTEMPTS', 5)
+PROVISIONING_STALE_MINUTES = getattr(settings, 'PROVISIONING_STALE_MINUTES', 30)
+# System code -> connector class path, overriding SYSTEM_CONNECTORS (e.g. the stub in development and tests)
+PROVISIONING_CONNECTORS = getattr(settings, 'PROVISIONING_CONNECTORS', {})
+STUB_CONNECTOR = 'access_request.provisioning.StubConnector'
+# One connector per RequestedSystem.SYSTEM_CHOICES entry (connectors.py). Each fails its jobs as
+# "no connector configured" until the system's endpoint is set in PROVISIONING_ENDPOINTS.
+SYSTEM_CONNECTORS = {
+    '1': 'access_request.connectors.ActiveDirectoryConnector',
+    '2': 'access_request.connectors.CRMConnector',
+    '3': 'access_request.connectors.EDMSConnector',
+    '4': 'access_request.connectors.EmailConnector',
+    '5': 'access_request.connectors.HelpDeskConnector',
+    '6': 'access_request.connectors.HRMISConnector',
+    '7': 'access_request.connectors.IDEAConnector',
+    '8': 'access_request.connectors.IFMISConnector',
+    '9': 'access_request.connectors.KnowledgeBaseConnector',
+    '10': 'access_request.connectors.ServicesConnector',
+    '11': 'access_request.connectors.TeachersOnlineConnector',
+    '12': 'access_request.connectors.TeamMateConnector',
+    '13': 'access_request.connectors.TPADConnector',
+    '14': 'access_request.connectors.TPAYConnector',
+    '15': 'access_request.connectors.PydioConnector',
+}
+
+
+class ProvisioningError(Exception):
+    """Raised by a connector. retryable=False marks a permanent failure (e.g. unknown account)."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class Connector:
+    """Carries out grants and revocations in one target system.
+
+    Subclasses implement grant/revoke (and deactivate, which defaults to revoke), return a
+    short result string for the job record, and raise ProvisioningError on failure.
+    max_concurrency caps how many jobs for this system run at once across the worker pool.
+    """
+    max_concurrency = 2
+
+    def __init__(self, system):
+        self.system = system
+        self.semaphore = threading.BoundedSemaphore(self.max_concurrency)
+
+    def grant(self, requested_system):
+        raise NotImplementedError
+
+    def revoke(self, requested_system):
+        raise NotImplementedError
+
+    def deactivate(self, requested_system):
+        return self.revoke(requested_system)
+
+    def run(self, job):
+        return getattr(self, job.action)(job.requested_system)
+
+
+class StubConnector(Connector):
+    """Records calls instead of contacting a system. For development and tests only: enable it per
+    system through PROVISIONING_CONNECTORS. Only the latest calls are kept, so a long-running worker does not grow.
+    """
+
+    def __init__(self, system):
+        super().__init__(system)
+        self.calls = deque(maxlen=100)
+
+    def grant(self, requested_system):
+        return self._record('grant', requested_system)
+
+    def revoke(self, requested_system):
+        return self._record('revoke', requested_system)
+
+    def deactivate(self, requested_system):
+        return self._record('deactivate', requested_system)
+
+    def _record(self, action, requested_system):
+        tsc_no = requested_system.access_request.tsc_no
+        self.calls.append((self.system, action, tsc_no))
+        return f"stub: {action} {tsc_no} on {requested_system.get_system_display()}"
+
+
+@lru_cache(maxsize=None)
+def get_connector(system):
+    """One connector instance per system code per process, so its semaphore is shared by all workers."""
+    path = PROVISIONING_CONNECTORS.get(system) or SYSTEM_CONNECTORS.get(system, 'access_request.connectors.RestConnector')
+    return import_string(path)(system)
+
+
+# --- ENQUEUE (called inside the decision's transaction) ---
+
+def provisioning_action(requested_system):
+    """The job a system admin decision implies, or None: approvals grant (or deactivate, for
+    deactivation requests) and revocations revoke."""
+    if requested_system.sysadmin_status == 'approved':
+        return 'deactivate' if requested_system.access_request.request_type == 'deactivate' else 'grant'
+    if requested_system.sysadmin_status == 'revoked':
+        return 'revoke'
+    return None
+
+
+# Queuing one of these supersedes grants still waiting for the same system
+REMOVAL_ACTIONS = ('revoke', 'deactivate')
+
+
+def enqueue(requested_systems, action=None):
+    """Queue provisioning jobs for decided systems. A system that already has the same job
+    waiting is skipped, so repeated decisions do not stack up duplicate work. A revoke or deactivate
+    supersedes any grant still pending (or backing off) for the same system, so a retried grant can
+    never undo it. Returns the number queued.
+    """
+    jobs = []
+    for requested_system in requested_systems:
+        job_action = action or provisioning_action(requested_system)
+        if job_action:
+            jobs.append(ProvisioningJob(
+                requested_system=requested_system, system=requested_system.system, action=job_action,
+                tsc_no=requested_system.access_request.tsc_no, request_ref=requested_system.access_request_id,
+            ))
+    if not jobs:
+        return 0
+    waiting = set(ProvisioningJob.objects.filter(
+        requested_system__in=[job.requested_system_id for job in jobs], status__in=['pending', 'running']
+    ).values_list('requested_system_id', 'action'))
+    jobs = [job for job in jobs if (job.requested_system_id, job.action) not in waiting]
+    supersede(
+        ProvisioningJob.objects.filter(
+            requested_system__in=[job.requested_system_id for job in jobs if job.action in REMOVAL_ACTIONS],
+            action='grant', status='pending',
+        ),
+        "Superseded by a later revocation",
+    )
+    ProvisioningJob.objects.bulk_create(jobs)
+    RequestedSystem.objects.filter(pk__in=[job.requested_system_id for job in jobs]).update(provisioning_status='queued')
+    return len(jobs)
+
+
+def supersede(jobs, reason):
+    """Close jobs that must no longer run."""
+    return jobs.update(status='superseded', last_error=reason, finished_at=timezone.now())
+
+
+# --- WORKER ---
+
+def claim_jobs(batch_size):
+    """Mark up to batch_size due jobs as running. The conditional UPDATE per job means two workers never run the same job.
+
+    Jobs for one RequestedSystem run one at a time and oldest first: a system that already has a job
+    running (or claimed earlier in this batch) is left for a later pass.
+    """
+    now = timezone.now()
+    stale = now - timedelta(minutes=PROVISIONING_STALE_MINUTES)
+    due = list(ProvisioningJob.objects.filter(
+        Q(status='pending', next_attempt_at__lte=now) | Q(status='running', started_at__lt=stale)
+    ).order_by('next_attempt_at', 'pk').values_list('pk', 'status', 'requested_system_id')[:batch_size])
+    busy = set(ProvisioningJob.objects.filter(
+        requested_system__in={row[2] for row in due}, status='running', started_at__gte=stale,
+    ).values_list('requested_system_id', flat=True))
+    claimed = []
+    for pk, status, requested_system_id in due:
+        if requested_system_id in busy:
+            continue
+        if ProvisioningJob.objects.filter(pk=pk, status=status).update(status='running', started_at=now, attempts=F('attempts') + 1):
+            claimed.append(pk)
+            busy.add(requested_system_id)
+    return list(ProvisioningJob.objects.filter(pk__in=claimed).select_related('requested_system__access_request'))
+
+
+def execute(job):
+    """Run one claimed job through its connector and write the outcome back to the job and the RequestedSystem.
+    Returns True on success, False on failure and None when the job no longer matches the decision.
+    """
+    # The decision may have changed since the job was queued (e.g. a grant retried after a revocation)
+    requested_system = RequestedSystem.objects.select_related('access_request').filter(pk=job.requested_system_id).first()
+    if requested_system is None:
+        supersede(ProvisioningJob.objects.filter(pk=job.pk), "Not run: the request has been archived")
+        return None
+    if provisioning_action(requested_system) != job.action:
+        supersede(ProvisioningJob.objects.filter(pk=job.pk), f"Not run: access is now {requested_system.sysadmin_status}")
+        return None
+    job.requested_system = requested_system
+    connector = get_connector(job.system)
+    try:
+        with connector.semaphore:
+            result = connector.run(job)
+    except Exception as exc:
+        retryable = getattr(exc, 'retryable', True) and job.attempts < PROVISIONING_MAX_ATTEMPTS
+        logger.warning("Provisioning job %s failed (attempt %s): %s", job.pk, job.attempts, exc)
+        if retryable:
+            ProvisioningJob.objects.filter(pk=job.pk).update(
+                status='pending', last_error=str(exc),
+                next_attempt_at=timezone.now() + timedelta(minutes=2 ** (job.attempts - 1)),
+            )
+        else:
+            ProvisioningJob.objects.filter(pk=job.pk).update(status='failed', last_error=str(exc), finished_at=timezone.now())
+            RequestedSystem.objects.filter(pk=job.requested_system_id).update(provisioning_status='failed')
+        return False
+    now = timezone.now()
+    ProvisioningJob.objects.filter(pk=job.pk).update(status='succeeded', result=str(result or ''), last_error=None, finished_at=now)
+    RequestedSystem.objects.filter(pk=job.requested_system_id).update(provisioning_status='done', provisioned_at=now)
+    return True
+
+
+def _execute_in_thread(job):
+    try:
+        return execute(job)
+    finally:
+        # Worker threads open their own DB connections; close them when the job is done
+        connections.close_all()
+
+
+def run_jobs(batch_size=100, workers=8):
+    """Claim a batch of due jobs and run them on a thread pool (I/O bound: connectors wait on remote systems).
+    Per-system limits come from each connector's semaphore. workers=1 runs inline. Returns (succeeded, failed).
+    """
+    jobs = claim_jobs(batch_size)
+    if not jobs:
+        return 0, 0
+    if workers <= 1:
+        results = [execute(job) for job in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_execute_in_thread, jobs))
+    return sum(1 for ok in results if ok is True), sum(1 for ok in results if ok is False)
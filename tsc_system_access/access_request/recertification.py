@@ -0,0 +1,196 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.timezone import localdate
+
+from .locks import acquire_lock, release_lock
+from .models import CustomUser, Directorate, RecertificationCampaign, RecertificationItem, RequestedSystem, UserRole
+from .notifications import queue_many
+from .revocation import BULK_REVOKE_INLINE_MAX, LOCK_SECONDS, add_targets, create_revocation, lock_name, start as start_revocation
+
+# Days HODs get to review a new campaign
+RECERTIFICATION_REVIEW_DAYS = getattr(settings, 'RECERTIFICATION_REVIEW_DAYS', 30)
+# Rows read, inserted or revoked per transaction; keeps every lock short whatever the population
+RECERTIFICATION_CHUNK_SIZE = getattr(settings, 'RECERTIFICATION_CHUNK_SIZE', 2000)
+EXPIRY_LOCK = 'recertification-expiry'
+
+
+def _reviewers():
+    """{directorate id: HOD user id}; the first HOD role wins if a directorate has several."""
+    reviewers = {}
+    for directorate_id, user_id in (
+        UserRole.objects.filter(role='hod', user__is_active=True).exclude(directorate=None)
+        .order_by('pk').values_list('directorate', 'user')
+    ):
+        reviewers.setdefault(directorate_id, user_id)
+    return reviewers
+
+
+def start_campaign(name, due_date=None, created_by=None, chunk_size=RECERTIFICATION_CHUNK_SIZE):
+    """Create a campaign covering every approved entitlement, notify the reviewers and open it."""
+    campaign = RecertificationCampaign.objects.create(
+        name=name, due_date=due_date or localdate() + timedelta(days=RECERTIFICATION_REVIEW_DAYS), created_by=created_by,
+    )
+    generate_items(campaign, chunk_size)
+    return campaign
+
+
+def generate_items(campaign, chunk_size=RECERTIFICATION_CHUNK_SIZE):
+    """Add one item per approved RequestedSystem, chunk by chunk in primary key order.
+
+    Each chunk is a keyset read and a bulk insert in its own short transaction, so
+    RequestedSystem is never locked while the whole population is walked. Picks up after the
+    last entitlement already in the campaign, so an interrupted run can simply be repeated.
+    A HOD's own entitlements get no reviewer and are left to the admins.
+    Returns the number of items added.
+    """
+    reviewers = _reviewers()
+    last_pk = (
+        campaign.items.exclude(requested_system=None).order_by('-requested_system')
+        .values_list('requested_system', flat=True).first() or 0
+    )
+    added = 0
+    while True:
+        rows = list(
+            RequestedSystem.objects.filter(sysadmin_status='approved', pk__gt=last_pk)
+            .exclude(access_request__request_type='deactivate')
+            .order_by('pk').values_list(
+                'pk', 'access_request__requester', 'directorate', 'access_request__directorate', 'system',
+                'access_request__tsc_no', 'access_request_id',
+            )
+            [:chunk_size]
+        )
+        if not rows:
+            break
+        items = []
+        for pk, holder, directorate, request_directorate, system, tsc_no, request_id in rows:
+            reviewer = reviewers.get(directorate or request_directorate)
+            items.append(RecertificationItem(
+                campaign=campaign, requested_system_id=pk, holder_id=holder, system=system,
+                directorate_id=directorate or request_directorate, tsc_no=tsc_no, request_ref=request_id,
+                reviewer_id=None if reviewer == holder else reviewer,
+            ))
+        with transaction.atomic():
+            RecertificationItem.objects.bulk_create(items, ignore_conflicts=True)
+        added += len(rows)
+        last_pk = rows[-1][0]
+
+    with transaction.atomic():
+        campaign.total_items = campaign.items.count()
+        campaign.status = 'open'
+        campaign.save(update_fields=['total_items', 'status'])
+        notify_reviewers(campaign)
+    return added
+
+
+def notify_reviewers(campaign):
+    """One email per HOD (or directorate mailbox when the directorate has no HOD) listing their item counts.
+    HODs' own entitlements (left without a reviewer by generate_items) are sent to the overall admins instead.
+    """
+    hod_emails = dict(Directorate.objects.values_list('pk', 'hod_email'))
+    held_by_hod = Q()
+    for directorate_id, hod_id in _reviewers().items():
+        held_by_hod |= Q(directorate=directorate_id, holder=hod_id)
+    own = campaign.items.filter(held_by_hod, reviewer=None) if held_by_hod else campaign.items.none()
+
+    counts = defaultdict(list)
+    for directorate_id, name, reviewer_email, total in (
+        campaign.items.exclude(pk__in=own.values('pk')).values_list('directorate', 'directorate__name', 'reviewer__email')
+        .annotate(total=Count('pk')).order_by('directorate__name')
+    ):
+        email = reviewer_email or hod_emails.get(directorate_id)
+        if email:
+            counts[email, False].append({'name': name or "No directorate", 'count': total})
+    own_counts = [
+        {'name': f"{name or 'No directorate'} (HOD's own access)", 'count': total}
+        for name, total in own.values_list('directorate__name').annotate(total=Count('pk')).order_by('directorate__name')
+    ]
+    if own_counts:
+        for email in (
+            CustomUser.objects.filter(Q(is_superuser=True) | Q(userrole__role='super_admin'), is_active=True)
+            .exclude(email=None).values_list('email', flat=True).distinct()
+        ):
+            counts[email, True] = own_counts
+    return queue_many('recertification_started', (
+        (f"recertification:{campaign.pk}:{'admin:' if for_admins else ''}{email}", {
+            'campaign_name': campaign.name, 'due_date': campaign.due_date, 'directorates': directorates,
+            'total': sum(d['count'] for d in directorates), 'for_admins': for_admins,
+        }, [email])
+        for (email, for_admins), directorates in counts.items()
+    ))
+
+
+def decide(items, decision, decided_by=None, comment='', chunk_size=RECERTIFICATION_CHUNK_SIZE, inline_max=BULK_REVOKE_INLINE_MAX):
+    """Certify or revoke the pending items among `items`, a chunk per transaction. Returns the number decided.
+
+    Each chunk locks only its own pending rows, so two reviewers (or a reviewer and the expiry job)
+    cannot both decide an item. Revoked entitlements are added to one bulk revocation in the same
+    transaction, which is then run (or queued, past inline_max) through revocation.py.
+    Nobody decides their own entitlements: items held by decided_by are left pending.
+    """
+    items = items.filter(decision='pending')
+    if decided_by is not None:
+        items = items.exclude(holder=decided_by)
+    pks = list(items.order_by('pk').values_list('pk', flat=True))
+    if not pks:
+        return 0
+    revocation = None
+    if decision == 'revoked':
+        # The lease, committed with the revocation, keeps the bulk revocation worker off it until every chunk is added
+        with transaction.atomic():
+            revocation = create_revocation(comment or "Revoked at access recertification", decided_by, 'recertification')
+            acquire_lock(lock_name(revocation), LOCK_SECONDS)
+    decided = 0
+    try:
+        for start in range(0, len(pks), chunk_size):
+            with transaction.atomic():
+                locked = list(
+                    RecertificationItem.objects.select_for_update().filter(pk__in=pks[start:start + chunk_size], decision='pending')
+                    .values_list('pk', 'requested_system')
+                )
+                if not locked:
+                    continue
+                RecertificationItem.objects.filter(pk__in=[pk for pk, _ in locked]).update(
+                    decision=decision, decided_by=decided_by, decided_at=timezone.now(), comment=comment[:255],
+                )
+                if revocation:
+                    # An archived entitlement (link cleared) has nothing left to revoke
+                    add_targets(revocation, [system_id for _, system_id in locked if system_id])
+                    acquire_lock(lock_name(revocation), LOCK_SECONDS)
+            decided += len(locked)
+    finally:
+        if revocation:
+            release_lock(lock_name(revocation))
+    if revocation:
+        start_revocation(revocation, inline_max)
+    return decided
+
+
+def expire_campaigns(today=None, chunk_size=RECERTIFICATION_CHUNK_SIZE):
+    """Revoke whatever is still pending in open campaigns past their due date, then close them.
+    Returns {campaign id: items revoked}, or None if another node is already running it.
+    """
+    if not acquire_lock(EXPIRY_LOCK, ttl_seconds=3600):
+        return None
+    try:
+        results = {}
+        for campaign in RecertificationCampaign.objects.filter(status='open', due_date__lt=today or localdate()):
+            results[campaign.pk] = decide(
+                campaign.items.all(), 'revoked', comment=f"Not recertified by {campaign.due_date} ({campaign.name})",
+                chunk_size=chunk_size, inline_max=None,
+            )
+            campaign.status, campaign.closed_at = 'closed', timezone.now()
+            campaign.save(update_fields=['status', 'closed_at'])
+        return results
+    finally:
+        release_lock(EXPIRY_LOCK)
+
+
+def progress(items):
+    """{decision: count} for a set of items, in one grouped query."""
+    counts = dict(items.order_by().values_list('decision').annotate(total=Count('pk')))
+    return {code: counts.get(code, 0) for code, _ in RecertificationItem.DECISION_CHOICES}
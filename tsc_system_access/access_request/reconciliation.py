@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+from collections import Counter
+
+from .models import RequestedSystem
+
+SYSTEM_LABELS = dict(RequestedSystem.SYSTEM_CHOICES)
+
+# Account status values (lowercased) that mean the account cannot be used
+DISABLED_VALUES = {'disabled', 'inactive', 'locked', 'suspended', 'false', '0', 'no'}
+
+REPORT_HEADER = ["System", "TSC No", "Issue", "Detail"]
+ISSUE_LABELS = {
+    'orphan': "Orphan account",
+    'missing': "Missing grant",
+    'unrevoked': "Unrevoked access",
+}
+
+
+def resolve_system(value):
+    """Accept a system code ('4') or its label ('Email')."""
+    if value in SYSTEM_LABELS:
+        return value
+    codes = {label.lower(): code for code, label in SYSTEM_LABELS.items()}
+    return codes.get((value or '').strip().lower())
+
+
+# --- EXPORT READERS (streaming) ---
+
+def _text(fh):
+    if isinstance(fh.read(0), bytes):
+        return io.TextIOWrapper(getattr(fh, 'file', fh), encoding='utf-8-sig', newline='')
+    return fh
+
+
+def read_csv_export(fh):
+    yield from csv.DictReader(_text(fh))
+
+
+def read_json_export(fh, chunk_size=1 << 16):
+    """Yield objects from JSON Lines, or from a top-level JSON array without loading the whole file."""
+    fh = _text(fh)
+    decoder = json.JSONDecoder()
+    buffer, in_array, mode = '', False, None
+    for chunk in iter(lambda: fh.read(chunk_size), ''):
+        buffer += chunk
+        while True:
+            buffer = buffer.lstrip(', \t\r\n') if in_array else buffer.lstrip()
+            if not buffer:
+                break
+            if mode is None:
+                mode = 'array' if buffer[0] == '[' else 'lines'
+                if mode == 'array':
+                    buffer, in_array = buffer[1:], True
+                    continue
+            if in_array and buffer[0] == ']':
+                return
+            try:
+                obj, end = decoder.raw_decode(buffer)
+            except ValueError:
+                break  # object continues in the next chunk
+            yield obj
+            buffer = buffer[end:]
+    if buffer.strip() and buffer.strip() != ']':
+        raise ValueError("Export ends with an incomplete JSON value")
+
+
+def read_export(fh, name):
+    return read_json_export(fh) if name.lower().endswith(('.json', '.jsonl', '.ndjson')) else read_csv_export(fh)
+
+
+# --- RECONCILIATION ---
+
+def entitlement_state(system):
+    """{tsc_no (lowercased): ('approved' | 'revoked', tsc_no)} for one system, from each person's latest system admin decision.
+    An approved deactivation request removes access, so it counts as 'revoked'.
+
+    This is the build side of the hash join: one row per person who was ever granted the
+    system, so it stays small however large the target-system export is.
+    """
+    state = {}
+    rows = RequestedSystem.objects.filter(system=system, sysadmin_status__in=['approved', 'revoked']).order_by(
+        'sysadmin_decision_date', 'pk'
+    ).values_list('access_request__tsc_no', 'sysadmin_status', 'access_request__request_type')
+    for tsc_no, status, request_type in rows.iterator(chunk_size=5000):
+        if request_type == 'deactivate':
+            status = 'revoked'
+        state[tsc_no.strip().lower()] = (status, tsc_no)
+    return state
+
+
+def reconcile(system, accounts, report, key_column='tsc_no', status_column='status'):
+    """Stream target-system accounts against approved/revoked state and write a CSV discrepancy report.
+
+    - orphan: an enabled account with no approved grant in this app
+    - unrevoked: access was revoked here but the account is still enabled
+    - missing: approved here but no account in the export, or the account is disabled
+
+    Memory is bounded by the number of entitlements, not by the size of the export.
+    report is a writable text stream. Returns a Counter of issues (plus 'accounts' read).
+    """
+    state = entitlement_state(system)
+    label = SYSTEM_LABELS.get(system, system)
+    writer = csv.writer(report)
+    writer.writerow(REPORT_HEADER)
+    counts = Counter()
+    matched = set()
+
+    for account in accounts:
+        key = str(account.get(key_column) or '').strip().lower()
+        if not key:
+            continue
+        counts['accounts'] += 1
+        enabled = str(account.get(status_column) or '').strip().lower() not in DISABLED_VALUES
+        expected = state.get(key, (None,))[0]
+        if expected == 'approved':
+            matched.add(key)
+            if not enabled:
+                counts['missing'] += 1
+                writer.writerow([label, account.get(key_column), ISSUE_LABELS['missing'], "Account disabled in the target system"])
+            continue
+        if not enabled:
+            continue
+        issue = 'unrevoked' if expected == 'revoked' else 'orphan'
+        counts[issue] += 1
+        writer.writerow([label, account.get(key_column), ISSUE_LABELS[issue], account.get(status_column) or ''])
+
+    for key, (status, tsc_no) in state.items():
+        if status == 'approved' and key not in matched:
+            counts['missing'] += 1
+            writer.writerow([label, tsc_no, ISSUE_LABELS['missing'], "No account in the target system"])
+    return counts
@@ -0,0 +1,130 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import AccessRequest, DailyRequestFact, RequestedSystem
+
+# Stage -> (RequestedSystem date column, outcome column). Submissions are counted from AccessRequest.submitted_at.
+STAGE_EVENTS = {
+    'hod': ('hod_decision_date', 'hod_status'),
+    'ict': ('ict_decision_date', 'ict_status'),
+    'sys_admin': ('sysadmin_decision_date', 'sysadmin_status'),
+}
+
+# Trend metric -> (stage, outcome); None matches any value
+TREND_METRICS = {
+    'submitted': ('submitted', None),
+    'decisions': (None, None),
+    'granted': ('sys_admin', 'approved'),
+    'rejected': (None, 'rejected'),
+    'revoked': (None, 'revoked'),
+}
+
+
+def _bounds(first_day, last_day):
+    start = timezone.make_aware(datetime.combine(first_day, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), datetime.min.time()))
+    return start, end
+
+
+def collect_facts(first_day, last_day):
+    """{(day, directorate_id, system, stage, outcome): count} for the range, from four grouped queries
+    (one per stage), each an indexed date-range read.
+    """
+    start, end = _bounds(first_day, last_day)
+    facts = {}
+    submissions = RequestedSystem.objects.filter(
+        access_request__submitted_at__gte=start, access_request__submitted_at__lt=end
+    ).values_list(TruncDate('access_request__submitted_at'), 'access_request__directorate', 'system').annotate(n=Count('id')).order_by()
+    for day, directorate, system, n in submissions:
+        facts[(day, directorate, system, 'submitted', 'submitted')] = n
+
+    for stage, (date_field, outcome_field) in STAGE_EVENTS.items():
+        decisions = RequestedSystem.objects.filter(**{
+            f'{date_field}__gte': start, f'{date_field}__lt': end,
+        }).exclude(**{outcome_field: 'pending'}).values_list(
+            TruncDate(date_field), 'access_request__directorate', 'system', outcome_field,
+        ).annotate(n=Count('id')).order_by()
+        for day, directorate, system, outcome, n in decisions:
+            facts[(day, directorate, system, stage, outcome)] = n
+    return facts
+
+
+def build_facts(first_day, last_day, replace=True):
+    """Write the facts for first_day..last_day (inclusive). Safe to re-run.
+
+    replace=True rebuilds every day in the range from the request tables. replace=False
+    (backfill) only fills days that have no facts yet, so history that was built before
+    requests were archived is never overwritten. Returns the number of rows written.
+    """
+    facts = collect_facts(first_day, last_day)
+    with transaction.atomic():
+        existing = DailyRequestFact.objects.filter(day__gte=first_day, day__lte=last_day)
+        if replace:
+            existing.delete()
+        else:
+            done = set(existing.values_list('day', flat=True).distinct())
+            facts = {key: n for key, n in facts.items() if key[0] not in done}
+        DailyRequestFact.objects.bulk_create([
+            DailyRequestFact(day=day, directorate_id=directorate, system=system, stage=stage, outcome=outcome, count=n)
+            for (day, directorate, system, stage, outcome), n in facts.items()
+        ], batch_size=1000)
+    return len(facts)
+
+
+def backfill_facts(until=None):
+    """Fill every day from the oldest request up to `until` (default yesterday) that has no facts yet."""
+    until = until or timezone.localdate() - timedelta(days=1)
+    oldest = AccessRequest.objects.aggregate(oldest=Min('submitted_at'))['oldest']
+    if oldest is None or timezone.localtime(oldest).date() > until:
+        return 0
+    return build_facts(timezone.localtime(oldest).date(), until, replace=False)
+
+
+# --- READING ---
+
+def _first_month(today, months):
+    year, month = divmod(today.year * 12 + today.month - 1 - (months - 1), 12)
+    return date(year, month + 1, 1)
+
+
+def monthly_trends(months=24, today=None):
+    """Month-by-month totals for TREND_METRICS over the last `months` months, oldest first.
+    Reads at most months x stages x outcomes grouped rows from the fact table.
+    """
+    first = _first_month(today or timezone.localdate(), months)
+    rows = DailyRequestFact.objects.filter(day__gte=first).values_list(
+        TruncMonth('day'), 'stage', 'outcome'
+    ).annotate(total=Sum('count')).order_by()
+
+    series = defaultdict(lambda: dict.fromkeys(TREND_METRICS, 0))
+    for month, stage, outcome, total in rows:
+        for metric, (metric_stage, metric_outcome) in TREND_METRICS.items():
+            if metric == 'decisions' and stage == 'submitted':
+                continue
+            if metric_stage in (None, stage) and metric_outcome in (None, outcome):
+                series[month][metric] += total
+    return [{'month': month, **series[month]} for month in sorted(series)]
+
+
+def directorate_trends(months=24, today=None):
+    """Monthly submitted/granted/rejected/revoked per directorate, for the Excel export."""
+    first = _first_month(today or timezone.localdate(), months)
+    rows = DailyRequestFact.objects.filter(day__gte=first).values_list(
+        TruncMonth('day'), 'directorate__name', 'stage', 'outcome'
+    ).annotate(total=Sum('count')).order_by()
+
+    table = defaultdict(lambda: dict.fromkeys(('submitted', 'granted', 'rejected', 'revoked'), 0))
+    for month, directorate, stage, outcome, total in rows:
+        row = table[(month, directorate or "Unassigned")]
+        if stage == 'submitted':
+            row['submitted'] += total
+        elif stage == 'sys_admin' and outcome == 'approved':
+            row['granted'] += total
+        elif outcome in ('rejected', 'revoked'):
+            row[outcome] += total
+    return [{'month': month, 'directorate': name, **table[(month, name)]} for month, name in sorted(table)]
@@ -0,0 +1,203 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .assignment import serving_slots
+from .locks import acquire_lock, release_lock
+from .models import AccessRequest, BulkRevocation, BulkRevocationItem, RequestedSystem, UserRole
+from .notifications import SYSTEM_LABELS, queue_many
+from .provisioning import enqueue as enqueue_provisioning
+
+# Entitlements revoked per transaction. A holder's items are never split across chunks.
+BULK_REVOKE_CHUNK_SIZE = getattr(settings, 'BULK_REVOKE_CHUNK_SIZE', 500)
+# Revocations up to this size run straight away (e.g. in the admin request); larger ones are
+# left queued for run_bulk_revocations
+BULK_REVOKE_INLINE_MAX = getattr(settings, 'BULK_REVOKE_INLINE_MAX', 1000)
+LOCK_SECONDS = 600
+
+
+def create_revocation(reason, requested_by=None, source='admin', requested_systems=()):
+    """Record a revocation and its targets (see add_targets). Nothing is revoked until run_revocation."""
+    revocation = BulkRevocation.objects.create(reason=reason[:255], requested_by=requested_by, source=source)
+    add_targets(revocation, requested_systems)
+    return revocation
+
+
+def add_targets(revocation, requested_systems):
+    """Add the still-approved entitlements among `requested_systems` (a queryset or ids) to a queued revocation.
+    Approved deactivation requests are not access and are left out. Returns the number added.
+    """
+    if isinstance(requested_systems, QuerySet):
+        batches = [RequestedSystem.objects.filter(pk__in=requested_systems.values('pk'))]
+    else:
+        ids = sorted(set(requested_systems))
+        batches = [RequestedSystem.objects.filter(pk__in=ids[i:i + BULK_REVOKE_CHUNK_SIZE]) for i in range(0, len(ids), BULK_REVOKE_CHUNK_SIZE)]
+    added = 0
+    for batch in batches:
+        items = [
+            BulkRevocationItem(
+                revocation=revocation, requested_system_id=pk, holder_id=holder, system=system, tsc_no=tsc_no, request_ref=request_id,
+            )
+            for pk, holder, system, tsc_no, request_id in batch.filter(sysadmin_status='approved').exclude(
+                access_request__request_type='deactivate'
+            ).values_list(
+                'pk', 'access_request__requester', 'system', 'access_request__tsc_no', 'access_request_id',
+            )
+        ]
+        BulkRevocationItem.objects.bulk_create(items, batch_size=1000)
+        added += len(items)
+    if added:
+        revocation.total += added
+        revocation.save(update_fields=['total'])
+    return added
+
+
+def revoke(requested_systems, reason, requested_by=None, source='admin', inline_max=BULK_REVOKE_INLINE_MAX):
+    """Create a revocation and run it now if it is small enough (inline_max=None: always). Returns it."""
+    with transaction.atomic():
+        revocation = create_revocation(reason, requested_by, source, requested_systems)
+    return start(revocation, inline_max)
+
+
+def start(revocation, inline_max=BULK_REVOKE_INLINE_MAX):
+    """Run a freshly created revocation when it has at most inline_max items; otherwise leave it queued."""
+    if inline_max is None or revocation.total <= inline_max:
+        run_revocation(revocation)
+        revocation.refresh_from_db()
+    return revocation
+
+
+def lock_name(revocation):
+    """Lease held while a revocation is being filled or run (see locks.py)."""
+    return f"bulk-revocation:{revocation.pk}"
+
+
+def _next_chunk(revocation_id, chunk_size):
+    """Lock the next pending items, ordered by holder, plus the rest of the last holder's items."""
+    pending = BulkRevocationItem.objects.select_for_update().filter(revocation=revocation_id, status='pending')
+    items = list(pending.order_by('holder', 'pk')[:chunk_size])
+    if len(items) == chunk_size:
+        items += list(pending.filter(holder=items[-1].holder_id, pk__gt=items[-1].pk).order_by('pk'))
+    return items
+
+
+@transaction.atomic
+def process_chunk(revocation_id, chunk_size=BULK_REVOKE_CHUNK_SIZE):
+    """Revoke one chunk: the entitlements, their de-provisioning jobs, the item audit rows, one status
+    recompute per affected request and one email per holder, all committed together. Returns the
+    number of items processed (0 when nothing is left).
+    """
+    from .views import sync_request_status
+
+    revocation = BulkRevocation.objects.select_for_update().get(pk=revocation_id)
+    items = _next_chunk(revocation_id, chunk_size)
+    if not items:
+        return 0
+    now = timezone.now()
+    # Anything revoked or changed since the revocation was queued is skipped, not revoked twice
+    approved = dict(
+        RequestedSystem.objects.select_for_update()
+        .filter(pk__in=[item.requested_system_id for item in items], sysadmin_status='approved')
+        .values_list('pk', 'access_request_id')
+    )
+    RequestedSystem.objects.filter(pk__in=list(approved)).update(
+        sysadmin_status='revoked', sysadmin_decision_date=now, sysadmin_comment=revocation.reason,
+    )
+    for status, pks in (
+        ('revoked', [item.pk for item in items if item.requested_system_id in approved]),
+        ('skipped', [item.pk for item in items if item.requested_system_id not in approved]),
+    ):
+        if pks:
+            BulkRevocationItem.objects.filter(pk__in=pks).update(status=status, processed_at=now)
+    revoked = list(RequestedSystem.objects.filter(pk__in=list(approved)).select_related('access_request__requester'))
+    enqueue_provisioning(revoked, action='revoke')
+    for request_obj in AccessRequest.objects.filter(pk__in=set(approved.values())):
+        sync_request_status(request_obj)
+
+    by_holder = defaultdict(list)
+    counts = Counter()
+    for system in revoked:
+        by_holder[system.access_request.requester_id].append(system)
+        counts[system.system] += 1
+    queue_many('access_revoked', (
+        (f"revocation:{revocation.pk}:{holder}:{held[0].pk}", {
+            'requester_name': held[0].access_request.requester.full_name,
+            'systems': [SYSTEM_LABELS.get(s.system, s.system) for s in held],
+            'reason': revocation.reason,
+        }, [held[0].access_request.email])
+        for holder, held in by_holder.items()
+    ))
+
+    revocation.processed += len(items)
+    revocation.revoked += len(approved)
+    revocation.summary = {code: revocation.summary.get(code, 0) + counts.get(code, 0) for code in {*revocation.summary, *counts}}
+    revocation.save(update_fields=['processed', 'revoked', 'summary'])
+    return len(items)
+
+
+def _sysadmin_emails():
+    """{system code: admin emails}: active assignments plus the legacy UserRole.system_assigned."""
+    emails = defaultdict(set)
+    for system, email in serving_slots().values_list('system', 'admin__email'):
+        emails[system].add(email)
+    for system, email in UserRole.objects.filter(role='sys_admin', user__is_active=True, system_assigned__gt='').values_list('system_assigned', 'user__email'):
+        emails[system].add(email)
+    return emails
+
+
+@transaction.atomic
+def finish(revocation):
+    """Close the revocation and send each system admin one email covering all of their systems."""
+    revocation = BulkRevocation.objects.select_for_update().get(pk=revocation.pk)
+    if revocation.status == 'done':
+        return revocation
+    revocation.status, revocation.finished_at = 'done', timezone.now()
+    revocation.save(update_fields=['status', 'finished_at'])
+
+    by_admin = defaultdict(list)
+    for system, emails in _sysadmin_emails().items():
+        if revocation.summary.get(system):
+            for email in filter(None, emails):
+                by_admin[email].append({'name': SYSTEM_LABELS.get(system, system), 'count': revocation.summary[system]})
+    queue_many('access_revoked_sysadmin', (
+        (f"revocation:{revocation.pk}:sysadmin:{email}", {
+            'reason': revocation.reason, 'systems': systems,
+            'requested_by': revocation.requested_by.full_name if revocation.requested_by else "Automatic",
+        }, [email])
+        for email, systems in by_admin.items()
+    ))
+    return revocation
+
+
+def run_revocation(revocation, chunk_size=BULK_REVOKE_CHUNK_SIZE, progress=None):
+    """Process a revocation chunk by chunk until nothing is pending, then close it.
+
+    Each chunk is its own transaction, so locks are short and an interrupted run resumes where it
+    stopped. A lease per revocation keeps two workers off the same one. progress(revocation) is
+    called after each chunk. Returns False if another worker holds it.
+    """
+    lock = lock_name(revocation)
+    if not acquire_lock(lock, LOCK_SECONDS):
+        return False
+    try:
+        BulkRevocation.objects.filter(pk=revocation.pk, started_at=None).update(started_at=timezone.now())
+        BulkRevocation.objects.filter(pk=revocation.pk, status='queued').update(status='running')
+        while process_chunk(revocation.pk, chunk_size):
+            acquire_lock(lock, LOCK_SECONDS)  # renew
+            if progress:
+                progress(BulkRevocation.objects.get(pk=revocation.pk))
+        finish(revocation)
+        return True
+    finally:
+        release_lock(lock)
+
+
+def run_queued(chunk_size=BULK_REVOKE_CHUNK_SIZE, progress=None):
+    """Run every queued (or interrupted) revocation, oldest first. Returns the number completed."""
+    completed = 0
+    for revocation in BulkRevocation.objects.exclude(status='done').order_by('created_at', 'pk'):
+        completed += bool(run_revocation(revocation, chunk_size, progress))
+    return completed
@@ -0,0 +1,109 @@
+import re
+import unicodedata
+
+from django.db.models import Case, Count, IntegerField, OuterRef, Q, Subquery, Value, When
+
+from .models import CustomUser, UserSearchToken
+
+# Extra words beyond this are ignored so a pasted paragraph cannot produce a huge OR query
+MAX_QUERY_WORDS = 5
+
+IP_PATTERN = re.compile(r'^[0-9a-fA-F.:]+$')
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse everything that is not a letter/digit to single spaces."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^0-9a-z]+', ' ', text.lower()).strip()
+
+
+def tokenize(text):
+    return sorted({word[:64] for word in normalize(text).split()})
+
+
+def is_tsc_term(term):
+    """A single word containing a digit is treated as a TSC number (exact/prefix fast path)."""
+    term = (term or '').strip()
+    return bool(term) and ' ' not in term and any(c.isdigit() for c in term)
+
+
+def is_ip_term(term):
+    term = (term or '').strip()
+    return bool(IP_PATTERN.match(term)) and ('.' in term or ':' in term)
+
+
+# --- INDEX MAINTENANCE ---
+
+def index_user(user):
+    """Bring one user's name tokens up to date. No writes when the name has not changed."""
+    tokens = set(tokenize(user.full_name))
+    existing = set(UserSearchToken.objects.filter(user=user).values_list('token', flat=True))
+    if tokens == existing:
+        return
+    if existing - tokens:
+        UserSearchToken.objects.filter(user=user, token__in=existing - tokens).delete()
+    UserSearchToken.objects.bulk_create([UserSearchToken(user=user, token=t) for t in tokens - existing])
+
+
+def index_users(users, batch_size=1000):
+    """Replace the tokens of many users in a handful of statements (bulk import, rebuild command)."""
+    users = list(users)
+    if not users:
+        return 0
+    UserSearchToken.objects.filter(user_id__in=[u.pk for u in users]).delete()
+    rows = [UserSearchToken(user_id=u.pk, token=t) for u in users for t in tokenize(u.full_name)]
+    UserSearchToken.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+# --- QUERIES ---
+
+def name_matches(term):
+    """Token rows grouped per user with the number of name words that prefix-match the term, or None for an empty term."""
+    words = tokenize(term)[:MAX_QUERY_WORDS]
+    if not words:
+        return None
+    condition = Q()
+    for word in words:
+        condition |= Q(token__istartswith=word)
+    return UserSearchToken.objects.filter(condition).values('user').annotate(hits=Count('token'))
+
+
+def filter_by_search(queryset, term, tsc_field='tsc_no', user_field='requester'):
+    """Apply a dashboard/admin search to any queryset that reaches a TSC number and a user.
+
+    - TSC-like terms use an index range scan: tsc_field istartswith term (covers exact matches).
+    - Anything else is a name search through the UserSearchToken index in which every word must
+      prefix-match one of the user's names (ranking by partial matches is left to search_users).
+      Each word is its own indexed lookup, so one word matching two names cannot stand in for another.
+    """
+    term = (term or '').strip()
+    if not term:
+        return queryset
+    if is_tsc_term(term):
+        return queryset.filter(**{f'{tsc_field}__istartswith': term})
+    words = tokenize(term)[:MAX_QUERY_WORDS]
+    if not words:
+        return queryset.none()
+    for word in words:
+        queryset = queryset.filter(**{f'{user_field}__in': UserSearchToken.objects.filter(token__istartswith=word).values('user')})
+    return queryset
+
+
+def search_users(term, queryset=None):
+    """Ranked user search: exact TSC match, then TSC prefix; names ordered by how many words matched."""
+    queryset = CustomUser.objects.all() if queryset is None else queryset
+    term = (term or '').strip()
+    if not term:
+        return queryset
+    if is_tsc_term(term):
+        return queryset.filter(tsc_no__istartswith=term).annotate(
+            rank=Case(When(tsc_no__iexact=term, then=Value(2)), default=Value(1), output_field=IntegerField())
+        ).order_by('-rank', 'tsc_no')
+    matches = name_matches(term)
+    if matches is None:
+        return queryset.none()
+    return queryset.filter(pk__in=matches.values('user')).annotate(
+        rank=Subquery(matches.filter(user=OuterRef('pk')).values('hits')[:1], output_field=IntegerField())
+    ).order_by('-rank', 'full_name')
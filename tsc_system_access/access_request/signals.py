@@ -1,8 +1,13 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.db import transaction
 from django.dispatch import receiver
 from .models import CustomUser, UserRole, Directorate
-from .models import UserProfile, AccessLog
-from django.contrib.auth.signals import user_logged_in
+from .models import UserProfile, HodDelegation, SystemAdminAssignment
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from .access_log import log_access
+from .search import index_user
+from .delegation import invalidate_delegations
+from .assignment import rebalance
 
 @receiver(post_save, sender=CustomUser)
 def create_user_role(sender, instance, created, **kwargs):
@@ -14,39 +19,99 @@ def create_user_role(sender, instance, created, **kwargs):
         UserRole.objects.get_or_create(user=instance, defaults={'role': 'staff'})
 
 
+@receiver(post_save, sender=CustomUser)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """Keep the name search tokens in sync. Saves that cannot change the name (e.g. last_login) are skipped."""
+    if update_fields is not None and 'full_name' not in update_fields:
+        return
+    index_user(instance)
+
+
+@receiver(pre_save, sender=UserRole)
+def remember_previous_role(sender, instance, **kwargs):
+    """Keep the stored role and system so the post_save handler can see what changed."""
+    instance._previous_role = UserRole.objects.filter(pk=instance.pk).values_list('role', 'system_assigned').first() if instance.pk else None
+
+
+def _retire_assignments(assignments):
+    # save() per row so each system's queue is rebalanced (rebalance_system_queue)
+    for slot in assignments.filter(is_active=True):
+        slot.is_active = False
+        slot.save(update_fields=['is_active'])
+
+
+@receiver(post_save, sender=CustomUser)
+def retire_inactive_admin(sender, instance, update_fields=None, **kwargs):
+    """A deactivated account leaves every system queue, so its open items are handed to colleagues.
+    Reactivating it does not rejoin them; that is a new appointment."""
+    if instance.is_active or (update_fields is not None and 'is_active' not in update_fields):
+        return
+    _retire_assignments(SystemAdminAssignment.objects.filter(admin=instance))
+
+
 @receiver(post_save, sender=UserRole)
 def create_or_update_system_admin(sender, instance, created, **kwargs):
     """
-    System Admin role is now handled entirely through UserRole model.
-    No separate SystemAdmin table needed.
+    The system picked on a System Admin's UserRole joins them to that system's queue.
+    Further systems are added under System Admin Assignments (see assignment.py).
+    Leaving the role retires all of the user's assignments; changing the system retires the old one.
     """
-    pass
+    previous_role, previous_system = getattr(instance, '_previous_role', None) or (None, None)
+    assignments = SystemAdminAssignment.objects.filter(admin=instance.user)
+    if instance.role != 'sys_admin':
+        _retire_assignments(assignments)
+        return
+    if previous_role == 'sys_admin' and previous_system and previous_system != instance.system_assigned:
+        _retire_assignments(assignments.filter(system=previous_system))
+    if instance.system_assigned:
+        slot, created = SystemAdminAssignment.objects.get_or_create(admin=instance.user, system=instance.system_assigned)
+        # Re-activate on a new appointment only; an admin marked away stays away on unrelated saves
+        if not created and not slot.is_active and (previous_role, previous_system) != ('sys_admin', instance.system_assigned):
+            slot.is_active = True
+            slot.save(update_fields=['is_active'])
+
+
+@receiver(post_save, sender=SystemAdminAssignment)
+@receiver(post_delete, sender=SystemAdminAssignment)
+def rebalance_system_queue(sender, instance, **kwargs):
+    """An admin joined, left or was (de)activated: spread the system's queue over the current admins."""
+    transaction.on_commit(lambda: rebalance(instance.system))
 
 
 @receiver(post_save, sender=UserRole)
 def sync_hod_to_directorate(sender, instance, created, **kwargs):
     """If a user is set to role 'hod', automatically assign them as HOD for their own directorate.
     This mirrors prior behavior where ICT (or any) department HOD is inferred from role + department.
+    One conditional UPDATE: no query at all for other roles, and no write when the email is already set.
     """
     if instance.role == 'hod':
         user = instance.user
-        if user and getattr(user, 'directorate', None) and user.directorate_id:
-            try:
-                dir_obj = Directorate.objects.get(pk=user.directorate_id)
-                # set official HOD email to the user's email
-                if user.email and dir_obj.hod_email != user.email:
-                    dir_obj.hod_email = user.email
-                    dir_obj.save(update_fields=['hod_email'])
-            except Directorate.DoesNotExist:
-                pass
+        if user and user.directorate_id and user.email:
+            Directorate.objects.filter(pk=user.directorate_id).exclude(hod_email=user.email).update(hod_email=user.email)
+
+@receiver(post_save, sender=HodDelegation)
+@receiver(post_delete, sender=HodDelegation)
+def clear_delegation_index(sender, **kwargs):
+    """Delegations are read from a cached index (delegation.py); drop it so the change applies at once,
+    and again after commit in case another request rebuilt it from the old rows in the meantime."""
+    invalidate_delegations()
+    transaction.on_commit(invalidate_delegations)
+
+
+@receiver(post_save, sender=UserRole)
+def clear_delegation_index_for_hod(sender, instance, **kwargs):
+    """A HOD's delegations lapse with the HOD role; rebuild the index when it is given or taken away."""
+    if 'hod' in (instance.role, (getattr(instance, '_previous_role', None) or (None,))[0]):
+        clear_delegation_index(sender)
+
 
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
-    # Get IP Address
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    
-    AccessLog.objects.create(user=user, action="Login", ip_address=ip)
\ No newline at end of file
+    # Buffered: written in bulk at the end of a request (see access_log.py)
+    log_access(request, "Login", user=user)
+
+
+@receiver(user_logged_out)
+def log_user_logout(sender, request, user, **kwargs):
+    if request is not None:
+        log_access(request, "Logout", user=user)
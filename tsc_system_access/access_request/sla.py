@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AccessRequest, CalendarDay, DirectorateSLA, RequestedSystem
+
+# Business days per stage for directorates without a DirectorateSLA row
+SLA_BUSINESS_DAYS = getattr(settings, 'SLA_BUSINESS_DAYS', {'hod': 3, 'ict': 3, 'sys_admin': 3})
+# Fixed-date public holidays (MM-DD) applied when the calendar is built; movable ones are marked in the admin
+SLA_PUBLIC_HOLIDAYS = getattr(settings, 'SLA_PUBLIC_HOLIDAYS', {
+    '01-01': "New Year's Day", '05-01': "Labour Day", '06-01': "Madaraka Day", '10-10': "Huduma Day",
+    '10-20': "Mashujaa Day", '12-12': "Jamhuri Day", '12-25': "Christmas Day", '12-26': "Boxing Day",
+})
+SLA_RECOMPUTE_BATCH_SIZE = 1000
+DEADLINE_FIELDS = ['open_stage', 'due_at', 'escalation_level', 'escalate_at', 'assigned_to']
+
+# Systems still waiting on someone (the stage rules in open_stage below, as a query)
+OPEN_SYSTEMS = (
+    Q(hod_status='pending')
+    | Q(hod_status='approved', ict_status='pending')
+    | Q(ict_status__in=['approved', 'sent_admin'], sysadmin_status='pending')
+)
+
+
+# --- CALENDAR ---
+
+def build_calendar(first_day, last_day):
+    """Create CalendarDay rows for the range (weekends and SLA_PUBLIC_HOLIDAYS closed), then renumber.
+    Days already in the table keep their business/holiday flag, so holidays marked by hand survive a rebuild.
+    """
+    existing = set(CalendarDay.objects.filter(day__gte=first_day, day__lte=last_day).values_list('day', flat=True))
+    new_days = []
+    day = first_day
+    while day <= last_day:
+        if day not in existing:
+            holiday = SLA_PUBLIC_HOLIDAYS.get(day.strftime('%m-%d'), '')
+            new_days.append(CalendarDay(day=day, is_business_day=day.weekday() < 5 and not holiday, name=holiday))
+        day += timedelta(days=1)
+    CalendarDay.objects.bulk_create(new_days, batch_size=1000)
+    renumber_calendar()
+    return len(new_days)
+
+
+def renumber_calendar():
+    """Recompute business_day_index across the whole table (a few thousand rows)."""
+    days = list(CalendarDay.objects.order_by('day'))
+    index = 0
+    for calendar_day in days:
+        if calendar_day.is_business_day:
+            index += 1
+        calendar_day.business_day_index = index
+    CalendarDay.objects.bulk_update(days, ['business_day_index'], batch_size=1000)
+
+
+class BusinessCalendar:
+    """Business-day arithmetic over a slice of the CalendarDay table, loaded in one query.
+    Dates the table does not cover fall back to Monday-Friday.
+    """
+
+    def __init__(self, first_day, last_day):
+        rows = CalendarDay.objects.filter(day__gte=first_day, day__lte=last_day).values_list('day', 'is_business_day', 'business_day_index')
+        self.index = {}
+        self.business_days = {}
+        for day, is_business_day, index in rows:
+            self.index[day] = index
+            if is_business_day:
+                self.business_days[index] = day
+
+    def add_business_days(self, day, days):
+        target = self.business_days.get(self.index[day] + days) if day in self.index else None
+        if target:
+            return target
+        while days > 0:
+            day += timedelta(days=1)
+            if day.weekday() < 5:
+                days -= 1
+        return day
+
+    def deadline(self, started_at, days):
+        """Same time of day, `days` business days after started_at (local time)."""
+        started_at = timezone.localtime(started_at)
+        due_day = self.add_business_days(started_at.date(), days)
+        return timezone.make_aware(datetime.combine(due_day, started_at.time().replace(tzinfo=None)))
+
+    @classmethod
+    def around(cls, started, longest_sla):
+        """Calendar covering every deadline that can start at one of `started` (datetimes)."""
+        days = [timezone.localtime(s).date() for s in started if s]
+        if not days:
+            return cls(timezone.localdate(), timezone.localdate())
+        # A business day is at most a couple of weeks of closures away; leave generous room
+        return cls(min(days), max(days) + timedelta(days=longest_sla * 3 + 30))
+
+
+# --- DEADLINES ---
+
+def sla_days(directorate_ids):
+    """{directorate_id: {stage: business days}}; directorates without an SLA row get SLA_BUSINESS_DAYS."""
+    rows = DirectorateSLA.objects.filter(directorate_id__in=[d for d in directorate_ids if d]).values_list(
+        'directorate_id', 'hod_days', 'ict_days', 'sys_admin_days'
+    )
+    configured = {pk: {'hod': hod, 'ict': ict, 'sys_admin': sys_admin} for pk, hod, ict, sys_admin in rows}
+    return {pk: configured.get(pk, SLA_BUSINESS_DAYS) for pk in directorate_ids}
+
+
+def open_stage(system, submitted_at):
+    """(stage, started_at) for the stage a RequestedSystem is waiting on, or ('', None) when it is closed."""
+    if system.hod_status == 'pending':
+        return 'hod', submitted_at
+    if system.hod_status == 'approved' and system.ict_status == 'pending':
+        return 'ict', system.hod_decision_date or submitted_at
+    if system.ict_status in ('approved', 'sent_admin') and system.sysadmin_status == 'pending':
+        return 'sys_admin', system.ict_decision_date or system.hod_decision_date or submitted_at
+    return '', None
+
+
+def _apply_deadlines(requests, systems):
+    """Set open_stage/due_at on `systems` and due_at on `requests` (dict pk -> AccessRequest) in memory.
+    Returns the systems whose values changed.
+    """
+    slas = sla_days({r.directorate_id for r in requests.values()})
+    stages = {}
+    for system in systems:
+        stages[system.pk] = open_stage(system, requests[system.access_request_id].submitted_at)
+    longest = max((max(days.values()) for days in slas.values()), default=0)
+    calendar = BusinessCalendar.around([started for _, started in stages.values()], longest)
+
+    changed = []
+    for request_obj in requests.values():
+        request_obj.due_at = None
+    for system in systems:
+        request_obj = requests[system.access_request_id]
+        stage, started_at = stages[system.pk]
+        due_at = calendar.deadline(started_at, slas[request_obj.directorate_id][stage]) if stage else None
+        before = (system.open_stage, system.due_at, system.escalation_level, system.escalate_at, system.assigned_to_id)
+        if system.open_stage != stage:
+            # A new stage starts with a clean escalation slate
+            system.escalation_level, system.assigned_to_id = 0, None
+        if system.escalation_level == 0:
+            # The first escalation is due at the deadline (see escalation.py)
+            system.escalate_at = due_at
+        system.open_stage, system.due_at = stage, due_at
+        if (system.open_stage, system.due_at, system.escalation_level, system.escalate_at, system.assigned_to_id) != before:
+            changed.append(system)
+        if due_at and (request_obj.due_at is None or due_at < request_obj.due_at):
+            request_obj.due_at = due_at
+    return changed
+
+
+def refresh_due_dates(request_obj):
+    """Recompute the deadlines of one request after a stage transition (called from sync_request_status)."""
+    systems = list(RequestedSystem.objects.filter(access_request=request_obj))
+    changed = _apply_deadlines({request_obj.pk: request_obj}, systems)
+    if changed:
+        RequestedSystem.objects.bulk_update(changed, DEADLINE_FIELDS)
+    AccessRequest.objects.filter(pk=request_obj.pk).update(due_at=request_obj.due_at)
+    return request_obj.due_at
+
+
+def recompute_due_dates(directorate_ids=None, batch_size=SLA_RECOMPUTE_BATCH_SIZE):
+    """Recompute open deadlines (of the given directorates, or all), e.g. after an SLA or calendar change.
+    Returns the number of requests whose deadline moved.
+    """
+    # Requests with an open system, plus any that still carry a deadline from before they closed
+    candidates = AccessRequest.objects.filter(
+        Q(pk__in=RequestedSystem.objects.filter(OPEN_SYSTEMS).values('access_request')) | Q(due_at__isnull=False)
+    ).order_by('pk')
+    if directorate_ids is not None:
+        candidates = candidates.filter(directorate_id__in=directorate_ids)
+    updated, last_pk = 0, 0
+    while True:
+        batch = list(candidates.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]
+        updated += refresh_many(batch)
+    return updated
+
+
+@transaction.atomic
+def refresh_many(request_ids):
+    """refresh_due_dates() for a batch of requests in a fixed number of queries. Returns how many moved."""
+    requests = AccessRequest.objects.only('pk', 'submitted_at', 'directorate_id', 'due_at').in_bulk(request_ids)
+    before = {pk: r.due_at for pk, r in requests.items()}
+    changed = _apply_deadlines(requests, list(RequestedSystem.objects.filter(access_request__in=request_ids)))
+    RequestedSystem.objects.bulk_update(changed, DEADLINE_FIELDS, batch_size=1000)
+    stale = [r for pk, r in requests.items() if r.due_at != before[pk]]
+    AccessRequest.objects.bulk_update(stale, ['due_at'], batch_size=1000)
+    return len(stale)
@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import CustomUser, Directorate, RequestedSystem
+
+# Results are cached; the dashboard and the export share one computation per window
+STAGE_LATENCY_CACHE_SECONDS = getattr(settings, 'STAGE_LATENCY_CACHE_SECONDS', 900)
+STAGE_LATENCY_WINDOW_DAYS = getattr(settings, 'STAGE_LATENCY_WINDOW_DAYS', 365)
+
+# Stage -> (start column, end column, approver column). A stage runs from the previous decision to its own.
+STAGES = {
+    'hod': ('submitted_at', 'hod_at', 'hod_approver'),
+    'ict': ('hod_at', 'ict_at', 'ict_approver'),
+    'sys_admin': ('ict_at', 'sysadmin_at', 'system_admin'),
+}
+STAGE_LABELS = {'hod': "HOD", 'ict': "ICT", 'sys_admin': "System Admin"}
+DIMENSIONS = ('directorate', 'system', 'approver')
+QUANTILES = (0.5, 0.9, 0.99)
+
+COLUMNS = ['directorate', 'system', 'hod_approver', 'ict_approver', 'system_admin', 'submitted_at', 'hod_at', 'ict_at', 'sysadmin_at']
+
+
+def load_decisions(since):
+    """One row per RequestedSystem submitted since `since` that has at least its HOD decision.
+    Only ids and timestamps are read, so a million rows stay a few tens of MB.
+    """
+    rows = RequestedSystem.objects.filter(
+        access_request__submitted_at__gte=since, hod_decision_date__isnull=False
+    ).order_by().values_list(
+        'access_request__directorate_id', 'system', 'access_request__hod_approver_id',
+        'access_request__ict_approver_id', 'system_admin_id', 'access_request__submitted_at',
+        'hod_decision_date', 'ict_decision_date', 'sysadmin_decision_date',
+    )
+    frame = pd.DataFrame.from_records(rows.iterator(chunk_size=20000), columns=COLUMNS)
+    for column in ['directorate', 'hod_approver', 'ict_approver', 'system_admin']:
+        frame[column] = pd.to_numeric(frame[column])  # nullable ids -> float with NaN
+    for column in COLUMNS[5:]:
+        frame[column] = pd.to_datetime(frame[column], utc=True)
+    return frame
+
+
+def stage_durations(frame):
+    """Long frame (stage, directorate, system, approver, hours): one row per completed stage.
+    Durations are computed column-wise; negative gaps (e.g. an override that skipped a stage) are dropped.
+    """
+    parts = []
+    stage_type = pd.CategoricalDtype(list(STAGES))  # category keys keep the groupbys below cheap
+    for code, (start, end, approver) in enumerate(STAGES.values()):
+        hours = (frame[end] - frame[start]).dt.total_seconds() / 3600
+        mask = hours.notna() & (hours >= 0)
+        parts.append(pd.DataFrame({
+            'stage': pd.Categorical.from_codes(np.full(int(mask.sum()), code), dtype=stage_type),
+            'directorate': frame['directorate'][mask],
+            'system': frame['system'][mask],
+            'approver': frame[approver][mask],
+            'hours': hours[mask],
+        }))
+    durations = pd.concat(parts, ignore_index=True)
+    durations['system'] = durations['system'].astype('category')
+    return durations
+
+
+def percentiles(durations, by=None):
+    """count/p50/p90/p99 hours per stage, or per (dimension, stage) when `by` is given."""
+    keys = ['stage'] if by is None else [by, 'stage']
+    durations = durations.dropna(subset=keys)
+    if durations.empty:
+        return pd.DataFrame(columns=keys + ['count', 'p50', 'p90', 'p99'])
+    grouped = durations.groupby(keys, sort=False, observed=True)['hours']
+    stats = grouped.quantile(list(QUANTILES)).unstack()
+    stats.columns = [f"p{round(q * 100)}" for q in QUANTILES]
+    stats.insert(0, 'count', grouped.size())
+    return stats.reset_index()
+
+
+def _labels(dimension, keys):
+    if dimension == 'directorate':
+        return dict(Directorate.objects.filter(pk__in=keys).values_list('pk', 'name'))
+    if dimension == 'approver':
+        return dict(CustomUser.objects.filter(pk__in=keys).values_list('pk', 'full_name'))
+    return dict(RequestedSystem.SYSTEM_CHOICES)
+
+
+def _rows(stats, dimension=None):
+    labels = _labels(dimension, [int(k) for k in stats[dimension].unique()]) if dimension else {}
+    rows = []
+    for record in stats.itertuples(index=False):
+        record = record._asdict()
+        key = record.pop(dimension) if dimension else None
+        if dimension in ('directorate', 'approver'):
+            key = int(key)
+        rows.append({
+            'group': labels.get(key, key) if dimension else "All",
+            'stage': STAGE_LABELS[record['stage']],
+            'count': int(record['count']),
+            **{name: round(float(record[name]), 1) for name in ('p50', 'p90', 'p99')},
+        })
+    return rows
+
+
+def compute_stage_latency(days=STAGE_LATENCY_WINDOW_DAYS, now=None):
+    """Stage latency percentiles (hours) for requests submitted in the last `days` days.
+
+    Returns {'overall': [...], 'directorate': [...], 'system': [...], 'approver': [...], 'generated_at', 'days'};
+    each row is {'group', 'stage', 'count', 'p50', 'p90', 'p99'}. Groups are ordered slowest p90 first.
+    """
+    now = now or timezone.now()
+    durations = stage_durations(load_decisions(now - timedelta(days=days)))
+    result = {'generated_at': now, 'days': days, 'overall': _rows(percentiles(durations))}
+    for dimension in DIMENSIONS:
+        stats = percentiles(durations, dimension).sort_values(['stage', 'p90'], ascending=[True, False], kind='stable')
+        result[dimension] = _rows(stats, dimension)
+    return result
+
+
+def stage_latency(days=STAGE_LATENCY_WINDOW_DAYS, refresh=False):
+    """Cached compute_stage_latency(). refresh=True recomputes and replaces the cached copy."""
+    key = f'stage_latency:{days}'
+    result = None if refresh else cache.get(key)
+    if result is None:
+        result = compute_stage_latency(days)
+        cache.set(key, result, STAGE_LATENCY_CACHE_SECONDS)
+    return result
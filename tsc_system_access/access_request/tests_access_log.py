@@ -0,0 +1,83 @@
+import tempfile
+import threading
+from datetime import timedelta
+from pathlib import Path
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .access_log import AccessLogBuffer, access_log_buffer, archive_access_logs, rehydrate_access_logs
+from .models import AccessLog, AccessLogDailyRollup
+
+User = get_user_model()
+
+class AccessLogBufferTest(TestCase):
+    def setUp(self):
+        access_log_buffer.flush()
+        self.user = User.objects.create_user(tsc_no="T1", email="t1@example.com", full_name="Teacher One", password="pass")
+
+    def test_events_are_written_in_one_insert(self):
+        buffer = AccessLogBuffer(flush_size=3, interval_ms=60000)
+        buffer.add(self.user.pk, "Login", "10.0.0.1")
+        buffer.add(self.user.pk, "Export PDF (HOD)", "10.0.0.1")
+        self.assertFalse(buffer.is_due())
+        buffer.add(self.user.pk, "Logout", "10.0.0.1")
+        self.assertTrue(buffer.is_due())
+        with self.assertNumQueries(2):
+            self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(AccessLog.objects.filter(user=self.user).count(), 3)
+
+    def test_buffer_is_bounded(self):
+        buffer = AccessLogBuffer(max_size=2)
+        for action in ("A", "B", "C"):
+            buffer.add(self.user.pk, action)
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.dropped, 1)
+
+    def test_timer_flushes_without_a_request(self):
+        buffer = AccessLogBuffer(interval_ms=50)
+        flushed = threading.Event()
+        buffer.flush = flushed.set
+        buffer.add(self.user.pk, "Login", "10.0.0.1")
+        # No request_finished is sent; only the background timer can flush
+        self.assertTrue(flushed.wait(2))
+
+    def test_login_and_logout_are_logged(self):
+        client = Client()
+        client.login(tsc_no="T1", password="pass")
+        client.logout()
+        self.assertEqual(AccessLog.objects.filter(user=self.user).count(), 0)
+        access_log_buffer.flush()
+        self.assertEqual(
+            list(AccessLog.objects.filter(user=self.user).order_by('timestamp').values_list('action', flat=True)),
+            ["Login", "Logout"],
+        )
+
+
+class AccessLogRetentionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(tsc_no="T1", email="t1@example.com", full_name="Teacher One", password="pass")
+        self.old = timezone.now() - timedelta(days=400)
+        AccessLog.objects.bulk_create(
+            [AccessLog(user=self.user, action="Login", timestamp=self.old + timedelta(minutes=i)) for i in range(3)]
+            + [AccessLog(user=self.user, action="Export PDF (HOD)", timestamp=self.old)]
+            + [AccessLog(user=self.user, action="Login", timestamp=timezone.now())]
+        )
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def test_archive_rolls_up_moves_and_rehydrates(self):
+        moved = archive_access_logs(timezone.now() - timedelta(days=365), directory=self.dir.name, batch_size=2)
+        self.assertEqual(moved, 4)
+        self.assertEqual(AccessLog.objects.count(), 1)
+        self.assertEqual(
+            dict(AccessLogDailyRollup.objects.values_list('action', 'count')),
+            {"Login": 3, "Export PDF (HOD)": 1},
+        )
+
+        files = list(Path(self.dir.name).glob("access_log_*.jsonl.gz"))
+        self.assertTrue(files)
+        for path in files:
+            rehydrate_access_logs(path)
+            rehydrate_access_logs(path)  # second load is a no-op
+        self.assertEqual(AccessLog.objects.count(), 5)
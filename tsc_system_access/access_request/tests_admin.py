@@ -0,0 +1,88 @@
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .access_log import access_log_buffer
+from .models import AccessRequest, RequestedSystem, Directorate, UserRole, UserProfile, AccessLog
+
+User = get_user_model()
+
+class ChangelistQueryCountTest(TestCase):
+    """Changelist query counts must not grow with the number of rows on the page."""
+
+    CHANGELISTS = [
+        '/admin/access_request/accessrequest/',
+        '/admin/access_request/requestedsystem/',
+        '/admin/access_request/userrole/',
+        '/admin/access_request/directorate/',
+        '/admin/access_request/accesslog/',
+        '/admin/access_request/customuser/',
+    ]
+
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_superuser(tsc_no="ADMIN", email="admin@example.com", full_name="Admin", password="pass")
+        self.client.force_login(self.admin)
+        # Start with an empty access log buffer so no flush lands inside a measured request
+        access_log_buffer.flush()
+        self.serial = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            self.serial += 1
+            directorate = Directorate.objects.create(name=f"Dir {self.serial}", hod_email=f"hod{self.serial}@example.com")
+            hod = User.objects.create_user(tsc_no=f"H{self.serial}", email=f"h{self.serial}@example.com", full_name=f"HOD {self.serial}", password="pass")
+            UserRole.objects.filter(user=hod).update(role='hod', directorate=directorate)
+            staff = User.objects.create_user(tsc_no=f"S{self.serial}", email=f"s{self.serial}@example.com", full_name=f"Staff {self.serial}", password="pass", directorate=directorate)
+            UserRole.objects.filter(user=staff).update(hod=hod)
+            UserProfile.objects.create(user=staff, directorate=directorate)
+            req = AccessRequest.objects.create(
+                requester=staff, tsc_no=staff.tsc_no, email=staff.email,
+                directorate=directorate, designation="Dev", request_type="new"
+            )
+            RequestedSystem.objects.create(access_request=req, system='1', directorate=directorate)
+            AccessLog.objects.create(user=staff, ip_address="127.0.0.1")
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_independent_of_page_size(self):
+        self.add_rows(2)
+        small = {url: self.count_queries(url) for url in self.CHANGELISTS}
+        self.add_rows(8)
+        large = {url: self.count_queries(url) for url in self.CHANGELISTS}
+        self.assertEqual(small, large)
+
+
+class UserPickerAutocompleteTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_superuser(tsc_no="ADMIN", email="admin@example.com", full_name="Admin", password="pass")
+        self.client.force_login(self.admin)
+        for i in range(30):
+            User.objects.create_user(tsc_no=f"TSC{i:03d}", email=f"u{i}@example.com", full_name=f"Teacher {i}", password="pass")
+
+    def autocomplete(self, model_name, field_name, term):
+        response = self.client.get('/admin/autocomplete/', {
+            'term': term, 'app_label': 'access_request', 'model_name': model_name, 'field_name': field_name,
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_userrole_picker_matches_tsc_prefix(self):
+        data = self.autocomplete('userrole', 'user', 'TSC01')
+        self.assertEqual([r['text'] for r in data['results']], [f"Teacher {i} (TSC{i:03d})" for i in range(10, 20)])
+
+    def test_picker_results_are_limited(self):
+        data = self.autocomplete('requestedsystem', 'system_admin', 'Teacher')
+        self.assertEqual(len(data['results']), 20)
+        self.assertTrue(data['pagination']['more'])
+
+    def test_userrole_change_form_does_not_list_every_user(self):
+        role = UserRole.objects.get(user__tsc_no="TSC000")
+        response = self.client.get(f'/admin/access_request/userrole/{role.pk}/change/')
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'Teacher 29 (TSC029)')
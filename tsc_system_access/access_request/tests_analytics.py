@@ -0,0 +1,110 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .models import AccessRequest, DailyRequestFact, RequestedSystem, Directorate
+from .request_facts import backfill_facts, build_facts, monthly_trends
+from .stage_latency import compute_stage_latency, stage_latency
+
+User = get_user_model()
+
+class StageLatencyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.it = Directorate.objects.create(name="IT", hod_email="it@example.com")
+        self.hod = User.objects.create_user(tsc_no="H1", email="hod@example.com", full_name="Hod One", password="pass")
+        self.ict = User.objects.create_user(tsc_no="I1", email="ict@example.com", full_name="Ict One", password="pass")
+        self.user = User.objects.create_user(tsc_no="5001", email="u@example.com", full_name="Staff User", password="pass")
+        submitted = timezone.now() - timedelta(days=10)
+        # HOD takes 2h, 4h, 6h; ICT takes 10h on the first two; the third is still with ICT
+        for hod_hours, ict_hours in ((2, 10), (4, 10), (6, None)):
+            req = AccessRequest.objects.create(
+                requester=self.user, tsc_no=self.user.tsc_no, email=self.user.email, directorate=self.it,
+                designation="Dev", request_type='new', hod_approver=self.hod, ict_approver=self.ict,
+            )
+            AccessRequest.objects.filter(pk=req.pk).update(submitted_at=submitted)
+            hod_at = submitted + timedelta(hours=hod_hours)
+            RequestedSystem.objects.create(
+                access_request=req, system='4', directorate=self.it, hod_status='approved', hod_decision_date=hod_at,
+                ict_decision_date=hod_at + timedelta(hours=ict_hours) if ict_hours else None,
+            )
+        # Undecided systems are not counted
+        RequestedSystem.objects.create(access_request=req, system='6', directorate=self.it)
+
+    def test_percentiles_per_stage_and_dimension(self):
+        result = compute_stage_latency(days=30)
+        overall = {row['stage']: row for row in result['overall']}
+        self.assertEqual(set(overall), {'HOD', 'ICT'})
+        self.assertEqual((overall['HOD']['count'], overall['HOD']['p50']), (3, 4.0))
+        self.assertEqual((overall['ICT']['count'], overall['ICT']['p90']), (2, 10.0))
+        self.assertEqual([(r['group'], r['stage']) for r in result['directorate']], [('IT', 'HOD'), ('IT', 'ICT')])
+        self.assertEqual([r['group'] for r in result['approver']], ['Hod One', 'Ict One'])
+        self.assertEqual([r['group'] for r in result['system']], ['Email', 'Email'])
+        self.assertEqual(compute_stage_latency(days=5)['overall'], [])
+
+    def test_results_are_cached_until_refreshed(self):
+        first = stage_latency(days=30)
+        RequestedSystem.objects.update(hod_decision_date=None)
+        self.assertEqual(stage_latency(days=30)['overall'], first['overall'])
+        self.assertEqual(stage_latency(days=30, refresh=True)['overall'], [])
+
+    def test_dashboard_tab_and_export(self):
+        client = Client()
+        client.force_login(User.objects.create_superuser(tsc_no="ADMIN", email="admin@example.com", full_name="Admin", password="pass"))
+        response = client.get('/admin/access_request/systemanalytics/')
+        self.assertContains(response, "Stage Latency")
+        self.assertEqual(len(response.context['latency']['overall']), 2)
+        response = client.get('/admin/access_request/systemanalytics/', {'export_latency': 1})
+        self.assertEqual(response['Content-Type'], "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+
+class DailyRequestFactTest(TestCase):
+    def setUp(self):
+        self.it = Directorate.objects.create(name="IT", hod_email="it@example.com")
+        self.user = User.objects.create_user(tsc_no="5001", email="u@example.com", full_name="Staff User", password="pass")
+        self.today = timezone.localdate()
+        self.day_ago = timezone.now() - timedelta(days=1)
+        req = self.make_request(self.day_ago)
+        RequestedSystem.objects.create(access_request=req, system='4', directorate=self.it, hod_status='approved', hod_decision_date=timezone.now())
+        RequestedSystem.objects.create(access_request=req, system='6', directorate=self.it, hod_status='rejected', hod_decision_date=timezone.now())
+        old = self.make_request(timezone.now() - timedelta(days=40))
+        RequestedSystem.objects.create(
+            access_request=old, system='4', directorate=self.it, hod_status='approved', ict_status='approved',
+            sysadmin_status='revoked', sysadmin_decision_date=timezone.now() - timedelta(days=39),
+        )
+
+    def make_request(self, submitted_at):
+        req = AccessRequest.objects.create(
+            requester=self.user, tsc_no=self.user.tsc_no, email=self.user.email, directorate=self.it,
+            designation="Dev", request_type='new',
+        )
+        AccessRequest.objects.filter(pk=req.pk).update(submitted_at=submitted_at)
+        return req
+
+    def facts(self):
+        return {(f.day, f.system, f.stage, f.outcome): f.count for f in DailyRequestFact.objects.all()}
+
+    def test_build_is_idempotent(self):
+        build_facts(self.today - timedelta(days=1), self.today)
+        build_facts(self.today - timedelta(days=1), self.today)
+        yesterday = timezone.localtime(self.day_ago).date()
+        self.assertEqual(self.facts(), {
+            (yesterday, '4', 'submitted', 'submitted'): 1,
+            (yesterday, '6', 'submitted', 'submitted'): 1,
+            (self.today, '4', 'hod', 'approved'): 1,
+            (self.today, '6', 'hod', 'rejected'): 1,
+        })
+
+    def test_backfill_keeps_built_days_and_feeds_trends(self):
+        build_facts(self.today, self.today)
+        DailyRequestFact.objects.filter(day=self.today).update(count=7)
+        backfill_facts(until=self.today)
+        self.assertEqual(DailyRequestFact.objects.filter(day=self.today).values_list('count', flat=True).distinct().get(), 7)
+        self.assertEqual(DailyRequestFact.objects.filter(stage='sys_admin', outcome='revoked').count(), 1)
+
+        with self.assertNumQueries(1):
+            trends = monthly_trends(24)
+        self.assertEqual(sum(t['submitted'] for t in trends), 3)
+        self.assertEqual(sum(t['revoked'] for t in trends), 1)
+        self.assertEqual(sum(t['rejected'] for t in trends), 7)
@@ -0,0 +1,88 @@
+import json
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .delegation import DELEGATION_CACHE_KEY
+from .models import AccessRequest, HodDelegation, NotificationOutbox, RequestedSystem, Directorate, UserRole
+
+User = get_user_model()
+
+@override_settings(ICT_TEAM_EMAIL="ict@example.com")
+class BulkRequestTest(TestCase):
+    def setUp(self):
+        self.it = Directorate.objects.create(name="IT", hod_email="hod@example.com")
+        self.other = Directorate.objects.create(name="HR", hod_email="hr@example.com")
+        self.hod = User.objects.create_user(tsc_no="H1", email="hod@example.com", full_name="Hod", password="pass", directorate=self.it)
+        UserRole.objects.filter(user=self.hod).update(role='hod', directorate=self.it)
+        self.staff = [
+            User.objects.create_user(tsc_no=f"50{n}", email=f"s{n}@example.com", full_name=f"Staff {n}", password="pass", directorate=self.it)
+            for n in range(3)
+        ]
+        User.objects.create_user(tsc_no="HR1", email="hr1@example.com", full_name="HR Staff", password="pass", directorate=self.other)
+        self.client = Client()
+        self.client.force_login(self.hod)
+
+    def post_api(self, rows, **extra):
+        return self.client.post('/access/api/hod/bulk-requests/', json.dumps({'requests': rows, **extra}), content_type='application/json')
+
+    def test_api_creates_pre_approved_requests_and_bundles_email(self):
+        rows = [{'tsc_no': s.tsc_no, 'systems': ['4', 'HRMIS'], 'designation': "Teacher"} for s in self.staff]
+        self.assertEqual(self.post_api(rows, validate_only=True).status_code, 200)
+        self.assertFalse(AccessRequest.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_api(rows)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 3)
+        self.assertEqual(set(AccessRequest.objects.values_list('status', 'hod_approver')), {('pending_ict', self.hod.pk)})
+        self.assertEqual(set(RequestedSystem.objects.values_list('hod_status', 'open_stage')), {('approved', 'ict')})
+        self.assertFalse(RequestedSystem.objects.filter(due_at=None).exists())
+        # One email per staff member and a single one for ICT
+        recipients = sorted(r for n in NotificationOutbox.objects.all() for r in n.recipients)
+        self.assertEqual(recipients, ["ict@example.com", "s0@example.com", "s1@example.com", "s2@example.com"])
+
+        # Submitting again skips everything
+        response = self.post_api(rows)
+        self.assertEqual((response.status_code, len(response.json()['skipped'])), (200, 6))
+
+    def test_any_error_blocks_the_whole_batch(self):
+        response = self.post_api([
+            {'tsc_no': "500", 'systems': "Email", 'designation': "Teacher"},
+            {'tsc_no': "HR1", 'systems': "Email", 'designation': "Clerk"},
+            {'tsc_no': "501", 'systems': "Nope", 'designation': "Teacher"},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['row'] for e in response.json()['errors']], [2, 3])
+        self.assertFalse(AccessRequest.objects.exists())
+
+    def test_hod_cannot_pre_approve_own_access(self):
+        response = self.post_api([{'tsc_no': "H1", 'systems': "Email", 'designation': "Director"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['row'] for e in response.json()['errors']], [1])
+        self.assertFalse(AccessRequest.objects.exists())
+
+    def test_deputy_scope_is_confirmed_before_writing(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        deputy = User.objects.create_user(tsc_no="D1", email="d1@example.com", full_name="Deputy", password="pass", directorate=self.other)
+        today = timezone.localdate()
+        delegation = HodDelegation.objects.create(hod=self.hod, deputy=deputy, directorate=self.it, start_date=today, end_date=today)
+        self.client.force_login(deputy)
+        self.assertEqual(self.post_api([{'tsc_no': "500", 'systems': "Email", 'designation': "Teacher"}], validate_only=True).status_code, 200)
+
+        # Cancelled in another process: this one keeps its cached index
+        stale = cache.get(DELEGATION_CACHE_KEY)
+        delegation.delete()
+        cache.set(DELEGATION_CACHE_KEY, stale)
+        response = self.post_api([{'tsc_no': "500", 'systems': "Email", 'designation': "Teacher"}])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(AccessRequest.objects.exists())
+
+    def test_upload_from_the_dashboard(self):
+        extract = SimpleUploadedFile("staff.csv", b"TSC No,Systems,Designation\n500,Email;CRM,Teacher\n501,Email,Teacher\n")
+        response = self.client.post('/access/hod/bulk/', {'extract': extract, 'request_type': 'new', 'access_levels': 'User'})
+        self.assertEqual(response.context['result']['errors'], [])
+        self.assertEqual(RequestedSystem.objects.count(), 3)
+        self.assertEqual(AccessRequest.objects.values('submission_batch').distinct().count(), 1)
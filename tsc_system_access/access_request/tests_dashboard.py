@@ -0,0 +1,294 @@
+from datetime import timedelta
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from .archive import archive_requests, restore_request
+from .assignment import sync_assignments
+from .delegation import DELEGATION_CACHE_KEY, deputy_emails
+from .models import AccessRequest, ArchivedAccessRequest, HodDelegation, NotificationOutbox, RequestedSystem, Directorate, SystemAdminAssignment, UserRole
+from .sla import refresh_due_dates
+
+User = get_user_model()
+
+class OverallAdminFacetTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_superuser(tsc_no="ADMIN", email="admin@example.com", full_name="Admin", password="pass")
+        self.client.force_login(self.admin)
+        self.it = Directorate.objects.create(name="IT", hod_email="it@example.com")
+        self.hr = Directorate.objects.create(name="HR", hod_email="hr@example.com")
+        self.user = User.objects.create_user(tsc_no="5001", email="u@example.com", full_name="Staff User", password="pass")
+
+        self.make_request(self.it, 'new', ['1', '4'])
+        self.make_request(self.it, 'modify', ['4'])
+        self.make_request(self.hr, 'new', ['4', '6'], status='pending_ict', hod_approver=self.admin)
+
+    def make_request(self, directorate, request_type, systems, status='pending_hod', hod_approver=None):
+        req = AccessRequest.objects.create(
+            requester=self.user, tsc_no=self.user.tsc_no, email=self.user.email, directorate=directorate,
+            designation="Dev", request_type=request_type, status=status, hod_approver=hod_approver
+        )
+        for system in systems:
+            RequestedSystem.objects.create(access_request=req, system=system, directorate=directorate)
+        return req
+
+    def facet(self, response, name):
+        facet = next(f for f in response.context['facets'] if f['name'] == name)
+        return {o['label']: o['count'] for o in facet['options']}
+
+    def test_facet_counts_honour_other_filters(self):
+        response = self.client.get('/access/overall-admin/dashboard/', {'directorate': self.it.pk})
+        self.assertEqual(response.context['total'], 3)
+        self.assertEqual(len(response.context['access_requests']), 2)
+        # Own facet ignores its own selection; the others are narrowed to IT
+        self.assertEqual(self.facet(response, 'directorate'), {'IT': 3, 'HR': 2})
+        self.assertEqual(self.facet(response, 'system'), {'Active Directory': 1, 'Email': 2})
+        self.assertEqual(self.facet(response, 'request_type'), {'New User': 2, 'Change/Modify': 1})
+
+    def test_system_and_approver_facets_filter_requests(self):
+        response = self.client.get('/access/overall-admin/dashboard/', {'system': '4', 'approver': self.admin.pk})
+        self.assertEqual(response.context['total'], 1)
+        self.assertEqual([r.directorate for r in response.context['access_requests']], [self.hr])
+        self.assertEqual(self.facet(response, 'approver'), {'Admin': 1})
+
+
+class RequestArchiveTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_superuser(tsc_no="ADMIN", email="admin@example.com", full_name="Admin", password="pass")
+        self.client.force_login(self.admin)
+        self.it = Directorate.objects.create(name="IT", hod_email="it@example.com")
+        self.user = User.objects.create_user(tsc_no="5001", email="u@example.com", full_name="Staff User", password="pass")
+        self.old = timezone.now() - timedelta(days=400)
+
+        self.closed = self.make_request(rejected=True)
+        self.granted = self.make_request(rejected=False)
+
+    def make_request(self, rejected):
+        req = AccessRequest.objects.create(
+            requester=self.user, tsc_no=self.user.tsc_no, email=self.user.email, directorate=self.it,
+            designation="Dev", request_type='new', status='rejected_hod' if rejected else 'approved',
+        )
+        AccessRequest.objects.filter(pk=req.pk).update(submitted_at=self.old)
+        RequestedSystem.objects.create(
+            access_request=req, system='4', directorate=self.it,
+            hod_status='rejected' if rejected else 'approved', sysadmin_status='rejected' if rejected else 'approved',
+        )
+        return req
+
+    def test_only_closed_requests_are_archived_and_searchable(self):
+        moved = archive_requests(timezone.now() - timedelta(days=365))
+        self.assertEqual(moved, 1)
+        self.assertFalse(AccessRequest.objects.filter(pk=self.closed.pk).exists())
+        self.assertTrue(AccessRequest.objects.filter(pk=self.granted.pk).exists())
+
+        archived = ArchivedAccessRequest.objects.get(original_id=self.closed.pk)
+        self.assertEqual(archived.systems, '4')
+        self.assertEqual(len(archived.payload['systems']), 1)
+
+        url = '/access/overall-admin/dashboard/'
+        self.assertIsNone(self.client.get(url, {'tsc': '5001'}).context['archived_requests'])
+        response = self.client.get(url, {'tsc': '5001', 'archived': '1'})
+        self.assertEqual([a.original_id for a in response.context['archived_requests']], [self.closed.pk])
+
+    def test_restore_puts_request_back(self):
+        archive_requests(timezone.now() - timedelta(days=365))
+        restore_request(ArchivedAccessRequest.objects.get(original_id=self.closed.pk))
+        restored = AccessRequest.objects.get(pk=self.closed.pk)
+        self.assertEqual(restored.submitted_at, self.old)
+        self.assertEqual(restored.requested_systems.get().hod_status, 'rejected')
+        self.assertFalse(ArchivedAccessRequest.objects.exists())
+
+
+class HodDelegationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.it = Directorate.objects.create(name="IT", hod_email="hod@example.com")
+        self.hod = User.objects.create_user(tsc_no="H1", email="hod@example.com", full_name="Hod", password="pass", directorate=self.it)
+        UserRole.objects.filter(user=self.hod).update(role='hod', directorate=self.it)
+        self.deputy = User.objects.create_user(tsc_no="D1", email="deputy@example.com", full_name="Deputy", password="pass")
+        self.user = User.objects.create_user(tsc_no="5001", email="u@example.com", full_name="Staff User", password="pass", directorate=self.it)
+        req = AccessRequest.objects.create(
+            requester=self.user, tsc_no=self.user.tsc_no, email=self.user.email, directorate=self.it,
+            designation="Dev", request_type='new',
+        )
+        self.system = RequestedSystem.objects.create(access_request=req, system='4', directorate=self.it)
+        self.deputy_client = Client()
+        self.deputy_client.force_login(self.deputy)
+
+    def tearDown(self):
+        # The index lives in the cache, outside the rolled-back test transaction
+        cache.clear()
+
+    def test_deputy_acts_only_while_delegation_is_active(self):
+        self.assertEqual(self.deputy_client.get('/access/hod/dashboard/').status_code, 302)
+        self.assertEqual(self.deputy_client.post(f'/access/hod/decision/{self.system.pk}/', {'action': 'approve'}).status_code, 403)
+
+        hod_client = Client()
+        hod_client.force_login(self.hod)
+        today = timezone.localdate()
+        hod_client.post('/access/hod/delegate/', {'deputy_tsc_no': "D1", 'start_date': today, 'end_date': today + timedelta(days=5)})
+        delegation = HodDelegation.objects.get()
+        self.assertEqual((delegation.directorate, delegation.deputy), (self.it, self.deputy))
+
+        response = self.deputy_client.get('/access/hod/dashboard/')
+        self.assertEqual(list(response.context['requests']), [self.system.access_request])
+        self.assertEqual(deputy_emails(self.it.pk), ["deputy@example.com"])
+        # The index is cached: notifications run no delegation query
+        with self.assertNumQueries(0):
+            deputy_emails(self.it.pk)
+        self.deputy_client.post(f'/access/hod/decision/{self.system.pk}/', {'action': 'approve'})
+        self.system.refresh_from_db()
+        self.assertEqual(self.system.hod_status, 'approved')
+
+        # Cancelling drops the cached index at once
+        hod_client.post('/access/hod/delegate/', {'cancel': delegation.pk})
+        self.assertEqual(deputy_emails(self.it.pk), [])
+        self.assertEqual(self.deputy_client.get('/access/hod/dashboard/').status_code, 302)
+
+    def test_cancelled_delegation_stops_decisions_despite_a_stale_cache(self):
+        delegation = HodDelegation.objects.create(
+            hod=self.hod, deputy=self.deputy, directorate=self.it,
+            start_date=timezone.localdate(), end_date=timezone.localdate(),
+        )
+        self.assertEqual(self.deputy_client.get('/access/hod/dashboard/').status_code, 200)
+        # Cancelled in another process: this one keeps its cached index
+        stale = cache.get(DELEGATION_CACHE_KEY)
+        delegation.delete()
+        cache.set(DELEGATION_CACHE_KEY, stale)
+        self.assertEqual(deputy_emails(self.it.pk), ["deputy@example.com"])
+
+        self.assertEqual(self.deputy_client.post(f'/access/hod/decision/{self.system.pk}/', {'action': 'approve'}).status_code, 403)
+        self.system.refresh_from_db()
+        self.assertEqual(self.system.hod_status, 'pending')
+
+    def test_deputy_cannot_approve_own_request_or_outlast_the_hod(self):
+        today = timezone.localdate()
+        HodDelegation.objects.create(hod=self.hod, deputy=self.deputy, directorate=self.it, start_date=today, end_date=today)
+        own = AccessRequest.objects.create(
+            requester=self.deputy, tsc_no="D1", email=self.deputy.email, directorate=self.it, designation="Dev", request_type='new',
+        )
+        own_system = RequestedSystem.objects.create(access_request=own, system='4', directorate=self.it)
+        self.assertEqual(self.deputy_client.post(f'/access/hod/decision/{own_system.pk}/', {'action': 'approve'}).status_code, 403)
+        own_system.refresh_from_db()
+        self.assertEqual(own_system.hod_status, 'pending')
+
+        # The delegation lapses as soon as the HOD is no longer HOD of the directorate, even behind a stale index
+        self.assertEqual(deputy_emails(self.it.pk), ["deputy@example.com"])
+        UserRole.objects.filter(user=self.hod).update(role='staff')
+        self.assertEqual(self.deputy_client.post(f'/access/hod/decision/{self.system.pk}/', {'action': 'approve'}).status_code, 403)
+        UserRole.objects.filter(user=self.hod).update(role='hod')
+        role = UserRole.objects.get(user=self.hod)
+        role.role = 'staff'
+        role.save()
+        self.assertEqual(deputy_emails(self.it.pk), [])
+
+    def test_submission_copies_deputy(self):
+        HodDelegation.objects.create(
+            hod=self.hod, deputy=self.deputy, directorate=self.it,
+            start_date=timezone.localdate(), end_date=timezone.localdate(),
+        )
+        client = Client()
+        client.force_login(self.user)
+        client.post('/access/submit/', {
+            'tsc_no': "5001", 'email': "u@example.com", 'designation': "Dev",
+            'request_type': 'new', 'systems': ['4'], 'access_levels': 'User',
+        })
+        self.assertIn(["deputy@example.com"], [n.recipients for n in NotificationOutbox.objects.all()])
+
+
+class SystemAdminAssignmentTest(TestCase):
+    def setUp(self):
+        self.it = Directorate.objects.create(name="IT", hod_email="hod@example.com")
+        self.user = User.objects.create_user(tsc_no="5001", email="u@example.com", full_name="Staff User", password="pass")
+        self.admins = []
+        for n in (1, 2):
+            admin = User.objects.create_user(tsc_no=f"SA{n}", email=f"sa{n}@example.com", full_name=f"Admin {n}", password="pass")
+            UserRole.objects.filter(user=admin).update(role='sys_admin')
+            SystemAdminAssignment.objects.create(admin=admin, system='4')
+            self.admins.append(admin)
+        for _ in range(4):
+            req = AccessRequest.objects.create(
+                requester=self.user, tsc_no=self.user.tsc_no, email=self.user.email, directorate=self.it,
+                designation="Dev", request_type='new',
+            )
+            RequestedSystem.objects.create(access_request=req, system='4', directorate=self.it, hod_status='approved', ict_status='sent_admin')
+            refresh_due_dates(req)
+            sync_assignments(req)
+
+    def counters(self):
+        return list(SystemAdminAssignment.objects.order_by('admin__tsc_no').values_list('open_items', flat=True))
+
+    def test_items_are_spread_and_counted(self):
+        self.assertEqual(self.counters(), [2, 2])
+        client = Client()
+        client.force_login(self.admins[0])
+        mine = RequestedSystem.objects.filter(sysadmin_assignee=self.admins[0])
+        response = client.get('/access/system-admin/dashboard/')
+        self.assertEqual({r.pk for r in response.context['requests']}, set(mine.values_list('access_request', flat=True)))
+
+        client.post(f'/access/system-admin/decision/{mine.first().pk}/', {'action': 'reject'})
+        self.assertEqual(self.counters(), [1, 2])
+
+    def test_deactivating_an_admin_moves_their_queue(self):
+        slot = SystemAdminAssignment.objects.get(admin=self.admins[1])
+        slot.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            slot.save()
+        self.assertEqual(RequestedSystem.objects.filter(sysadmin_assignee=self.admins[0]).count(), 4)
+        self.assertEqual(self.counters(), [4, 0])
+
+        slot.is_active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            slot.save()
+        self.assertEqual(self.counters(), [2, 2])
+
+    def test_deactivated_account_leaves_the_queue(self):
+        client = Client()
+        client.force_login(self.admins[0])
+        # Deactivated without signals: their items show in colleagues' queues until the next rebalance
+        User.objects.filter(pk=self.admins[1].pk).update(is_active=False)
+        response = client.get('/access/system-admin/dashboard/')
+        self.assertEqual(len(response.context['requests']), 4)
+
+        User.objects.filter(pk=self.admins[1].pk).update(is_active=True)
+        self.admins[1].is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admins[1].save()
+        self.assertFalse(SystemAdminAssignment.objects.get(admin=self.admins[1]).is_active)
+        self.assertEqual(RequestedSystem.objects.filter(sysadmin_assignee=self.admins[0]).count(), 4)
+
+    def test_demoted_admin_leaves_the_queue(self):
+        role = UserRole.objects.get(user=self.admins[1])
+        role.role = 'staff'
+        with self.captureOnCommitCallbacks(execute=True):
+            role.save()
+        self.assertFalse(SystemAdminAssignment.objects.get(admin=self.admins[1]).is_active)
+        self.assertEqual(RequestedSystem.objects.filter(sysadmin_assignee=self.admins[0]).count(), 4)
+
+        # A role changed without signals (e.g. a bulk update) is still never assigned new items
+        UserRole.objects.filter(user=self.admins[0]).update(role='staff')
+        SystemAdminAssignment.objects.filter(admin=self.admins[1]).update(is_active=True)
+        UserRole.objects.filter(user=self.admins[1]).update(role='sys_admin')
+        req = AccessRequest.objects.create(
+            requester=self.user, tsc_no=self.user.tsc_no, email=self.user.email, directorate=self.it,
+            designation="Dev", request_type='new',
+        )
+        item = RequestedSystem.objects.create(access_request=req, system='4', directorate=self.it, hod_status='approved', ict_status='sent_admin')
+        refresh_due_dates(req)
+        sync_assignments(req)
+        item.refresh_from_db()
+        self.assertEqual(item.sysadmin_assignee, self.admins[1])
+
+    def test_changing_the_assigned_system_retires_the_old_one(self):
+        role = UserRole.objects.get(user=self.admins[0])
+        role.system_assigned = '4'
+        role.save()
+        role.system_assigned = '6'
+        with self.captureOnCommitCallbacks(execute=True):
+            role.save()
+        self.assertEqual(
+            dict(SystemAdminAssignment.objects.filter(admin=self.admins[0]).values_list('system', 'is_active')),
+            {'4': False, '6': True},
+        )
@@ -0,0 +1,66 @@
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from .dedupe import dedupe_requests, find_duplicates
+from .models import AccessRequest, RequestedSystem, Directorate
+from .sla import refresh_due_dates
+
+User = get_user_model()
+
+class DuplicateRequestTest(TestCase):
+    def setUp(self):
+        self.it = Directorate.objects.create(name="IT", hod_email="hod@example.com")
+        self.user = User.objects.create_user(tsc_no="5001", email="u@example.com", full_name="Staff User", password="pass", directorate=self.it)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def submit(self, systems, request_type='new'):
+        return self.client.post('/access/submit/', {
+            'tsc_no': "5001", 'email': "u@example.com", 'designation': "Dev",
+            'request_type': request_type, 'systems': systems, 'access_levels': 'User',
+        })
+
+    def make_request(self, system, **statuses):
+        req = AccessRequest.objects.create(
+            requester=self.user, tsc_no=self.user.tsc_no, email=self.user.email, directorate=self.it,
+            designation="Dev", request_type='new',
+        )
+        RequestedSystem.objects.create(access_request=req, system=system, directorate=self.it, **statuses)
+        refresh_due_dates(req)
+        return req
+
+    def test_pending_and_granted_systems_are_skipped(self):
+        self.make_request('6', hod_status='approved', ict_status='approved', sysadmin_status='approved')
+        self.submit(['1', '4'])
+        self.assertEqual(RequestedSystem.objects.filter(system='4').count(), 1)
+
+        # 4 is pending, 6 is granted: only 2 is new
+        with self.assertNumQueries(1):
+            self.assertEqual(set(find_duplicates(self.user, ['2', '4', '6'], 'new')), {'4', '6'})
+        self.submit(['2', '4', '6'])
+        self.assertEqual(sorted(AccessRequest.objects.latest('pk').requested_systems.values_list('system', flat=True)), ['2'])
+        self.assertEqual(RequestedSystem.objects.filter(system='4').count(), 1)
+
+        # Everything is a duplicate: no request at all
+        response = self.submit(['1', '2'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessRequest.objects.count(), 3)
+
+        # A deactivation of held access is not a duplicate
+        self.submit(['6'], request_type='deactivate')
+        self.assertEqual(AccessRequest.objects.count(), 4)
+
+    def test_dedupe_closes_historical_duplicates(self):
+        first = self.make_request('4', hod_status='approved')
+        second = self.make_request('4')
+        held = self.make_request('6', hod_status='approved', ict_status='approved', sysadmin_status='approved')
+        again = self.make_request('6')
+
+        self.assertEqual(dedupe_requests(dry_run=True), (2, 0))
+        self.assertEqual(dedupe_requests(), (2, 2))
+        self.assertEqual(dedupe_requests(), (0, 0))
+
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'rejected_hod')
+        self.assertEqual(second.requested_systems.get().hod_comment, f"Duplicate of request #{first.pk}")
+        self.assertEqual(again.requested_systems.get().hod_comment, f"Duplicate of request #{held.pk}")
+        self.assertEqual(first.requested_systems.get().open_stage, 'ict')
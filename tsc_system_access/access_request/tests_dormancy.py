@@ -0,0 +1,83 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .models import AccessLog, AccessRequest, RequestedSystem, Directorate, UserRole, DormantAccessFinding, ProvisioningJob
+from .archive import archive_requests
+from .dormancy import record_findings, revoke_findings
+
+User = get_user_model()
+
+class DormantAccessTest(TestCase):
+    def setUp(self):
+        self.dir = Directorate.objects.create(name="ICT", hod_email="hod@example.com")
+        self.now = timezone.now()
+        self.active = self.grant("1001", last_seen=self.now - timedelta(days=5))
+        self.idle = self.grant("1002", last_seen=self.now - timedelta(days=200))
+        self.never = self.grant("1003", last_seen=None, granted=self.now - timedelta(days=120))
+        self.new = self.grant("1004", last_seen=None, granted=self.now - timedelta(days=3))
+
+        self.approver = User.objects.create_user(tsc_no="H1", email="h1@example.com", full_name="Quiet HOD", password="pass")
+        UserRole.objects.filter(user=self.approver).update(role='hod')
+
+    def grant(self, tsc_no, last_seen, granted=None):
+        user = User.objects.create_user(tsc_no=tsc_no, email=f"{tsc_no}@example.com", full_name=f"User {tsc_no}", password="pass")
+        req = AccessRequest.objects.create(
+            requester=user, tsc_no=tsc_no, email=user.email, directorate=self.dir, designation="Dev", request_type="new"
+        )
+        system = RequestedSystem.objects.create(
+            access_request=req, system='4', directorate=self.dir, sysadmin_status='approved',
+            sysadmin_decision_date=granted or self.now - timedelta(days=300),
+        )
+        if last_seen:
+            AccessLog.objects.create(user=user, action="Login", timestamp=last_seen)
+        return system
+
+    def test_findings_and_bulk_revoke(self):
+        self.assertEqual(record_findings(days=90), (2, 1))
+        flagged = set(DormantAccessFinding.objects.filter(kind='dormant_access').values_list('requested_system', flat=True))
+        self.assertEqual(flagged, {self.idle.pk, self.never.pk})
+        idle = DormantAccessFinding.objects.get(requested_system=self.idle)
+        self.assertEqual(idle.days_inactive, 200)
+        self.assertIsNone(DormantAccessFinding.objects.get(requested_system=self.never).days_inactive)
+        self.assertEqual(DormantAccessFinding.objects.get(kind='inactive_approver').user, self.approver)
+
+        record_findings(days=90)  # re-running replaces open findings
+        self.assertEqual(DormantAccessFinding.objects.count(), 3)
+
+        self.assertEqual(revoke_findings(DormantAccessFinding.objects.all(), self.approver).revoked, 2)
+        self.idle.refresh_from_db()
+        self.assertEqual(self.idle.sysadmin_status, 'revoked')
+        self.assertEqual(ProvisioningJob.objects.filter(action='revoke').count(), 2)
+        self.assertEqual(DormantAccessFinding.objects.filter(status='revoked').count(), 2)
+
+    def test_dismissed_findings_stay_dismissed(self):
+        record_findings(days=90)
+        DormantAccessFinding.objects.filter(requested_system=self.idle).update(status='dismissed', resolved_at=self.now)
+        DormantAccessFinding.objects.filter(kind='inactive_approver').update(status='dismissed', resolved_at=self.now)
+
+        self.assertEqual(record_findings(days=90), (1, 0))
+        self.assertEqual(
+            set(DormantAccessFinding.objects.filter(status='open').values_list('requested_system', flat=True)), {self.never.pk},
+        )
+
+        # Raised again once the dismissal is older than the re-review window
+        DormantAccessFinding.objects.filter(status='dismissed').update(resolved_at=self.now - timedelta(days=365))
+        self.assertEqual(record_findings(days=90), (2, 1))
+
+    def test_deactivations_are_not_flagged_and_findings_survive_archiving(self):
+        user = User.objects.get(tsc_no="1002")
+        leaver = AccessRequest.objects.create(
+            requester=user, tsc_no="1002", email=user.email, directorate=self.dir, designation="Dev", request_type="deactivate",
+        )
+        RequestedSystem.objects.create(
+            access_request=leaver, system='6', directorate=self.dir, sysadmin_status='approved',
+            sysadmin_decision_date=self.now - timedelta(days=300),
+        )
+        self.assertEqual(record_findings(days=90), (2, 1))
+
+        revoke_findings(DormantAccessFinding.objects.filter(requested_system=self.never), None)
+        ProvisioningJob.objects.update(status='succeeded')
+        self.assertEqual(archive_requests(self.now + timedelta(days=1)), 1)
+        finding = DormantAccessFinding.objects.get(status='revoked')
+        self.assertEqual((finding.requested_system, finding.system, finding.user.tsc_no), (None, '4', "1003"))
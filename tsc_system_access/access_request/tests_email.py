@@ -1,8 +1,13 @@
+import io
+from django.db import transaction
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.core import mail
-from .models import AccessRequest, RequestedSystem, Directorate, UserRole
+from django.core.management import call_command
+from .models import AccessRequest, RequestedSystem, Directorate, UserRole, NotificationPreference, NotificationOutbox
+from .notifications import load_requests, queue_email, queue_many, relay_outbox, render_notification, request_context
 from django.utils import timezone
+from datetime import timedelta
 
 User = get_user_model()
 
@@ -38,13 +43,15 @@ class EmailBundlingTest(TestCase):
         self.client.force_login(self.hod)
         
         # Approve System 1
-        response = self.client.post(f'/access/hod/decision/{self.sys1.id}/', {'action': 'approve'})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/access/hod/decision/{self.sys1.id}/', {'action': 'approve'})
         self.sys1.refresh_from_db()
         print(f"Sys1 Status: {self.sys1.hod_status}")
         self.assertEqual(self.sys1.hod_status, 'approved')
         
         # Approve System 2
-        response = self.client.post(f'/access/hod/decision/{self.sys2.id}/', {'action': 'approve'})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/access/hod/decision/{self.sys2.id}/', {'action': 'approve'})
         self.sys2.refresh_from_db()
         print(f"Sys2 Status: {self.sys2.hod_status}")
         self.assertEqual(self.sys2.hod_status, 'approved')
@@ -57,6 +64,8 @@ class EmailBundlingTest(TestCase):
         
         self.assertIn("New Approved Systems", mail.outbox[0].subject)
         self.assertIn("HOD Review Complete", mail.outbox[1].subject)
+        self.assertIn("- Active Directory: APPROVED\n- CRM: APPROVED", mail.outbox[1].body)
+        self.assertEqual(mail.outbox[1].alternatives[0][1], "text/html")
 
     def test_ict_bundled_email(self):
         # Setup: HOD approved both
@@ -68,11 +77,121 @@ class EmailBundlingTest(TestCase):
         self.client.force_login(self.ict)
         
         # Approve System 1
-        response = self.client.post(f'/access/ict/decision/{self.sys1.id}/', {'action': 'approve'})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/access/ict/decision/{self.sys1.id}/', {'action': 'approve'})
         self.assertEqual(len(mail.outbox), 0, "Should not send email yet")
         
         # Approve System 2
-        response = self.client.post(f'/access/ict/decision/{self.sys2.id}/', {'action': 'approve'})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/access/ict/decision/{self.sys2.id}/', {'action': 'approve'})
         self.assertEqual(len(mail.outbox), 1, "Should send 1 email (Requester)")
         
         self.assertIn("ICT Review Complete", mail.outbox[0].subject)
+
+
+class DigestNotificationTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.directorate = Directorate.objects.create(name="IT", hod_email="hod@example.com")
+        self.requester = User.objects.create_user(tsc_no="12345", email="req@example.com", full_name="Requester", password="pass", directorate=self.directorate)
+        NotificationPreference.objects.create(email="hod@example.com", delivery="digest")
+
+    def test_submission_skips_digest_hod_but_not_requester(self):
+        self.client.force_login(self.requester)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/access/submit/', {
+                'tsc_no': '12345', 'email': 'req@example.com', 'designation': 'Dev',
+                'request_type': 'new', 'systems': ['1', '4'], 'access_levels': 'User',
+            })
+        self.assertEqual(AccessRequest.objects.count(), 1)
+        self.assertEqual([m.to for m in mail.outbox], [["req@example.com"]])
+
+    def test_digest_groups_pending_items_per_mailbox(self):
+        for _ in range(3):
+            req = AccessRequest.objects.create(
+                requester=self.requester, tsc_no="12345", email="req@example.com",
+                directorate=self.directorate, designation="Dev", request_type="new"
+            )
+            RequestedSystem.objects.create(access_request=req, system='1')
+            RequestedSystem.objects.create(access_request=req, system='4')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('send_notification_digests', stdout=io.StringIO())
+        # A second run on the same day finds the digest already queued
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('send_notification_digests', stdout=io.StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["hod@example.com"])
+        self.assertIn("Active Directory: 3 pending", mail.outbox[0].body)
+        self.assertIn("Email: 3 pending", mail.outbox[0].body)
+        self.assertIsNotNone(NotificationPreference.objects.get(email="hod@example.com").last_digest_at)
+
+
+class NotificationOutboxTest(TestCase):
+    def test_same_key_is_sent_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_email("decision:1", "[TSC] Update", "Body", ["req@example.com"])
+            queue_email("decision:1", "[TSC] Update", "Body", ["req@example.com"])
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(NotificationOutbox.objects.get().status, "sent")
+
+    def test_rolled_back_decision_sends_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    queue_email("decision:2", "[TSC] Update", "Body", ["req@example.com"])
+                    raise RuntimeError("decision failed")
+            except RuntimeError:
+                pass
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+
+    def test_relay_reclaims_sending_rows_by_claim_time(self):
+        queue_email("decision:3", "[TSC] Update", "Body", ["req@example.com"])
+        # Queued long ago but only just claimed: another worker is still sending it
+        NotificationOutbox.objects.update(
+            status='sending', created_at=timezone.now() - timedelta(hours=1), claimed_at=timezone.now(),
+        )
+        self.assertEqual(relay_outbox(), 0)
+
+        NotificationOutbox.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(relay_outbox(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(NotificationOutbox.objects.get().attempts, 1)
+
+
+class NotificationRenderingTest(TestCase):
+    def setUp(self):
+        self.directorate = Directorate.objects.create(name="IT", hod_email="hod@example.com")
+        self.requests = []
+        for i in range(5):
+            user = User.objects.create_user(tsc_no=f"T{i}", email=f"t{i}@example.com", full_name=f"O'Brien {i}", password="pass")
+            req = AccessRequest.objects.create(
+                requester=user, tsc_no=user.tsc_no, email=user.email,
+                directorate=self.directorate, designation="Dev", request_type="new"
+            )
+            RequestedSystem.objects.create(access_request=req, system='4', hod_status='rejected')
+            self.requests.append(req)
+
+    def test_text_part_is_not_html_escaped(self):
+        subject, body, html = render_notification('hod_review_ict', request_context(self.requests[0]))
+        self.assertEqual(subject, "[TSC] New Approved Systems for O'Brien 0")
+        self.assertIn("Directorate: IT", body)
+        self.assertIn("O&#x27;Brien 0", html)
+
+    def test_bulk_path_uses_constant_queries(self):
+        with self.assertNumQueries(2):
+            contexts = [request_context(r) for r in load_requests([r.pk for r in self.requests])]
+        self.assertEqual(len(contexts), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            queued = queue_many('hod_review_requester', (
+                (f"bulk:{c['request_id']}", c, [c['requester_email']]) for c in contexts
+            ))
+        self.assertEqual(queued, 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn("- Email: REJECTED", mail.outbox[0].body)
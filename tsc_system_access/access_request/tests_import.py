@@ -0,0 +1,113 @@
+import io
+from openpyxl import Workbook
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from .models import Directorate, UserRole
+from .search import search_users
+from .user_import import import_users, read_csv, read_xlsx
+from .directory_sync import read_ldif, sync_directory
+from .directory_sync import read_csv as read_directory_csv
+
+User = get_user_model()
+
+CSV = """TSC Number,Full Name,Email,Directorate
+1001,Jane Achieng,jane@example.com,ICT
+1002,John Otieno,john@example.com,HR
+1003,,missing@example.com,ICT
+1004,Mary Wanjiku,taken@example.com,ICT
+1001,Jane Duplicate,dup@example.com,ICT
+"""
+
+class BulkUserImportTest(TestCase):
+    def setUp(self):
+        self.ict = Directorate.objects.create(name="ICT", hod_email="ict@example.com")
+        self.existing = User.objects.create_user(tsc_no="1002", email="john@example.com", full_name="John Old", password="pass")
+        User.objects.create_user(tsc_no="9999", email="taken@example.com", full_name="Someone Else", password="pass")
+
+    def test_csv_import_creates_updates_and_reports(self):
+        summary = import_users(read_csv(io.StringIO(CSV)), batch_size=2)
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (1, 1, 0))
+        self.assertEqual([line for line, _ in summary['errors']], [3, 4, 5, 6])
+
+        jane = User.objects.get(tsc_no="1001")
+        self.assertFalse(jane.has_usable_password())
+        self.assertEqual(jane.directorate, self.ict)
+        self.assertEqual(UserRole.objects.get(user=jane).role, 'staff')
+        self.assertEqual(list(search_users("achieng")), [jane])
+
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.full_name, "John Otieno")
+        self.assertEqual(list(search_users("otieno")), [self.existing])
+
+    def test_email_case_is_ignored_when_matching(self):
+        User.objects.create_user(tsc_no="2001", email="Mary.Wanjiku@example.com", full_name="Mary Wanjiku", password="pass")
+        rows = [
+            {'tsc_no': "2001", 'full_name': "Mary Wanjiku", 'email': "MARY.WANJIKU@example.com"},
+            {'tsc_no': "2002", 'full_name': "Mary Other", 'email': "mary.wanjiku@EXAMPLE.com"},
+        ]
+        summary = import_users(rows)
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (0, 0, 1))
+        self.assertEqual(summary['errors'], [(3, "2002: email mary.wanjiku@example.com already belongs to 2001")])
+        self.assertFalse(User.objects.filter(tsc_no="2002").exists())
+
+    def test_dry_run_saves_nothing(self):
+        summary = import_users(read_csv(io.StringIO(CSV)), dry_run=True)
+        self.assertEqual(summary['created'], 1)
+        self.assertFalse(User.objects.filter(tsc_no="1001").exists())
+
+    def test_admin_upload_xlsx(self):
+        workbook = Workbook()
+        workbook.active.append(["tsc_no", "full_name", "email", "directorate"])
+        workbook.active.append(["2001", "Peter Kamau", "peter@example.com", "ICT"])
+        data = io.BytesIO()
+        workbook.save(data)
+        self.assertEqual(len(list(read_xlsx(io.BytesIO(data.getvalue())))), 1)
+
+        client = Client()
+        client.force_login(User.objects.create_superuser(tsc_no="ADMIN", email="admin@example.com", full_name="Admin", password="pass"))
+        upload = SimpleUploadedFile("hr.xlsx", data.getvalue())
+        response = client.post('/admin/access_request/customuser/import/', {'extract': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['summary']['created'], 1)
+        self.assertTrue(User.objects.filter(tsc_no="2001", directorate=self.ict).exists())
+
+
+LDIF = """dn: uid=3001,ou=People,dc=tsc
+uid: 3001
+department: ICT
+employeeType: HOD
+
+dn: uid=3002,ou=People,dc=tsc
+uid: 3002
+department: ICT
+manager: uid=3001,ou=People,dc=tsc
+"""
+
+class DirectorySyncTest(TestCase):
+    def setUp(self):
+        self.ict = Directorate.objects.create(name="ICT", hod_email="old@example.com")
+        self.hod = User.objects.create_user(tsc_no="3001", email="hod@example.com", full_name="Head ICT", password="pass")
+        self.staff = User.objects.create_user(tsc_no="3002", email="staff@example.com", full_name="ICT Staff", password="pass")
+
+    def test_ldif_snapshot_sets_hod_and_reporting_line(self):
+        summary = sync_directory(read_ldif(io.StringIO(LDIF)))
+        self.assertEqual((summary['changed'], summary['applied']), (2, 2))
+        self.assertEqual(UserRole.objects.get(user=self.hod).role, 'hod')
+        self.assertEqual(UserRole.objects.get(user=self.staff).hod, self.hod)
+        self.staff.refresh_from_db()
+        self.assertEqual(self.staff.directorate, self.ict)
+        self.ict.refresh_from_db()
+        self.assertEqual(self.ict.hod_email, "hod@example.com")
+
+    def test_unchanged_snapshot_is_skipped(self):
+        sync_directory(read_ldif(io.StringIO(LDIF)))
+        with self.assertNumQueries(2):  # directorate names + stored hashes
+            summary = sync_directory(read_ldif(io.StringIO(LDIF)))
+        self.assertEqual(summary['changed'], 0)
+
+        csv_snapshot = "tsc_no,directorate,manager,is_hod\n3001,ICT,,yes\n3002,Finance,3001,no\n"
+        summary = sync_directory(read_directory_csv(io.StringIO(csv_snapshot)))
+        self.assertEqual(summary['changed'], 1)  # 3001 is identical; CSV and LDIF records hash the same
+        self.staff.refresh_from_db()
+        self.assertEqual(self.staff.directorate.name, "Finance")
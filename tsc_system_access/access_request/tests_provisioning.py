@@ -0,0 +1,124 @@
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .models import AccessRequest, RequestedSystem, Directorate, UserRole, ProvisioningJob
+from . import provisioning
+from .archive import archive_requests
+from .provisioning import STUB_CONNECTOR, Connector, ProvisioningError, get_connector, run_jobs
+
+User = get_user_model()
+
+class FlakyConnector(Connector):
+    failures = 1
+
+    def grant(self, requested_system):
+        if FlakyConnector.failures:
+            FlakyConnector.failures -= 1
+            raise ProvisioningError("directory timeout")
+        return "granted"
+
+
+class ProvisioningTest(TestCase):
+    def setUp(self):
+        self.dir = Directorate.objects.create(name="ICT", hod_email="hod@example.com")
+        self.admin = User.objects.create_user(tsc_no="SA1", email="sa@example.com", full_name="Email Admin", password="pass")
+        UserRole.objects.filter(user=self.admin).update(role='sys_admin', system_assigned='4')
+        self.staff = User.objects.create_user(tsc_no="5001", email="u@example.com", full_name="Staff User", password="pass")
+        req = AccessRequest.objects.create(
+            requester=self.staff, tsc_no="5001", email=self.staff.email, directorate=self.dir,
+            designation="Dev", request_type="new", status="pending_ict",
+        )
+        self.system = RequestedSystem.objects.create(access_request=req, system='4', directorate=self.dir, hod_status='approved', ict_status='sent_admin')
+        self.client = Client()
+        self.client.force_login(self.admin)
+        # Test settings: every system goes through the stub connector
+        patcher = mock.patch.dict(provisioning.PROVISIONING_CONNECTORS, {code: STUB_CONNECTOR for code, _ in RequestedSystem.SYSTEM_CHOICES})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        get_connector.cache_clear()
+        self.addCleanup(get_connector.cache_clear)
+
+    def decide(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/access/system-admin/decision/{self.system.pk}/', {'action': action})
+
+    def test_approval_is_provisioned_and_written_back(self):
+        self.decide('approve')
+        self.decide('approve')  # a repeated decision does not queue a second job
+        self.assertEqual(ProvisioningJob.objects.filter(status='pending').count(), 1)
+
+        self.assertEqual(run_jobs(workers=1), (1, 0))
+        self.assertEqual(list(get_connector('4').calls), [('4', 'grant', '5001')])
+        self.system.refresh_from_db()
+        self.assertEqual(self.system.provisioning_status, 'done')
+        self.assertIsNotNone(self.system.provisioned_at)
+
+    def test_rejection_queues_nothing(self):
+        self.decide('reject')
+        self.assertFalse(ProvisioningJob.objects.exists())
+
+    def test_failed_job_is_retried_later(self):
+        FlakyConnector.failures = 1
+        with mock.patch.dict(provisioning.PROVISIONING_CONNECTORS, {'4': 'access_request.tests_provisioning.FlakyConnector'}):
+            self.decide('approve')
+            self.assertEqual(run_jobs(workers=1), (0, 1))
+            job = ProvisioningJob.objects.get()
+            self.assertEqual((job.status, job.attempts, job.last_error), ('pending', 1, "directory timeout"))
+
+            self.assertEqual(run_jobs(workers=1), (0, 0))  # backoff: not due yet
+            ProvisioningJob.objects.update(next_attempt_at=job.created_at)
+            self.assertEqual(run_jobs(workers=1), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), ('succeeded', "granted"))
+
+    def test_revocation_supersedes_a_waiting_grant(self):
+        FlakyConnector.failures = 1
+        with mock.patch.dict(provisioning.PROVISIONING_CONNECTORS, {'4': 'access_request.tests_provisioning.FlakyConnector'}):
+            self.decide('approve')
+            self.assertEqual(run_jobs(workers=1), (0, 1))  # the grant is now backing off
+        get_connector.cache_clear()
+        RequestedSystem.objects.filter(pk=self.system.pk).update(sysadmin_status='revoked')
+        provisioning.enqueue(RequestedSystem.objects.filter(pk=self.system.pk), action='revoke')
+        self.assertEqual(ProvisioningJob.objects.get(action='grant').status, 'superseded')
+
+        # While a job for the system is running, the next one waits
+        ProvisioningJob.objects.filter(action='grant').update(status='running', started_at=timezone.now())
+        self.assertEqual(run_jobs(workers=1), (0, 0))
+        ProvisioningJob.objects.filter(action='grant').update(status='superseded')
+        self.assertEqual(run_jobs(workers=1), (1, 0))
+        self.assertEqual(list(get_connector('4').calls), [('4', 'revoke', '5001')])
+
+        # A grant that no longer matches the decision is not run
+        ProvisioningJob.objects.create(requested_system=self.system, system='4', action='grant')
+        self.assertEqual(run_jobs(workers=1), (0, 0))
+        self.assertEqual(ProvisioningJob.objects.filter(action='grant', status='superseded').count(), 2)
+        self.assertEqual(len(get_connector('4').calls), 1)
+
+    def test_unconfigured_system_fails_without_retry(self):
+        with mock.patch.dict(provisioning.PROVISIONING_CONNECTORS, {'4': ''}):
+            self.decide('approve')
+            self.assertEqual(run_jobs(workers=1), (0, 1))
+        job = ProvisioningJob.objects.get()
+        self.assertEqual((job.status, job.last_error), ('failed', "No connector configured for Email"))
+        self.system.refresh_from_db()
+        self.assertEqual(self.system.provisioning_status, 'failed')
+
+    def test_failed_revocation_blocks_archiving(self):
+        self.decide('approve')
+        run_jobs(workers=1)
+        RequestedSystem.objects.filter(pk=self.system.pk).update(sysadmin_status='revoked')
+        provisioning.enqueue(RequestedSystem.objects.filter(pk=self.system.pk), action='revoke')
+        ProvisioningJob.objects.filter(action='revoke').update(status='failed', last_error="account locked")
+        later = timezone.now() + timedelta(days=1)
+        self.assertEqual(archive_requests(later), 0)
+
+        # Once a retry succeeds the request is archived; the jobs stay as the record
+        ProvisioningJob.objects.filter(action='revoke').update(status='pending')
+        self.assertEqual(run_jobs(workers=1), (1, 0))
+        self.assertEqual(archive_requests(later), 1)
+        self.assertEqual(
+            sorted(ProvisioningJob.objects.values_list('action', 'status', 'tsc_no', 'requested_system')),
+            [('grant', 'succeeded', "5001", None), ('revoke', 'succeeded', "5001", None)],
+        )
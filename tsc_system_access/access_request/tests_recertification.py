@@ -0,0 +1,131 @@
+from datetime import timedelta
+from django.utils import timezone
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.utils.timezone import localdate
+from .models import (
+    AccessRequest, NotificationOutbox, ProvisioningJob, RecertificationItem, RequestedSystem, Directorate, UserRole,
+)
+from .archive import archive_requests
+from .recertification import decide, expire_campaigns, generate_items, start_campaign
+
+User = get_user_model()
+
+class RecertificationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.it = Directorate.objects.create(name="IT", hod_email="it-hod@example.com")
+        self.hr = Directorate.objects.create(name="HR", hod_email="hr-hod@example.com")
+        self.hod = User.objects.create_user(tsc_no="H1", email="hod@example.com", full_name="Hod", password="pass", directorate=self.it)
+        UserRole.objects.filter(user=self.hod).update(role='hod', directorate=self.it)
+        self.grants = []
+        for n, (directorate, system) in enumerate([(self.it, '1'), (self.it, '4'), (self.it, '6'), (self.hr, '1'), (self.hr, '2')]):
+            self.grants.append(self.grant(f"70{n}", directorate, system))
+        # Neither a pending item nor an approved deactivation is an entitlement
+        self.grant("800", self.it, '2', sysadmin_status='pending')
+        self.grant("801", self.it, '3', request_type='deactivate')
+        self.client = Client()
+        self.client.force_login(self.hod)
+
+    def tearDown(self):
+        cache.clear()
+
+    def grant(self, tsc_no, directorate, system, request_type='new', sysadmin_status='approved'):
+        user = User.objects.create_user(tsc_no=tsc_no, email=f"{tsc_no}@example.com", full_name=f"Staff {tsc_no}", password="pass", directorate=directorate)
+        req = AccessRequest.objects.create(
+            requester=user, tsc_no=tsc_no, email=user.email, directorate=directorate, designation="Clerk", request_type=request_type,
+        )
+        return RequestedSystem.objects.create(
+            access_request=req, system=system, directorate=directorate,
+            hod_status='approved', ict_status='approved', sysadmin_status=sysadmin_status,
+        )
+
+    def test_campaign_generation_is_chunked_and_resumable(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            campaign = start_campaign("Q3", chunk_size=2)
+        self.assertEqual((campaign.status, campaign.total_items), ('open', 5))
+        self.assertEqual(set(campaign.items.values_list('requested_system', flat=True)), {g.pk for g in self.grants})
+        self.assertEqual(campaign.items.filter(reviewer=self.hod).count(), 3)
+        # The HOD, and the HR mailbox (no HOD user), get one email each
+        self.assertEqual(sorted(r for n in NotificationOutbox.objects.all() for r in n.recipients), ["hod@example.com", "hr-hod@example.com"])
+        # Running again adds nothing
+        self.assertEqual(generate_items(campaign), 0)
+        self.assertEqual(campaign.items.count(), 5)
+
+    def test_hod_certifies_and_revokes_own_directorate(self):
+        campaign = start_campaign("Q3")
+        items = {item.requested_system_id: item.pk for item in campaign.items.all()}
+        response = self.client.get('/access/hod/recertification/')
+        self.assertEqual(response.context['page'].paginator.count, 3)
+
+        self.client.post('/access/hod/recertification/', {'action': 'certify', 'items': [items[self.grants[0].pk]]})
+        # An item of another directorate is out of scope and ignored
+        self.client.post('/access/hod/recertification/', {
+            'action': 'revoke', 'items': [items[self.grants[1].pk], items[self.grants[3].pk]], 'comment': "Moved teams",
+        })
+        self.assertEqual(
+            dict(campaign.items.values_list('requested_system', 'decision')),
+            {self.grants[0].pk: 'certified', self.grants[1].pk: 'revoked', self.grants[2].pk: 'pending',
+             self.grants[3].pk: 'pending', self.grants[4].pk: 'pending'},
+        )
+        self.grants[1].refresh_from_db()
+        self.assertEqual((self.grants[1].sysadmin_status, self.grants[1].sysadmin_comment), ('revoked', "Moved teams"))
+        self.assertTrue(ProvisioningJob.objects.filter(requested_system=self.grants[1], action='revoke').exists())
+
+        # "All pending" certifies the rest of the directorate only
+        self.client.post('/access/hod/recertification/', {'action': 'certify', 'all_pending': '1'})
+        self.assertEqual(campaign.items.filter(directorate=self.it, decision='pending').count(), 0)
+        self.assertEqual(campaign.items.filter(directorate=self.hr, decision='pending').count(), 2)
+
+    def test_expiry_revokes_pending_items_in_batches(self):
+        campaign = start_campaign("Q3", due_date=localdate() - timedelta(days=1))
+        campaign.items.filter(requested_system=self.grants[0]).update(decision='certified')
+
+        self.assertEqual(expire_campaigns(chunk_size=2), {campaign.pk: 4})
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, 'closed')
+        self.assertEqual(RequestedSystem.objects.filter(sysadmin_status='revoked').count(), 4)
+        self.assertEqual(ProvisioningJob.objects.filter(action='revoke').count(), 4)
+        self.assertFalse(RecertificationItem.objects.filter(decision='pending').exists())
+        self.assertEqual(expire_campaigns(), {})
+
+    def test_decisions_survive_archiving(self):
+        campaign = start_campaign("Q3")
+        request_id = self.grants[0].access_request_id
+        decide(campaign.items.filter(requested_system=self.grants[0]), 'revoked', decided_by=self.hod)
+        ProvisioningJob.objects.update(status='succeeded')
+        self.assertEqual(archive_requests(timezone.now() + timedelta(days=1)), 1)
+        self.assertFalse(AccessRequest.objects.filter(pk=request_id).exists())
+
+        item = RecertificationItem.objects.get(request_ref=request_id)
+        self.assertEqual(
+            (item.requested_system, item.tsc_no, item.system, item.directorate, item.decision, item.decided_by),
+            (None, "700", '1', self.it, 'revoked', self.hod),
+        )
+        self.assertEqual(campaign.items.count(), 5)
+
+    def test_hod_cannot_certify_own_access(self):
+        own = RequestedSystem.objects.create(
+            access_request=AccessRequest.objects.create(
+                requester=self.hod, tsc_no="H1", email=self.hod.email, directorate=self.it, designation="Director", request_type='new',
+            ),
+            system='6', directorate=self.it, hod_status='approved', ict_status='approved', sysadmin_status='approved',
+        )
+        admin = User.objects.create_superuser(tsc_no="ADMIN", email="admin@example.com", full_name="Admin", password="pass")
+        campaign = start_campaign("Q3")
+        item = campaign.items.get(requested_system=own)
+        self.assertIsNone(item.reviewer)  # left to the admins, who are told instead of the HOD
+        counts = {n.recipients[0]: n.body for n in NotificationOutbox.objects.all()}
+        self.assertIn("IT (HOD's own access): 1 entitlement(s)", counts["admin@example.com"])
+        self.assertIn("IT: 3 entitlement(s)", counts["hod@example.com"])
+
+        response = self.client.get('/access/hod/recertification/')
+        self.assertEqual(response.context['page'].paginator.count, 3)
+        self.assertEqual(response.context['progress']['pending'], 3)
+        self.client.post('/access/hod/recertification/', {'action': 'certify', 'all_pending': '1'})
+        self.client.post('/access/hod/recertification/', {'action': 'certify', 'items': [item.pk]})
+        self.assertEqual(campaign.items.get(pk=item.pk).decision, 'pending')
+        self.assertEqual(decide(campaign.items.filter(pk=item.pk), 'certified', decided_by=self.hod), 0)
+
+        self.assertEqual(decide(campaign.items.filter(pk=item.pk), 'certified', decided_by=admin), 1)
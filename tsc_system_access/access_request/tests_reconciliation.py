@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from .models import AccessRequest, RequestedSystem, Directorate
+from .reconciliation import read_csv_export, read_json_export, reconcile
+
+User = get_user_model()
+
+class ReconciliationTest(TestCase):
+    def setUp(self):
+        self.dir = Directorate.objects.create(name="ICT", hod_email="hod@example.com")
+        self.grant("1001", 'approved')
+        self.grant("1002", 'approved')
+        self.grant("1003", 'revoked')
+
+    def grant(self, tsc_no, status, request_type="new"):
+        user = User.objects.filter(tsc_no=tsc_no).first() or User.objects.create_user(
+            tsc_no=tsc_no, email=f"{tsc_no}@example.com", full_name=f"User {tsc_no}", password="pass",
+        )
+        req = AccessRequest.objects.create(
+            requester=user, tsc_no=tsc_no, email=user.email, directorate=self.dir, designation="Dev", request_type=request_type
+        )
+        RequestedSystem.objects.create(access_request=req, system='4', directorate=self.dir, sysadmin_status=status)
+
+    def run_report(self, accounts):
+        report = io.StringIO()
+        counts = reconcile('4', accounts, report)
+        rows = list(csv.reader(io.StringIO(report.getvalue())))[1:]
+        return counts, {(row[1], row[2]) for row in rows}
+
+    def test_csv_export_discrepancies(self):
+        export = "tsc_no,status\n1001,active\n1003,active\n9999,active\n9998,disabled\n"
+        counts, rows = self.run_report(read_csv_export(io.StringIO(export)))
+        self.assertEqual(counts['accounts'], 4)
+        self.assertEqual(rows, {
+            ("1003", "Unrevoked access"),
+            ("9999", "Orphan account"),
+            ("1002", "Missing grant"),
+        })
+
+    def test_approved_deactivation_counts_as_revoked(self):
+        self.grant("1002", 'approved', request_type="deactivate")
+        counts, rows = self.run_report([{"tsc_no": "1001"}, {"tsc_no": "1002", "status": "active"}])
+        self.assertEqual(rows, {("1002", "Unrevoked access")})
+        counts, rows = self.run_report([{"tsc_no": "1001"}, {"tsc_no": "1002", "status": "disabled"}])
+        self.assertEqual(rows, set())
+
+    def test_streamed_json_array_across_chunks(self):
+        accounts = [{"tsc_no": "1001"}, {"tsc_no": "1002", "status": "disabled"}, {"tsc_no": "1003", "status": "locked"}]
+        parsed = list(read_json_export(io.StringIO(json.dumps(accounts, indent=2)), chunk_size=7))
+        self.assertEqual(parsed, accounts)
+        counts, rows = self.run_report(parsed)
+        self.assertEqual(rows, {("1002", "Missing grant")})
+        self.assertEqual(list(read_json_export(io.StringIO('{"tsc_no": "1"}\n{"tsc_no": "2"}\n'))), [{"tsc_no": "1"}, {"tsc_no": "2"}])
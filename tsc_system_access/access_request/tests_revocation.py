@@ -0,0 +1,93 @@
+from datetime import timedelta
+from django.test import TestCase, Client
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from .models import (
+    AccessRequest, BulkRevocation, BulkRevocationItem, NotificationOutbox, ProvisioningJob, RequestedSystem, Directorate,
+    SystemAdminAssignment, UserRole,
+)
+from .archive import archive_requests
+from .revocation import create_revocation, revoke, run_queued, run_revocation
+
+User = get_user_model()
+
+class BulkRevocationTest(TestCase):
+    def setUp(self):
+        self.it = Directorate.objects.create(name="IT", hod_email="hod@example.com")
+        self.sysadmin = User.objects.create_user(tsc_no="SA1", email="sa@example.com", full_name="Sys Admin", password="pass")
+        UserRole.objects.filter(user=self.sysadmin).update(role='sys_admin')
+        SystemAdminAssignment.objects.create(admin=self.sysadmin, system='1')
+        self.requests = [self.grant(f"90{n}", ['1', '4', '6']) for n in range(3)]
+
+    def grant(self, tsc_no, systems, request_type='new'):
+        user = User.objects.create_user(tsc_no=tsc_no, email=f"{tsc_no}@example.com", full_name=f"Staff {tsc_no}", password="pass", directorate=self.it)
+        req = AccessRequest.objects.create(
+            requester=user, tsc_no=tsc_no, email=user.email, directorate=self.it, designation="Clerk", request_type=request_type, status='approved',
+        )
+        for system in systems:
+            RequestedSystem.objects.create(
+                access_request=req, system=system, directorate=self.it,
+                hod_status='approved', ict_status='approved', sysadmin_status='approved',
+            )
+        return req
+
+    def test_chunked_run_syncs_status_notifies_and_audits(self):
+        first = self.requests[0]
+        targets = RequestedSystem.objects.exclude(access_request=self.requests[2], system='6')
+        revocation = create_revocation("Directorate closed", source='admin', requested_systems=targets)
+        self.assertEqual(revocation.total, 8)
+        # Revoked by someone else after it was queued: skipped, not revoked twice
+        first.requested_systems.filter(system='4').update(sysadmin_status='revoked')
+
+        reported = []
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(run_revocation(revocation, chunk_size=2, progress=reported.append))
+        revocation.refresh_from_db()
+        self.assertEqual((revocation.status, revocation.processed, revocation.revoked), ('done', 8, 7))
+        self.assertEqual(revocation.summary, {'1': 3, '4': 2, '6': 2})
+        self.assertEqual([r.processed for r in reported], [3, 6, 8])  # a holder's items stay in one chunk
+        self.assertEqual(BulkRevocationItem.objects.filter(status='skipped').count(), 1)
+        self.assertEqual(ProvisioningJob.objects.filter(action='revoke').count(), 7)
+
+        statuses = dict(AccessRequest.objects.values_list('pk', 'status'))
+        self.assertEqual([statuses[r.pk] for r in self.requests], ['revoked', 'revoked', 'approved'])
+        # One email per holder and one for the system admin
+        recipients = sorted(r for n in NotificationOutbox.objects.all() for r in n.recipients)
+        self.assertEqual(recipients, ["900@example.com", "901@example.com", "902@example.com", "sa@example.com"])
+
+    def test_large_revocations_are_queued_for_the_worker(self):
+        revocation = revoke(RequestedSystem.objects.all(), "Audit finding", inline_max=5)
+        self.assertEqual((revocation.status, revocation.total), ('queued', 9))
+        self.assertEqual(RequestedSystem.objects.filter(sysadmin_status='approved').count(), 9)
+
+        self.assertEqual(run_queued(chunk_size=4), 1)
+        self.assertEqual(BulkRevocation.objects.get().status, 'done')
+        self.assertFalse(RequestedSystem.objects.filter(sysadmin_status='approved').exists())
+
+    def test_admin_action_runs_the_pipeline(self):
+        admin = User.objects.create_superuser(tsc_no="ADMIN", email="admin@example.com", full_name="Admin", password="pass")
+        client = Client()
+        client.force_login(admin)
+        selected = list(self.requests[0].requested_systems.values_list('pk', flat=True))
+        client.post('/admin/access_request/requestedsystem/', {'action': 'revoke_access', '_selected_action': selected})
+        self.assertEqual(BulkRevocation.objects.get().requested_by, admin)
+        self.assertEqual(AccessRequest.objects.get(pk=self.requests[0].pk).status, 'revoked')
+
+    def test_audit_rows_survive_archiving(self):
+        revoke(self.requests[0].requested_systems.all(), "Left TSC")
+        # Not while the de-provisioning is still queued
+        self.assertEqual(archive_requests(timezone.now() + timedelta(days=1)), 0)
+        ProvisioningJob.objects.update(status='succeeded')
+        self.assertEqual(archive_requests(timezone.now() + timedelta(days=1)), 1)
+        self.assertFalse(AccessRequest.objects.filter(pk=self.requests[0].pk).exists())
+        self.assertEqual(
+            sorted(BulkRevocationItem.objects.values_list('system', 'tsc_no', 'request_ref', 'requested_system', 'status')),
+            [(code, "900", self.requests[0].pk, None, 'revoked') for code in ('1', '4', '6')],
+        )
+
+    def test_approved_deactivations_are_left_alone(self):
+        leaver = self.grant("950", ['1'], request_type='deactivate')
+        revocation = revoke(RequestedSystem.objects.filter(directorate=self.it), "Directorate closed")
+        self.assertEqual(revocation.total, 9)
+        self.assertEqual(leaver.requested_systems.get().sysadmin_status, 'approved')
+        self.assertFalse(ProvisioningJob.objects.filter(requested_system__access_request=leaver).exists())
@@ -0,0 +1,42 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from .models import AccessRequest, Directorate, UserSearchToken
+from .search import filter_by_search, search_users
+
+User = get_user_model()
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.directorate = Directorate.objects.create(name="IT", hod_email="hod@example.com")
+        self.amina = User.objects.create_user(tsc_no="100200", email="a@example.com", full_name="Amina Wanjiru Otieno", password="pass")
+        self.ann = User.objects.create_user(tsc_no="100300", email="b@example.com", full_name="Ann Wambui", password="pass")
+        self.joe = User.objects.create_user(tsc_no="900200", email="c@example.com", full_name="José Kamau", password="pass")
+        for user in (self.amina, self.ann, self.joe):
+            AccessRequest.objects.create(
+                requester=user, tsc_no=user.tsc_no, email=user.email,
+                directorate=self.directorate, designation="Dev", request_type="new"
+            )
+
+    def test_tokens_maintained_on_save(self):
+        self.assertEqual(sorted(self.ann.search_tokens.values_list('token', flat=True)), ['ann', 'wambui'])
+        self.ann.full_name = "Ann Njeri"
+        self.ann.save()
+        self.assertEqual(sorted(self.ann.search_tokens.values_list('token', flat=True)), ['ann', 'njeri'])
+
+    def test_tsc_prefix_and_exact(self):
+        requests = filter_by_search(AccessRequest.objects.all(), "1002")
+        self.assertEqual([r.requester for r in requests], [self.amina])
+        self.assertEqual(list(search_users("100")), [self.amina, self.ann])
+
+    def test_name_search_is_accent_insensitive_and_ranked(self):
+        self.assertEqual(list(search_users("jose")), [self.joe])
+        self.assertEqual(list(search_users("wa otieno")), [self.amina, self.ann])
+        requests = filter_by_search(AccessRequest.objects.all(), "kamau")
+        self.assertEqual([r.requester for r in requests], [self.joe])
+
+    def test_filters_require_every_word(self):
+        requests = filter_by_search(AccessRequest.objects.all(), "wa otieno")
+        self.assertEqual([r.requester for r in requests], [self.amina])
+        # "wa" prefixes two of Amina's names but does not stand in for "ann"
+        self.assertFalse(filter_by_search(AccessRequest.objects.all(), "ann wa otieno").exists())
+        self.assertEqual([r.requester for r in filter_by_search(AccessRequest.objects.all(), "wambui ann")], [self.ann])
@@ -0,0 +1,139 @@
+from datetime import date, datetime, timedelta
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .escalation import run_escalations
+from .locks import acquire_lock
+from .models import AccessRequest, DirectorateSLA, EscalationNotice, NotificationOutbox, RequestedSystem, Directorate, UserRole
+from .sla import BusinessCalendar, build_calendar, recompute_due_dates, refresh_due_dates
+
+User = get_user_model()
+
+class SLADeadlineTest(TestCase):
+    def setUp(self):
+        self.it = Directorate.objects.create(name="IT", hod_email="it@example.com")
+        self.user = User.objects.create_user(tsc_no="5001", email="u@example.com", full_name="Staff User", password="pass", directorate=self.it)
+        self.hod = User.objects.create_user(tsc_no="H1", email="hod@example.com", full_name="Hod", password="pass")
+        UserRole.objects.filter(user=self.hod).update(role='hod', directorate=self.it)
+
+    def at(self, day, hour=9):
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()).replace(hour=hour))
+
+    def make_request(self, submitted_at, systems=('4',)):
+        req = AccessRequest.objects.create(
+            requester=self.user, tsc_no=self.user.tsc_no, email=self.user.email, directorate=self.it,
+            designation="Dev", request_type='new',
+        )
+        AccessRequest.objects.filter(pk=req.pk).update(submitted_at=submitted_at)
+        req.refresh_from_db()
+        for system in systems:
+            RequestedSystem.objects.create(access_request=req, system=system, directorate=self.it)
+        refresh_due_dates(req)
+        return req
+
+    def test_calendar_skips_weekends_and_holidays(self):
+        # Thu 2026-12-24 + 3 business days: 25th/26th are holidays, 26th/27th the weekend -> Mon 28, Tue 29, Wed 30
+        build_calendar(date(2026, 12, 1), date(2027, 1, 31))
+        calendar = BusinessCalendar(date(2026, 12, 1), date(2027, 1, 31))
+        self.assertEqual(calendar.add_business_days(date(2026, 12, 24), 3), date(2026, 12, 30))
+        self.assertEqual(calendar.add_business_days(date(2026, 12, 26), 1), date(2026, 12, 28))
+        # Outside the table: Monday-Friday only
+        self.assertEqual(calendar.add_business_days(date(2027, 3, 5), 1), date(2027, 3, 8))
+
+    def test_deadline_follows_stage_transitions(self):
+        build_calendar(date(2026, 12, 1), date(2027, 1, 31))
+        req = self.make_request(self.at(date(2026, 12, 24)))
+        system = req.requested_systems.get()
+        self.assertEqual((system.open_stage, system.due_at), ('hod', self.at(date(2026, 12, 30))))
+        self.assertEqual(req.due_at, system.due_at)
+
+        client = Client()
+        client.force_login(self.hod)
+        client.post(f'/access/hod/decision/{system.pk}/', {'action': 'approve'})
+        system.refresh_from_db()
+        req.refresh_from_db()
+        self.assertEqual(system.open_stage, 'ict')
+        self.assertGreater(system.due_at, timezone.now())
+        self.assertEqual(req.due_at, system.due_at)
+
+        client.post(f'/access/hod/decision/{system.pk}/', {'action': 'reject'})
+        req.refresh_from_db()
+        self.assertIsNone(req.due_at)
+        self.assertEqual(req.requested_systems.get().open_stage, '')
+
+    def test_overdue_filter_and_directorate_sla(self):
+        late = self.make_request(timezone.now() - timedelta(days=10))
+        self.make_request(timezone.now())
+        client = Client()
+        client.force_login(User.objects.create_superuser(tsc_no="ADMIN", email="admin@example.com", full_name="Admin", password="pass"))
+        response = client.get('/admin/access_request/accessrequest/', {'turnaround': 'overdue'})
+        self.assertEqual(list(response.context['cl'].result_list), [late])
+
+        DirectorateSLA.objects.create(directorate=self.it, hod_days=20, ict_days=3, sys_admin_days=3)
+        self.assertEqual(recompute_due_dates(directorate_ids=[self.it.pk]), 2)
+        self.assertFalse(AccessRequest.objects.filter(due_at__lt=timezone.now()).exists())
+
+
+class EscalationTest(TestCase):
+    def setUp(self):
+        self.it = Directorate.objects.create(name="IT", hod_email="it-hod@example.com")
+        self.user = User.objects.create_user(tsc_no="5001", email="u@example.com", full_name="Staff User", password="pass")
+        self.admin = User.objects.create_superuser(tsc_no="ADMIN", email="admin@example.com", full_name="Admin", password="pass")
+        self.now = timezone.now()
+        self.late = [self.make_request(self.now - timedelta(days=10)) for _ in range(2)]
+        self.make_request(self.now)
+
+    def make_request(self, submitted_at):
+        req = AccessRequest.objects.create(
+            requester=self.user, tsc_no=self.user.tsc_no, email=self.user.email, directorate=self.it,
+            designation="Dev", request_type='new',
+        )
+        AccessRequest.objects.filter(pk=req.pk).update(submitted_at=submitted_at)
+        req.refresh_from_db()
+        RequestedSystem.objects.create(access_request=req, system='4', directorate=self.it)
+        refresh_due_dates(req)
+        return req
+
+    def test_levels_are_sent_once_and_bundled(self):
+        self.assertEqual(run_escalations(now=self.now), {'escalated': 2, 'emails': 1})
+        self.assertEqual(run_escalations(now=self.now), {'escalated': 0, 'emails': 0})
+        self.assertEqual(NotificationOutbox.objects.get().recipients, ["it-hod@example.com"])
+
+        later = self.now + timedelta(hours=49)
+        self.assertEqual(run_escalations(now=later), {'escalated': 2, 'emails': 1})
+        self.assertEqual(NotificationOutbox.objects.latest('pk').recipients, ["admin@example.com"])
+        self.assertEqual(
+            set(RequestedSystem.objects.filter(access_request__in=self.late).values_list('escalation_level', 'assigned_to')),
+            {(2, self.admin.pk)},
+        )
+        self.assertEqual(EscalationNotice.objects.count(), 4)
+
+        # A decision opens the next stage with a clean slate
+        system = RequestedSystem.objects.filter(access_request=self.late[0]).get()
+        RequestedSystem.objects.filter(pk=system.pk).update(hod_status='approved', hod_decision_date=later)
+        refresh_due_dates(self.late[0])
+        system.refresh_from_db()
+        self.assertEqual((system.open_stage, system.escalation_level, system.assigned_to), ('ict', 0, None))
+
+    def test_email_limit_and_lock(self):
+        self.assertEqual(run_escalations(now=self.now, max_emails=0), {'escalated': 0, 'emails': 0})
+        self.assertFalse(EscalationNotice.objects.exists())
+
+        self.assertTrue(acquire_lock('escalations', 60, owner='node-a'))
+        self.assertFalse(acquire_lock('escalations', 60, owner='node-b'))
+        self.assertTrue(acquire_lock('escalations', 60, owner='node-a'))
+        self.assertTrue(acquire_lock('escalations', -1, owner='node-a'))
+        self.assertTrue(acquire_lock('escalations', 60, owner='node-b'))
+
+    def test_stage_without_a_mailbox_goes_to_the_overall_admins(self):
+        Directorate.objects.filter(pk=self.it.pk).update(hod_email='')
+        self.assertEqual(run_escalations(now=self.now), {'escalated': 2, 'emails': 1})
+        self.assertEqual(NotificationOutbox.objects.get().recipients, ["admin@example.com"])
+        self.assertEqual([n.recipients for n in EscalationNotice.objects.all()], [["admin@example.com"]] * 2)
+
+    def test_nobody_to_tell_leaves_items_unescalated(self):
+        Directorate.objects.filter(pk=self.it.pk).update(hod_email='')
+        User.objects.filter(pk=self.admin.pk).update(is_active=False)
+        self.assertEqual(run_escalations(now=self.now), {'escalated': 0, 'emails': 0})
+        self.assertFalse(RequestedSystem.objects.filter(escalation_level__gt=0).exists())
+        self.assertFalse(EscalationNotice.objects.exists())
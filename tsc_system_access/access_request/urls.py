@@ -10,6 +10,10 @@ urlpatterns = [
     path('submitted/', views.request_submitted, name='request_submitted'),
     path('hod/dashboard/', views.hod_dashboard, name='hod_dashboard'),
     path("hod/decision/<int:system_id>/", views.hod_system_decision, name="hod_system_decision"),
+    path("hod/delegate/", views.hod_delegate, name="hod_delegate"),
+    path("hod/bulk/", views.hod_bulk_requests, name="hod_bulk_requests"),
+    path("api/hod/bulk-requests/", views.api_hod_bulk_requests, name="api_hod_bulk_requests"),
+    path("hod/recertification/", views.hod_recertification, name="hod_recertification"),
     path('hod/approve/<int:request_id>/', views.approve_request, name='approve_request'),
     path('hod/reject/<int:request_id>/', views.reject_request, name='reject_request'),
     path('ict/dashboard/', views.ict_dashboard, name='ict_dashboard'),
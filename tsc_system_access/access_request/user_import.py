@@ -0,0 +1,188 @@
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .models import CustomUser, Directorate, UserRole
+from .search import index_users
+
+IMPORT_BATCH_SIZE = 1000
+
+# Header (lowercased, spaces -> underscores) -> field. Anything else in the extract is ignored.
+COLUMN_ALIASES = {
+    'tsc_no': 'tsc_no', 'tsc_number': 'tsc_no', 'tsc': 'tsc_no',
+    'full_name': 'full_name', 'name': 'full_name', 'names': 'full_name',
+    'email': 'email', 'email_address': 'email',
+    'directorate': 'directorate', 'department': 'directorate',
+    'password': 'password',
+}
+
+
+# --- PARSING (streaming: one row in memory at a time) ---
+
+def _normalize_header(header, aliases=COLUMN_ALIASES):
+    return [aliases.get(str(h or '').strip().lower().replace(' ', '_')) for h in header]
+
+
+def _rows(header, values, aliases=COLUMN_ALIASES):
+    columns = _normalize_header(header, aliases)
+    for values_row in values:
+        row = {col: str(v).strip() for col, v in zip(columns, values_row) if col and v is not None}
+        if any(row.values()):
+            yield row
+
+
+def read_csv(fh, aliases=COLUMN_ALIASES):
+    """Yield row dicts from a CSV text or binary stream."""
+    if isinstance(fh.read(0), bytes):
+        # Uploaded files are proxies; wrap the underlying stream
+        fh = io.TextIOWrapper(getattr(fh, 'file', fh), encoding='utf-8-sig', newline='')
+    reader = csv.reader(fh)
+    header = next(reader, [])
+    yield from _rows(header, reader, aliases)
+
+
+def read_xlsx(fh, aliases=COLUMN_ALIASES):
+    """Yield row dicts from the first sheet of an XLSX workbook without loading it into memory."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fh, read_only=True, data_only=True)
+    try:
+        values = workbook.active.iter_rows(values_only=True)
+        header = next(values, [])
+        yield from _rows(header, values, aliases)
+    finally:
+        workbook.close()
+
+
+def read_extract(fh, name, aliases=COLUMN_ALIASES):
+    """Row dicts from a CSV or XLSX upload; `aliases` maps headers to keys (other uploads pass their own)."""
+    return read_xlsx(fh, aliases) if name.lower().endswith(('.xlsx', '.xlsm')) else read_csv(fh, aliases)
+
+
+# --- PASSWORDS ---
+
+def hash_passwords(passwords, workers=None):
+    """Hash many passwords across CPU cores; hashing is deliberately slow, so it dominates a serial import."""
+    if len(passwords) < 50:
+        return [make_password(p) for p in passwords]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return list(pool.map(make_password, passwords, chunksize=25))
+
+
+# --- IMPORT ---
+
+def import_users(rows, batch_size=IMPORT_BATCH_SIZE, dry_run=False, workers=None):
+    """Create or update users from HR rows (dicts with tsc_no, full_name, email, directorate[, password]).
+
+    Each batch costs a fixed handful of queries: existing users are read with in_bulk,
+    then new users and their UserRole rows are bulk-created and changed users
+    bulk-updated, so no post_save signal fires per user. New users get an unusable
+    password unless the extract has a password column. Returns a summary dict.
+    """
+    summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'errors': []}
+    directorates = {name.lower(): pk for pk, name in Directorate.objects.values_list('pk', 'name')}
+    seen = set()
+    rows = enumerate(rows, start=2)  # line numbers as shown in a spreadsheet (row 1 is the header)
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        with transaction.atomic():
+            _import_batch(batch, directorates, seen, summary, workers)
+            if dry_run:
+                transaction.set_rollback(True)
+    return summary
+
+
+def _clean(line, row, directorates, seen, errors):
+    tsc_no = row.get('tsc_no', '')
+    if not tsc_no or not row.get('full_name'):
+        errors.append((line, "TSC number and name are required"))
+        return None
+    if tsc_no in seen:
+        errors.append((line, f"{tsc_no} appears more than once; first row kept"))
+        return None
+    seen.add(tsc_no)
+
+    directorate_id = None
+    if row.get('directorate'):
+        directorate_id = directorates.get(row['directorate'].lower())
+        if directorate_id is None:
+            errors.append((line, f"{tsc_no}: unknown directorate '{row['directorate']}', left unassigned"))
+    return {
+        'tsc_no': tsc_no,
+        'full_name': row['full_name'][:255],
+        'email': row.get('email', '').lower() or None,
+        'directorate_id': directorate_id,
+        'password': row.get('password') or None,
+    }
+
+
+def _import_batch(batch, directorates, seen, summary, workers):
+    records = {}
+    for line, row in batch:
+        record = _clean(line, row, directorates, seen, summary['errors'])
+        if record:
+            records[record['tsc_no']] = (line, record)
+
+    existing = CustomUser.objects.in_bulk(list(records), field_name='tsc_no')
+    # Emails are unique: reject rows whose email belongs to a different TSC number. Imported emails
+    # are lowercased, so stored ones are compared lowercased too (older accounts may be mixed case)
+    emails = {r['email'] for _, r in records.values() if r['email']}
+    email_owner = dict(
+        CustomUser.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=emails).values_list('email_lower', 'tsc_no')
+    )
+
+    to_create, to_update, renamed = [], [], []
+    for tsc_no, (line, record) in records.items():
+        if record['email']:
+            owner = email_owner.setdefault(record['email'], tsc_no)
+            if owner != tsc_no:
+                summary['errors'].append((line, f"{tsc_no}: email {record['email']} already belongs to {owner}"))
+                continue
+
+        user = existing.get(tsc_no)
+        if user is None:
+            to_create.append(record)
+            continue
+        changed = [
+            field for field in ('full_name', 'email', 'directorate_id')
+            if record[field] is not None and getattr(user, field) != record[field]
+            and not (field == 'email' and (user.email or '').lower() == record['email'])
+        ]
+        if not changed:
+            summary['unchanged'] += 1
+            continue
+        if 'full_name' in changed:
+            renamed.append(user)
+        for field in changed:
+            setattr(user, field, record[field])
+        to_update.append(user)
+
+    if to_create:
+        passwords = [r['password'] for r in to_create if r['password']]
+        hashed = iter(hash_passwords(passwords, workers)) if passwords else iter(())
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                tsc_no=r['tsc_no'], full_name=r['full_name'], email=r['email'], directorate_id=r['directorate_id'],
+                password=next(hashed) if r['password'] else make_password(None),
+            )
+            for r in to_create
+        ])
+        # Re-read the new rows: MySQL does not return primary keys from bulk_create
+        created = list(CustomUser.objects.filter(tsc_no__in=[r['tsc_no'] for r in to_create]).only('pk', 'full_name'))
+        UserRole.objects.bulk_create([UserRole(user=u, role='staff') for u in created], ignore_conflicts=True)
+        index_users(created)
+        summary['created'] += len(created)
+
+    if to_update:
+        CustomUser.objects.bulk_update(to_update, ['full_name', 'email', 'directorate'])
+        index_users(renamed)
+        summary['updated'] += len(to_update)
@@ -1,5 +1,6 @@
 from datetime import date, datetime
 import io
+import json
 import os
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
@@ -17,17 +18,35 @@ from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet
 from django.templatetags.static import static
-from django.db.models import Q, Prefetch
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Prefetch
 import csv
 from io import BytesIO
 from django.urls import reverse
+from django.core.paginator import Paginator
 from django.http import HttpResponseRedirect
 
-from .models import AccessRequest, RequestedSystem, UserRole
-from .forms import AccessRequestForm
+from .models import AccessRequest, CustomUser, HodDelegation, RecertificationCampaign, RequestedSystem, UserRole
+from .forms import AccessRequestForm, HodBulkRequestForm, HodDelegationForm
+from .search import filter_by_search
+from .facets import apply_facets, compute_facets, selected_facets
+from .access_log import log_access
+from .archive import search_archive
+from .provisioning import enqueue as enqueue_provisioning
+from .sla import refresh_due_dates
+from .assignment import admin_systems, serving_slots, sync_assignments
+from .dedupe import find_duplicates
+from .bulk_requests import submission_scope, submit_rows
+from .delegation import delegated_to, deputy_emails, is_covering
+from .recertification import decide as decide_recertification, progress as recertification_progress
+from .notifications import queue_notification, request_context, state_key, system_context, wants_digest
 
 # --- HELPER: Centralized Status Logic ---
 def sync_request_status(request_obj):
+    # Every stage transition passes through here: move the SLA deadlines to the new open stages
+    refresh_due_dates(request_obj)
+    # ...and put systems that reached the System Admin stage into an admin's queue (or take them out)
+    sync_assignments(request_obj)
     all_systems = request_obj.requested_systems.all()
     
     hod_pending = all_systems.filter(hod_status='pending').exists()
@@ -50,7 +69,9 @@ def sync_request_status(request_obj):
 
     ict_approved_exists = all_systems.filter(ict_status='approved').exists()
     if ict_approved_exists:
-        request_obj.status = 'approved'
+        # Once everything that was granted has been revoked the request is 'revoked'
+        granted = all_systems.filter(ict_status='approved').exclude(sysadmin_status='revoked').exists()
+        request_obj.status = 'approved' if granted else 'revoked'
     else:
         request_obj.status = 'rejected_ict'
     
@@ -59,10 +80,24 @@ def sync_request_status(request_obj):
 # --- VIEWS ---
 
 @login_required
+@transaction.atomic
 def request_form_view(request):
     if request.method == 'POST':
         form = AccessRequestForm(request.POST)
         if form.is_valid():
+            # Skip systems the user already has pending (same request type) or, for new access, already holds.
+            # The requester row is locked first so a double submit cannot slip past the check.
+            CustomUser.objects.select_for_update().filter(pk=request.user.pk).first()
+            duplicates = find_duplicates(request.user, form.cleaned_data['systems'], form.cleaned_data['request_type'])
+            systems = [system for system in form.cleaned_data['systems'] if system not in duplicates]
+            labels = dict(RequestedSystem.SYSTEM_CHOICES)
+            skipped = ", ".join(f"{labels.get(system, system)} ({reason}, request #{request_id})" for system, (request_id, reason) in duplicates.items())
+            if not systems:
+                messages.warning(request, f"Nothing was submitted: {skipped}.")
+                return render(request, 'access_request/request_form.html', {'form': form})
+            if duplicates:
+                messages.info(request, f"Skipped {skipped}.")
+
             access = form.save(commit=False)
             access.requester = request.user
             access.tsc_no = request.user.tsc_no
@@ -70,26 +105,30 @@ def request_form_view(request):
             access.directorate = request.user.directorate
             access.save()
         
-            for system in form.cleaned_data['systems']:
+            for system in systems:
                 RequestedSystem.objects.create(
                     access_request=access,
                     system=system,
                     level_of_access=form.cleaned_data.get('access_levels', 'User')
                 )
+            refresh_due_dates(access)
 
-            if access.directorate and access.directorate.hod_email:
-                send_mail(
-                    subject='[TSC] New System Access Request Awaiting Your Approval',
-                    message=f"A new access request from {request.user.get_full_name()} ({request.user.email}) is pending review.",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[access.directorate.hod_email],
-                )
+            context = request_context(access)
 
-            send_mail(
-                subject='[TSC] Your System Access Request Has Been Submitted',
-                message=f"Hi {request.user.get_full_name()},\n\nYour request has been submitted and sent to your HOD.",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[request.user.email],
+            # HOD mailboxes on digest delivery get this item in the daily digest instead
+            if access.directorate and access.directorate.hod_email and not wants_digest(access.directorate.hod_email):
+                queue_notification(
+                    f"request-submitted:{access.pk}:hod", 'request_submitted_hod', context,
+                    [access.directorate.hod_email],
+                )
+            # Deputies covering for the HOD today are told as well
+            deputies = deputy_emails(access.directorate_id)
+            if deputies:
+                queue_notification(f"request-submitted:{access.pk}:deputy", 'request_submitted_hod', context, deputies)
+
+            queue_notification(
+                f"request-submitted:{access.pk}:requester", 'request_submitted_requester', context,
+                [request.user.email],
             )
 
             return redirect('request_submitted')
@@ -111,17 +150,20 @@ def hod_dashboard(request):
     user = request.user
     directorate = None
 
-    # 1. Role Guard - User must be HOD
+    # 1. Role Guard - User must be HOD, or a deputy covering for one today (cached, see delegation.py)
     user_role = UserRole.objects.filter(user=user, role='hod').first()
-    if not user_role:
+    covering = delegated_to(user)['directorates']
+    if not user_role and not covering:
         messages.error(request, "You do not have access to HOD dashboard.")
         return redirect('user_home')
     
-    # 2. Get Directorate from UserRole
-    directorate = user_role.directorate
-    if not directorate:
+    # 2. Get Directorate from UserRole, plus any directorates delegated to this user
+    directorate = user_role.directorate if user_role else None
+    if not directorate and not covering:
         messages.error(request, "No directorate assignment found for your HOD role.")
         return redirect('user_home')
+    covering_names = [name for pk, name in covering.items() if not directorate or pk != directorate.pk]
+    directorate_ids = ([directorate.pk] if directorate else []) + [pk for pk in covering if not directorate or pk != directorate.pk]
 
     requests = AccessRequest.objects.none()
     history = AccessRequest.objects.none()
@@ -132,11 +174,11 @@ def hod_dashboard(request):
     end_date = request.GET.get("end_date", "")
     active_tab = request.GET.get("active_tab", "pending")
 
-    if directorate:
+    if directorate_ids:
         # --- A. Pending Requests ---
-        # Fetch AccessRequests (Parents) that have at least one pending system for this directorate
+        # Fetch AccessRequests (Parents) that have at least one pending system for these directorates
         requests = AccessRequest.objects.filter(
-            directorate=directorate,
+            directorate_id__in=directorate_ids,
             requested_systems__hod_status="pending"
         ).distinct().select_related('requester').prefetch_related(
             Prefetch('requested_systems', queryset=RequestedSystem.objects.filter(hod_status='pending'))
@@ -148,10 +190,10 @@ def hod_dashboard(request):
             hod_approver=user
         ).order_by('-submitted_at').select_related('requester').prefetch_related('requested_systems')
 
-        # --- C. Apply TSC Search (Fixes your issue) ---
+        # --- C. Apply TSC / Name Search (indexed, see search.py) ---
         if search_term:
-            requests = requests.filter(tsc_no__icontains=search_term)
-            history = history.filter(tsc_no__icontains=search_term)
+            requests = filter_by_search(requests, search_term)
+            history = filter_by_search(history, search_term)
 
         # --- D. Apply Date Range Filter ---
         if start_date and end_date:
@@ -167,6 +209,7 @@ def hod_dashboard(request):
 
         # --- E. Export Logic (Exports HISTORY data) ---
         if "export_excel" in request.GET:
+            log_access(request, "Export Excel (HOD)")
             wb = Workbook()
             ws = wb.active
             ws.title = "HOD Decisions"
@@ -188,12 +231,14 @@ def hod_dashboard(request):
             return response
 
         if "export_pdf" in request.GET:
+            log_access(request, "Export PDF (HOD)")
             buffer = io.BytesIO()
             doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
             elements = []
             styles = getSampleStyleSheet()
             
-            elements.append(Paragraph(f"HOD Approval Report - {directorate.name}", styles["Title"]))
+            report_names = ([directorate.name] if directorate else []) + covering_names
+            elements.append(Paragraph(f"HOD Approval Report - {', '.join(report_names)}", styles["Title"]))
             elements.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d')}", styles["Normal"]))
             elements.append(Spacer(1, 20))
             
@@ -227,28 +272,41 @@ def hod_dashboard(request):
         "requests": requests,
         "history": history,
         "hod_directorate": directorate,
+        "covering_directorates": covering_names,
+        "delegations": HodDelegation.objects.filter(hod=user, end_date__gte=localdate()).select_related('deputy') if directorate else [],
+        "delegation_form": HodDelegationForm() if directorate else None,
         "user": user,
         "active_tab": active_tab,
+        # Archived (closed) requests are only searched when asked for
+        "archived_requests": search_archive(search_term, start_date, end_date, hod_approver=user) if request.GET.get("archived") else None,
     })
 
     
 @login_required
+@transaction.atomic
 def hod_system_decision(request, system_id):
-    # ... (Role & Scope checks remain the same) ...
-    if not getattr(request.user, "userrole", None) or request.user.userrole.role != "hod":
+    # Deputies covering for a HOD today act with the HOD's scope; the cached index lets them in,
+    # the delegation itself is confirmed below before anything is decided
+    delegated = delegated_to(request.user)
+    is_hod = getattr(request.user, "userrole", None) and request.user.userrole.role == "hod"
+    if not is_hod and not delegated['directorates']:
         return HttpResponse(status=403, content="Access Denied")
 
     system = get_object_or_404(RequestedSystem, id=system_id)
     request_obj = system.access_request
     
-    # Check if user is HOD for this directorate or manages the requester
-    hod_role = UserRole.objects.filter(user=request.user, role='hod').first()
-    is_authorized = hod_role and (
-        hod_role.directorate == request_obj.directorate or 
-        UserRole.objects.filter(hod=request.user, user=request_obj.requester).exists()
+    # Check if user is HOD for this directorate or manages the requester, else covering for that HOD today
+    is_authorized = is_hod and (
+        request.user.userrole.directorate_id == request_obj.directorate_id
+        or UserRole.objects.filter(hod=request.user, user=request_obj.requester_id).exists()
     )
+    if not is_authorized and delegated['directorates']:
+        is_authorized = is_covering(request.user, request_obj.directorate_id, request_obj.requester_id)
     if not is_authorized:
          return HttpResponse(status=403, content="Access Denied")
+    # Nobody approves their own access, HOD or deputy
+    if request_obj.requester_id == request.user.pk:
+        return HttpResponse(status=403, content="You cannot decide on your own request")
 
     if request.method == "POST":
         action = request.POST.get("action")
@@ -273,50 +331,23 @@ def hod_system_decision(request, system_id):
 
         sync_request_status(request_obj)
         request_obj.save()
+        log_access(request, f"HOD {action}: {system.system} #{system.pk}")
 
         # --- BUNDLED EMAIL LOGIC (HOD) ---
-        # Check if there are any other systems for this request that are still pending HOD action
-        pending_hod = request_obj.requested_systems.filter(hod_status="pending").exists()
-        
-        if not pending_hod:
+        # One query loads every system of the request; pending/approved checks are done on that list
+        context = request_context(request_obj)
+        systems = context['systems']
+
+        if not any(s['hod_status'] == 'pending' for s in systems):
             # ALL systems have been processed by HOD. Send Bundle Email.
-            
+            review_key = state_key("hod-review", request_obj.pk, *[(s['id'], s['hod_status']) for s in systems])
+
             # 1. Email to ICT Team
-            approved_systems = request_obj.requested_systems.filter(hod_status="approved")
-            if approved_systems.exists():
-                system_list = "\n".join([f"- {s.get_system_display()}" for s in approved_systems])
-                send_mail(
-                    subject=f"[TSC] New Approved Systems for {request_obj.requester.full_name}",
-                    message=f"The following systems have been approved by HOD and are ready for ICT review:\n\n"
-                            f"Requester: {request_obj.requester.full_name} ({request_obj.tsc_no})\n"
-                            f"Directorate: {request_obj.directorate.name if request_obj.directorate else '-'}\n\n"
-                            f"Systems:\n{system_list}\n\n"
-                            f"Please log in to the ICT Dashboard to action these requests.",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.ICT_TEAM_EMAIL] if settings.ICT_TEAM_EMAIL else [],
-                    fail_silently=True,
-                )
+            if any(s['hod_status'] == 'approved' for s in systems) and not wants_digest(settings.ICT_TEAM_EMAIL):
+                queue_notification(f"{review_key}:ict", 'hod_review_ict', context, [settings.ICT_TEAM_EMAIL])
 
             # 2. Email to Requester (Summary)
-            all_systems = request_obj.requested_systems.all()
-            summary_list = "\n".join([f"- {s.get_system_display()}: {s.hod_status.upper()}" for s in all_systems])
-            
-            send_mail(
-                subject='[TSC] HOD Review Complete - System Access Request',
-                message=f"Dear {request_obj.requester.get_full_name()},\n\n"
-                        f"Your HOD has completed the review of your system access request.\n\n"
-                        f"Summary:\n{summary_list}\n\n"
-                        f"Approved systems have been forwarded to ICT for further processing.\n\n"
-                        f"Regards,\nTSC System Access",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[request_obj.email],
-                fail_silently=True,
-            )
-
-        pending = request_obj.requested_systems.filter(hod_status="pending").exists()
-        if not pending:
-            # ... (Keep existing email code) ...
-            pass
+            queue_notification(f"{review_key}:requester", 'hod_review_requester', context, [request_obj.email])
 
         # ✅ FIX: Redirect with Preserved Filters
         base_url = reverse('hod_dashboard')
@@ -327,6 +358,139 @@ def hod_system_decision(request, system_id):
 
     return redirect("hod_dashboard")
 
+@login_required
+def hod_delegate(request):
+    """HOD names a deputy for a date range (e.g. leave), or cancels one of their delegations."""
+    hod_role = UserRole.objects.filter(user=request.user, role='hod').select_related('directorate').first()
+    if not hod_role or not hod_role.directorate or request.method != "POST":
+        return redirect("hod_dashboard")
+
+    if request.POST.get("cancel"):
+        HodDelegation.objects.filter(pk=request.POST["cancel"], hod=request.user).delete()
+        messages.success(request, "Delegation cancelled.")
+        return redirect(f"{reverse('hod_dashboard')}?active_tab=delegation")
+
+    form = HodDelegationForm(request.POST)
+    if form.is_valid():
+        deputy = form.cleaned_data['deputy_tsc_no']
+        if deputy == request.user:
+            messages.error(request, "You cannot delegate to yourself.")
+        else:
+            HodDelegation.objects.create(
+                hod=request.user, deputy=deputy, directorate=hod_role.directorate,
+                start_date=form.cleaned_data['start_date'], end_date=form.cleaned_data['end_date'],
+                reason=form.cleaned_data['reason'],
+            )
+            log_access(request, f"HOD delegation to {deputy.tsc_no}")
+            messages.success(request, f"{deputy.full_name} will act for you from {form.cleaned_data['start_date']} to {form.cleaned_data['end_date']}.")
+    else:
+        messages.error(request, " ".join(e for errors in form.errors.values() for e in errors))
+    return redirect(f"{reverse('hod_dashboard')}?active_tab=delegation")
+
+@login_required
+def hod_bulk_requests(request):
+    """HOD onboarding: request access for many staff at once, from an upload or a selection.
+    The HOD stage is approved by the submitter, so the requests go straight to ICT.
+    """
+    scope = submission_scope(request.user)
+    if not scope:
+        messages.error(request, "You do not have access to HOD bulk requests.")
+        return redirect('user_home')
+
+    form = HodBulkRequestForm(request.POST or None, request.FILES or None, directorate_ids=scope)
+    result = None
+    if request.method == "POST" and form.is_valid():
+        result = submit_rows(request.user, form.rows(), validate_only=form.cleaned_data['validate_only'])
+        if result['batch']:
+            log_access(request, f"HOD bulk submission: {len(result['request_ids'])} request(s)")
+            messages.success(request, f"✅ Submitted {len(result['request_ids'])} request(s); they are now with ICT.")
+        elif result['errors']:
+            messages.error(request, "Nothing was submitted. Fix the rows below and try again.")
+        elif not result['items']:
+            messages.warning(request, "Nothing to submit: every system is already pending or granted.")
+        else:
+            messages.info(request, f"All rows are valid: {len(result['items'])} request(s) would be submitted.")
+    return render(request, "access_request/hod_bulk_requests.html", {"form": form, "result": result})
+
+@require_POST
+@login_required
+def api_hod_bulk_requests(request):
+    """JSON version of hod_bulk_requests: {"requests": [{tsc_no, systems, request_type, designation,
+    level_of_access}, ...], "validate_only": false}. Nothing is created if any row has an error.
+    """
+    if not submission_scope(request.user):
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+    try:
+        payload = json.loads(request.body)
+        rows = payload["requests"]
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Expected a JSON object with a list of requests"}, status=400)
+
+    result = submit_rows(request.user, rows, validate_only=bool(payload.get("validate_only")))
+    if result['batch']:
+        log_access(request, f"HOD bulk submission (API): {len(result['request_ids'])} request(s)")
+    return JsonResponse({
+        "batch": result['batch'],
+        "created": len(result['request_ids']),
+        "request_ids": result['request_ids'],
+        "errors": [{"row": row, "error": error} for row, error in result['errors']],
+        "skipped": [
+            {"row": s['row'], "tsc_no": s['member'].tsc_no, "system": s['system'], "existing_request": s['request_id'], "reason": s['reason']}
+            for s in result['skipped']
+        ],
+    }, status=201 if result['batch'] else 400 if result['errors'] else 200)
+
+@login_required
+def hod_recertification(request):
+    """HOD review of an open recertification campaign: certify or revoke the directorate's entitlements,
+    a page of ticked rows at a time or every pending row matching the filters. The HOD's own
+    entitlements are not shown; the admins decide those.
+    """
+    scope = submission_scope(request.user)
+    if not scope:
+        messages.error(request, "You do not have access to access recertification.")
+        return redirect('user_home')
+
+    campaigns = RecertificationCampaign.objects.filter(status='open', items__directorate__in=scope).distinct()
+    campaign = campaigns.filter(pk=request.GET.get("campaign")).first() if request.GET.get("campaign") else campaigns.first()
+    if not campaign:
+        messages.info(request, "There is no open access recertification for your directorate.")
+        return redirect('hod_dashboard')
+
+    reviewable = campaign.items.filter(directorate__in=scope).exclude(holder=request.user)
+    items = reviewable
+    system = request.GET.get("system", "")
+    search_term = request.GET.get("tsc", "").strip()
+    decision = request.GET.get("decision", "pending")
+    if system:
+        items = items.filter(system=system)
+    if search_term:
+        items = filter_by_search(items, search_term, 'tsc_no', 'holder')
+
+    if request.method == "POST":
+        action = {"certify": 'certified', "revoke": 'revoked'}.get(request.POST.get("action"))
+        selected = items if request.POST.get("all_pending") else items.filter(pk__in=request.POST.getlist("items"))
+        if action:
+            decided = decide_recertification(selected, action, decided_by=request.user, comment=request.POST.get("comment", "").strip())
+            log_access(request, f"Recertification {campaign.pk}: {action} {decided} item(s)")
+            messages.success(request, f"{decided} entitlement(s) {action}.")
+        return redirect(f"{reverse('hod_recertification')}?{request.GET.urlencode()}")
+
+    page = Paginator(
+        items.filter(decision=decision).select_related('holder', 'directorate', 'requested_system', 'decided_by').order_by('holder__full_name', 'system', 'pk'),
+        100,
+    ).get_page(request.GET.get("page"))
+    return render(request, "access_request/hod_recertification.html", {
+        "campaign": campaign,
+        "campaigns": campaigns,
+        "page": page,
+        "progress": recertification_progress(reviewable),
+        "system_choices": RequestedSystem.SYSTEM_CHOICES,
+        "filters": {"system": system, "tsc": search_term, "decision": decision},
+    })
+
 @login_required
 def ict_dashboard(request):
     """ICT dashboard: Pending items + History + Search/Filter + Export."""
@@ -363,10 +527,10 @@ def ict_dashboard(request):
         ict_approver=user
     ).order_by('-submitted_at').select_related('requester', 'directorate').prefetch_related('requested_systems')
 
-    # --- C. Apply TSC Search ---
+    # --- C. Apply TSC / Name Search (indexed, see search.py) ---
     if search_term:
-        requests = requests.filter(tsc_no__icontains=search_term)
-        history = history.filter(tsc_no__icontains=search_term)
+        requests = filter_by_search(requests, search_term)
+        history = filter_by_search(history, search_term)
 
     # --- D. Apply Date Range Filter ---
     if start_date and end_date:
@@ -381,6 +545,7 @@ def ict_dashboard(request):
 
     # --- E. Export Logic (Exports HISTORY data) ---
     if "export_excel" in request.GET:
+        log_access(request, "Export Excel (ICT)")
         wb = Workbook()
         ws = wb.active
         ws.title = "ICT Decisions"
@@ -404,6 +569,7 @@ def ict_dashboard(request):
         return response
 
     if "export_pdf" in request.GET:
+        log_access(request, "Export PDF (ICT)")
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
         elements = []
@@ -441,10 +607,12 @@ def ict_dashboard(request):
         "history": history,
         "user": user,
         "active_tab": active_tab,
+        "archived_requests": search_archive(search_term, start_date, end_date, ict_approver=user) if request.GET.get("archived") else None,
     })
 
 
 @login_required
+@transaction.atomic
 def ict_system_decision(request, system_id):
     # ... (Role checks remain the same) ...
     if not getattr(request.user, "userrole", None) or request.user.userrole.role != "ict":
@@ -473,28 +641,18 @@ def ict_system_decision(request, system_id):
 
         sync_request_status(request_obj)
         request_obj.save()
+        log_access(request, f"ICT {action}: {system.system} #{system.pk}")
 
         # --- BUNDLED EMAIL LOGIC (ICT) ---
-        # Check if there are any other systems for this request that are still pending ICT action
-        pending_ict = request_obj.requested_systems.filter(ict_status="pending").exists()
-
-        if not pending_ict:
-            # ALL systems have been processed by ICT. Send Bundle Email.
-            
-            # 1. Email to Requester (Final Summary)
-            all_systems = request_obj.requested_systems.all()
-            summary_list = "\n".join([f"- {s.get_system_display()}: {s.ict_status.upper()}" for s in all_systems])
-            
-            send_mail(
-                subject='[TSC] ICT Review Complete - System Access Request',
-                message=f"Dear {request_obj.requester.get_full_name()},\n\n"
-                        f"The ICT Team has completed the review of your system access request.\n\n"
-                        f"Summary:\n{summary_list}\n\n"
-                        f"Approved systems have been forwarded to the respective System Administrators for provisioning.\n\n"
-                        f"Regards,\nTSC ICT Team",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[request_obj.email],
-                fail_silently=True,
+        # One query loads every system of the request; the pending check is done on that list
+        context = request_context(request_obj)
+        systems = context['systems']
+
+        if not any(s['ict_status'] == 'pending' for s in systems):
+            # ALL systems have been processed by ICT. Send Bundle Email (Final Summary to Requester).
+            queue_notification(
+                state_key("ict-review", request_obj.pk, *[(s['id'], s['ict_status']) for s in systems]),
+                'ict_review_requester', context, [request_obj.email],
             )
 
 
@@ -522,9 +680,9 @@ def system_admin_dashboard(request):
         messages.error(request, "You do not have access to System Admin dashboard.")
         return redirect("user_home")
 
-    # 2. Get the system assigned to this admin
-    assigned_system = user_role.system_assigned
-    if not assigned_system:
+    # 2. Get the systems assigned to this admin
+    assigned_systems = admin_systems(request.user, user_role)
+    if not assigned_systems:
         messages.error(request, "No system has been assigned to you yet.")
         return redirect("user_home")
     
@@ -534,34 +692,39 @@ def system_admin_dashboard(request):
     end_date = request.GET.get("end_date", "")
     active_tab = request.GET.get("active_tab", "pending")
     
-    # 4. Base Querysets - Filter ONLY by assigned system
+    # 4. Base Querysets - Filter ONLY by assigned systems
     
-    # A. Pending: Systems with status 'pending' for THIS admin's assigned system
+    # A. Pending: Systems with status 'pending' in THIS admin's queue, plus those not yet assigned to anyone
+    # (still with HOD/ICT, or a system without active admins) or left with someone no longer serving the
+    # system until the next rebalance; colleagues' queues are left out
+    my_queue = Q(sysadmin_assignee=request.user) | Q(sysadmin_assignee__isnull=True) | ~Exists(
+        serving_slots().filter(admin=OuterRef('sysadmin_assignee'), system=OuterRef('system'))
+    )
     requests = AccessRequest.objects.filter(
-        requested_systems__system=assigned_system,
-        requested_systems__sysadmin_status="pending"
-    ).distinct().select_related('requester').prefetch_related(
+        pk__in=RequestedSystem.objects.filter(my_queue, system__in=assigned_systems, sysadmin_status="pending").values('access_request')
+    ).select_related('requester').prefetch_related(
         Prefetch('requested_systems', queryset=RequestedSystem.objects.filter(
-            system=assigned_system,
+            my_queue,
+            system__in=assigned_systems,
             sysadmin_status='pending'
         ))
     )
 
-    # B. History: Systems actioned by THIS admin for THIS assigned system
+    # B. History: Systems actioned by THIS admin for THIS admin's systems
     history = AccessRequest.objects.filter(
-        requested_systems__system=assigned_system,
+        requested_systems__system__in=assigned_systems,
         requested_systems__system_admin=request.user
     ).distinct().order_by('-submitted_at').select_related('requester').prefetch_related(
         Prefetch('requested_systems', queryset=RequestedSystem.objects.filter(
-            system=assigned_system,
+            system__in=assigned_systems,
             system_admin=request.user
         ))
     )
 
     # 5. Apply Filters
     if search_term:
-        requests = requests.filter(tsc_no__icontains=search_term)
-        history = history.filter(tsc_no__icontains=search_term)
+        requests = filter_by_search(requests, search_term)
+        history = filter_by_search(history, search_term)
 
     if start_date and end_date:
         try:
@@ -574,6 +737,7 @@ def system_admin_dashboard(request):
 
     # 5. Export Logic (History)
     if "export_excel" in request.GET:
+        log_access(request, "Export Excel (SysAdmin)")
         wb = Workbook()
         ws = wb.active
         ws.title = "System Admin History"
@@ -595,6 +759,7 @@ def system_admin_dashboard(request):
         return response
 
     if "export_pdf" in request.GET:
+        log_access(request, "Export PDF (SysAdmin)")
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
         elements = []
@@ -627,15 +792,16 @@ def system_admin_dashboard(request):
         buffer.seek(0)
         return HttpResponse(buffer, content_type='application/pdf')
 
-    # Stats Counters - Only for assigned system
-    total_requests = RequestedSystem.objects.filter(system=assigned_system, sysadmin_status__isnull=False).count()
-    pending_requests = RequestedSystem.objects.filter(system=assigned_system, sysadmin_status="pending").count()
-    approved_requests = RequestedSystem.objects.filter(system=assigned_system, sysadmin_status="approved").count()
-    rejected_requests = RequestedSystem.objects.filter(system=assigned_system, sysadmin_status="rejected").count()
-    today_requests = RequestedSystem.objects.filter(system=assigned_system, access_request__submitted_at__date=date.today()).count()
+    # Stats Counters - Only for assigned systems
+    total_requests = RequestedSystem.objects.filter(system__in=assigned_systems, sysadmin_status__isnull=False).count()
+    pending_requests = RequestedSystem.objects.filter(my_queue, system__in=assigned_systems, sysadmin_status="pending").count()
+    approved_requests = RequestedSystem.objects.filter(system__in=assigned_systems, sysadmin_status="approved").count()
+    rejected_requests = RequestedSystem.objects.filter(system__in=assigned_systems, sysadmin_status="rejected").count()
+    today_requests = RequestedSystem.objects.filter(system__in=assigned_systems, access_request__submitted_at__date=date.today()).count()
 
-    # Get system name
-    system_name = dict(RequestedSystem.SYSTEM_CHOICES).get(assigned_system, assigned_system)
+    # Get system names
+    labels = dict(RequestedSystem.SYSTEM_CHOICES)
+    system_name = ", ".join(labels.get(system, system) for system in assigned_systems)
 
     context = {
         "system_name": system_name,
@@ -654,6 +820,7 @@ def system_admin_dashboard(request):
 
 @require_POST
 @login_required
+@transaction.atomic
 def system_admin_decision(request, pk):
     # 1. Role Guard - check if user is a system admin
     user_role = UserRole.objects.filter(user=request.user, role='sys_admin').first()
@@ -662,8 +829,8 @@ def system_admin_decision(request, pk):
 
     sys_req = get_object_or_404(RequestedSystem, pk=pk)
     
-    # 2. Scope Guard - verify system matches assigned system
-    if sys_req.system != user_role.system_assigned:
+    # 2. Scope Guard - verify system is one of the admin's systems (any of its admins may act, e.g. to cover a colleague)
+    if sys_req.system not in admin_systems(request.user, user_role):
         error_msg = "You cannot manage this system"
         return JsonResponse({"error": error_msg}, status=403) if request.headers.get('X-Requested-With') == 'XMLHttpRequest' else HttpResponse(status=403, content=error_msg)
     
@@ -691,15 +858,17 @@ def system_admin_decision(request, pk):
     sys_req.sysadmin_decision_date = timezone.now()
     sys_req.system_admin = request.user
     sys_req.save()
+    log_access(request, f"SysAdmin {action}: {sys_req.system} #{sys_req.pk}")
+    # Approvals are carried out in the target system by the provisioning worker
+    enqueue_provisioning([sys_req])
 
     # 5. Notifications
     requester = sys_req.access_request.requester
-    send_mail(
-        subject=f"[TSC] Access Update for {sys_req.get_system_display()}",
-        message=f"Dear {requester.full_name},\n\nRights have been granted/updated for {sys_req.get_system_display()}.\n\nRegards,\nTSC ICT Team",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[requester.email],
-        fail_silently=True,
+    queue_notification(
+        state_key("sysadmin-decision", sys_req.pk, sys_req.sysadmin_status, comment),
+        'sysadmin_decision',
+        {'requester_name': requester.full_name, 'system': system_context(sys_req)},
+        [requester.email],
     )
 
     # 6. Sync Parent Status
@@ -737,8 +906,9 @@ def overall_admin_dashboard(request):
         messages.error(request, "You do not have access to Overall Admin dashboard.")
         return redirect('user_home')
 
-    status_filter = request.GET.get("status", "")
     tsc_filter = request.GET.get("tsc", "")
+    # Facets: directorate, system, status (stage), request_type, approver
+    selected = selected_facets(request.GET)
     
     # ✅ NEW: Get Date Range
     start_date = request.GET.get("start_date", "")
@@ -746,14 +916,16 @@ def overall_admin_dashboard(request):
     
     access_requests = AccessRequest.objects.all().select_related(
         'requester', 'directorate', 'hod_approver', 'ict_approver'
-    ).prefetch_related('requested_systems').order_by('-submitted_at')
+    ).prefetch_related(
+        Prefetch('requested_systems', queryset=RequestedSystem.objects.select_related('system_admin'))
+    ).order_by('-submitted_at')
+    # Facet counts are computed over requested systems with the same non-facet filters
+    facet_systems = RequestedSystem.objects.all()
 
     # --- FILTERING ---
     if tsc_filter:
-        access_requests = access_requests.filter(tsc_no__icontains=tsc_filter)
-    
-    if status_filter:
-        access_requests = access_requests.filter(status=status_filter)
+        access_requests = filter_by_search(access_requests, tsc_filter)
+        facet_systems = filter_by_search(facet_systems, tsc_filter, 'access_request__tsc_no', 'access_request__requester')
 
     # ✅ NEW: Date Range Filtering
     if start_date and end_date:
@@ -762,11 +934,15 @@ def overall_admin_dashboard(request):
             # Set end date to end of day (23:59:59)
             e_date = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
             access_requests = access_requests.filter(submitted_at__range=(s_date, e_date))
+            facet_systems = facet_systems.filter(access_request__submitted_at__range=(s_date, e_date))
         except ValueError:
             pass
 
+    access_requests = apply_facets(access_requests, selected)
+
     # --- EXPORT TO EXCEL ---
     if "export_excel" in request.GET:
+        log_access(request, "Export Excel (Overall)")
         wb = Workbook()
         ws = wb.active
         ws.title = "Access Requests"
@@ -790,6 +966,7 @@ def overall_admin_dashboard(request):
 
     # --- EXPORT TO PDF ---
     if "export_pdf" in request.GET:
+        log_access(request, "Export PDF (Overall)")
         buffer = io.BytesIO()
         # Landscape for better table fit
         doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18)
@@ -835,9 +1012,19 @@ def overall_admin_dashboard(request):
         buffer.seek(0)
         return HttpResponse(buffer, content_type='application/pdf')
 
+    facets, total = compute_facets(facet_systems, selected)
+
+    page_obj = Paginator(access_requests, 25).get_page(request.GET.get("page"))
+    params = request.GET.copy()
+    params.pop("page", None)
+
     context = {
-        "access_requests": access_requests,
-        "total": RequestedSystem.objects.count(),
+        "access_requests": page_obj.object_list,
+        "page_obj": page_obj,
+        "facets": facets,
+        "query_string": params.urlencode(),
+        "total": total,
+        "archived_requests": search_archive(tsc_filter, start_date, end_date) if request.GET.get("archived") else None,
     }
     return render(request, "access_request/overall_admin_dashboard.html", context)
 
@@ -847,6 +1034,7 @@ def overall_admin_dashboard(request):
 
 @require_POST
 @login_required
+@transaction.atomic
 def overall_admin_override(request, sys_id):
     if not request.user.is_superuser and getattr(request.user.userrole, 'role', '') != 'super_admin':
         return HttpResponse(status=403)
@@ -881,19 +1069,19 @@ def overall_admin_override(request, sys_id):
     system_request.save()
     request_obj.save()
     sync_request_status(request_obj)
+    log_access(request, f"Override {target_stage} {new_status}: #{system_request.pk}")
+    if target_stage == 'sys_admin':
+        enqueue_provisioning([system_request])
 
     # ✅ NEW: Send Notification Email
-    send_mail(
-        subject=f"[TSC] Admin Override: Access to {system_request.get_system_display()}",
-        message=f"Dear {request_obj.requester.full_name},\n\n"
-                f"Your request for {system_request.get_system_display()} has been updated by the System Administrator.\n\n"
-                f"Stage: {target_stage.upper()}\n"
-                f"New Status: {new_status.upper()}\n"
-                f"Comment: {comment}\n\n"
-                "Regards,\nTSC ICT Team",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[request_obj.email],
-        fail_silently=True,
+    queue_notification(
+        state_key("admin-override", system_request.pk, target_stage, new_status, comment),
+        'admin_override',
+        {
+            'requester_name': request_obj.requester.full_name, 'system': system_context(system_request),
+            'stage': target_stage, 'new_status': new_status, 'comment': comment,
+        },
+        [request_obj.email],
     )
 
     messages.success(request, f"Override applied to {system_request.get_system_display()}. Email sent.")
@@ -911,6 +1099,8 @@ def request_submitted(request): return render(request, 'access_request/request_s
 def home_redirect(request):
     try: role = request.user.userrole.role
     except: return redirect("user_home")
+    if role == "staff" and delegated_to(request.user)['directorates']:
+        return redirect("hod_dashboard")
     return redirect({"staff":"user_home","hod":"hod_dashboard","ict":"ict_dashboard","sys_admin":"system_admin_dashboard","super_admin":"overall_admin_dashboard"}.get(role,"user_home"))
 
 def approve_request(request, request_id): return redirect('hod_dashboard')
@@ -928,6 +1118,7 @@ def export_system_admin_data(request, format):
         return redirect("home")
     requests = RequestedSystem.objects.filter(system_admin=request.user).select_related('access_request')
     if format == "csv":
+        log_access(request, "Export CSV (SysAdmin)")
         response = HttpResponse(content_type="text/csv")
         response['Content-Disposition'] = f'attachment; filename="system_admin_requests.csv"'
         writer = csv.writer(response)